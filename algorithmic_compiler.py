@@ -1,76 +1,206 @@
 """
 Uses the Compiler class to compile the project into Algorithmic code.
 """
-from compiler import Compiler
+from typing import Dict, Optional
+
+from compiler import Compiler, ContextAttribute, OptionAttribute
+from custom_types import (
+	ArrayDeclaration, Assignment, Comment, ConstantDeclaration, Deletion, Expression, ForLoop, FunctionDeclaration,
+	Instruction, StructDeclaration, StructInitialization, Token, TypeReference, VariableDeclaration
+)
+
+
+# The line end marker of the print statements
+ENDL_MARKER = "(ENDL)"
 
 
 class AlgorithmicCompiler(Compiler):
+	fxtext = ContextAttribute("fxtext")
+	fxtext_lines = ContextAttribute("fxtext_lines")
+	use_ptrs_and_malloc = OptionAttribute("use_ptrs_and_malloc")
+
 	def __init__(self, instruction_names:dict, var_types:dict, other_instructions:list, stdscr, translations, translate_method, app, tab_char:str="\t"):
 		super().__init__(instruction_names, var_types, other_instructions, stdscr, translations, translate_method, tab_char)
 		self.fxtext = []
+		self.fxtext_lines = []  # The index of the source line of each line of fxtext
 		self.app = app
-		self.use_ptrs_and_malloc = self.app.use_ptrs_and_malloc
+		# Whether the pointers and the 'new' and 'delete' keywords are enabled, from the settings of the app
+		self.use_ptrs_and_malloc = app.use_ptrs_and_malloc
+
+		# The outputs of each unit, cached for the incremental compilation
+		self.unit_output_lists = ("fxtext", "fxtext_lines")
+		self.unit_line_lists = ("fxtext_lines",)
 
 
 	def prepare_new_compilation(self):
-		self.fxtext.clear()
-		self.use_ptrs_and_malloc = self.app.use_ptrs_and_malloc
+		self.fxtext = []
+		self.fxtext_lines = []
+
+
+	def get_options_key(self) -> tuple:
+		""" The options changing the output of the compiler. """
+		return (*super().get_options_key(), self.use_ptrs_and_malloc)
+
+
+	def get_dedented_instructions(self) -> tuple:
+		""" The function sections are also written at the level of the function. """
+		return (*super().get_dedented_instructions(), "fx_start", "vars")
+
+
+	def render_expression(self, expression: Expression, replacements: Optional[Dict[str, str]] = None) -> str:
+		""" Writes the line ends of the string literals as (FIN DE LIGNE) """
+		text = super().render_expression(expression, replacements)
+		if ENDL_MARKER not in text:
+			return text
+		return "".join(
+			token.text.replace(ENDL_MARKER, "(FIN DE LIGNE)") if token.kind == "string" else token.text
+			for token in expression.tokens
+		)
+
+
+	def rewrite_line(self, line: str) -> str:
+		""" Writes the line ends as (FIN DE LIGNE) """
+		return line.replace(ENDL_MARKER, "(FIN DE LIGNE)")
+
+
+	def get_field_type(self, type_reference: TypeReference) -> str:
+		"""
+		Writes the type of a parameter of a function or of a field of a structure.
+		:param type_reference: The type.
+		:exception KeyError: If the type is unknown, or is a pointer while the pointers are disabled.
+		"""
+		field_type = ""
+		# Pointers
+		if type_reference.is_pointer:
+			if not self.use_ptrs_and_malloc:
+				raise KeyError(type_reference.text)
+			field_type += "Pointeur sur "
+
+		# Constants
+		if type_reference.is_const:
+			field_type += "Constante "
+
+		# If the type is an array, we write its dimensions and the type of its items
+		if type_reference.kind == "array":
+			return field_type + f"Tableau[{']['.join(type_reference.dimensions)}] de " \
+			                    f"{self.var_types.get(type_reference.base, type_reference.base)}s"
 
+		# If the type is a structure
+		if type_reference.kind == "struct":
+			return field_type + f"Structure {type_reference.base}"
 
-	def analyze_const(self, instruction_name:str, instruction_params:list, line_number:int):
-		""" Constante : Nom : Paramètres """
-		self.instructions_list[line_number] = f"{self.instruction_names['const']} : {self.var_types[instruction_params[0]]} : {' '.join(instruction_params[1:])}"
+		return field_type + self.var_types[type_reference.base]
 
 
-	def define_var(self, instruction:list, line_number:int):
+	def get_return_type(self, type_reference: TypeReference) -> str:
+		"""
+		Writes the return type of a function.
+		:param type_reference: The type.
+		:exception KeyError: If the type is unknown or constant, or is a pointer while the pointers are disabled.
+		"""
+		if type_reference.is_const or (type_reference.is_pointer and not self.use_ptrs_and_malloc):
+			raise KeyError(type_reference.text)
+		return_type = "Pointeur sur " if type_reference.is_pointer else ""
+
+		# If the return type is a structure
+		if type_reference.kind == "struct":
+			return return_type + f"Structure {type_reference.base}"
+
+		# If the return type is an array, we add its dimensions
+		if type_reference.kind == "array":
+			return return_type + f"Tableau de {self.var_types[type_reference.base]}" + \
+			       "".join(f"[{dimension}]" for dimension in type_reference.dimensions)
+
+		return return_type + self.var_types[type_reference.base]
+
+
+	def format_assignment(self, target: str, operator: str, value: Expression, line_number: int) -> str:
+		"""
+		Writes the assignment of a value to a variable, with the operator if it is not a simple assignment.
+		:param target: The assigned variable.
+		:param operator: The operator, e.g. '=' or '+='.
+		:param value: The assigned value.
+		:param line_number: The index of the line, for the errors.
+		"""
+		# Reassigns a value with an operator
+		if operator != "=":
+			return f"{target} <- {target} {operator[:-1]} {self.render_expression(value)}"
+
+		tokens = value.tokens
+		# If pointers are enabled and the user gets the address of the variable
+		if self.use_ptrs_and_malloc and tokens:
+			if tokens[0].text[0] == "&":
+				return f"{target} <- Adresse mémoire de {self.render_expression(value)[1:]}"
+			# NEW keyword
+			if tokens[0] == Token("name", "new") and (len(tokens) == 1 or tokens[1].kind == "space"):
+				if len(tokens) == 1:
+					self.error(f"Error on line {self.get_line_label(line_number)} : Cannot allocate nothing.", "allocate_nothing")
+					return f"{target} <- Réserver"
+				# Translates the allocated type, and keeps the dimensions of the arrays
+				allocated = [token.text for token in tokens[2:]]
+				if tokens[1].text == " " and allocated and tokens[2].kind == "name" and tokens[2].text in self.var_types \
+						and (len(tokens) == 3 or tokens[3].kind == "space" or tokens[3].text == "["):
+					allocated[0] = self.var_types[tokens[2].text]
+				return f"{target} <- Réserver{tokens[1].text}{''.join(allocated)}"
+
+		return f"{target} <- {self.render_expression(value)}"
+
+
+	def emit_const(self, node: ConstantDeclaration, line_number: int):
+		""" Constante : Type : Nom = Valeur """
+		self.instructions_list[line_number] = f"{self.instruction_names['const']} : {self.var_types[node.type]} : " \
+		                                      f"{node.name} = {self.render_expression(node.value)}"
+
+
+	def emit_declaration(self, declaration: VariableDeclaration, line_number: int):
 		""" Noms, séparés, par, des, virgules : Type(s) """
 		# Finding the type of the variable
-		if instruction[0][-1] == "*":
+		if declaration.type.is_pointer:
 			if self.use_ptrs_and_malloc:
-				var_type = f"Pointeur sur {self.var_types[instruction[0][:-1]]}"
+				var_type = f"Pointeur sur {self.var_types[declaration.type.base]}"
 			else:
-				return self.error(f"Error line {line_number + 1} : Use of pointers was disabled.")
+				return self.error(f"Error line {self.get_line_label(line_number)} : Use of pointers was disabled.", "pointers_disabled")
 		else:
-			var_type = self.var_types[instruction[0]]
-
-		# If the third argument is an equals ('=') sign, we use the shorthand for quick variable assignation
-		if len(instruction) > 2 and instruction[2] == "=":
-			# We save the name of the variable
-			variable_name = instruction[1]
+			var_type = self.var_types[declaration.type.base]
 
-			# We remove the type of the variable from the instructions list
-			instruction.pop(0)
-
-			# We call the variable assignation method to generate an assignation string
-			self.var_assignation(instruction, line_number)
-
-			# We add to the current line the definition of the variable
+		# If the variable is given a value, we define it then assign it the value
+		if declaration.value is not None:
+			variable_name = declaration.names[0]
 			self.instructions_list[line_number] = f"{variable_name} : {var_type}\n" + \
-					self.tab_char * (len(self.instructions_stack) + 1) + self.instructions_list[line_number]
+					self.tab_char * (len(self.instructions_stack) + 1) + \
+					self.format_assignment(variable_name, "=", declaration.value, line_number)
 
 		# Otherwise, we define all the variables quickly
 		else:
-			# Getting the names of each variable
-			variable_names = ", ".join(instruction[1:])
-
-			# Creating the string
-			self.instructions_list[line_number] = f"{variable_names} : {var_type}"
+			self.instructions_list[line_number] = f"{', '.join(declaration.names)} : {var_type}"
 
 			# Adds an 's' to the var type if multiple vars are declared
-			if len(instruction[1:]) != 1 and instruction[0] != "string":
+			if len(declaration.names) != 1 and declaration.type.text != "string":
 				self.instructions_list[line_number] += "s"
 
 
-	def analyze_for(self, instruction_name:str, instruction_params:list, line_number:int):
+	def emit_assignment(self, assignment: Assignment, line_number: int):
+		""" Assigns/reassigns a variable. """
+		self.instructions_list[line_number] = self.format_assignment(
+			assignment.target, assignment.operator, assignment.value, line_number
+		)
+
+
+	def emit_expression_statement(self, instruction: Instruction, line_number: int):
+		""" Keeps the line, with its line ends """
+		self.instructions_list[line_number] = self.render_expression(instruction.expression)
+
+
+	def emit_for(self, node: ForLoop, line_number: int):
 		""" Pour i allant de 0 à n avec un pas de 1 """
 		self.instructions_stack.append("for")
 		# Description of the for loop
-		self.instructions_list[line_number] = f"Pour {instruction_params[0]} allant de {instruction_params[1]} à " \
-		f"{instruction_params[2]} avec un pas de " \
-		f"{1 if len(instruction_params) < 4 else instruction_params[3]}"
+		self.instructions_list[line_number] = f"Pour {node.variable} allant de {self.render_expression(node.start)} à " \
+		f"{self.render_expression(node.end)} avec un pas de " \
+		f"{1 if node.step is None else self.render_expression(node.step)}"
 
 
-	def analyze_end(self, instruction_name:str, instruction_params:list, line_number:int):
+	def emit_end(self, node: None, line_number: int):
 		""" Fin names[elem] """
 		# Pops the element at the end of the stack and stores it in a variable
 		last_elem = self.instructions_stack.pop()
@@ -79,431 +209,294 @@ class AlgorithmicCompiler(Compiler):
 			self.instructions_list[line_number] = f"Fin {self.instruction_names[last_elem]}"
 			if last_elem in ("fx", "proc"):
 				self.fxtext.append(self.instructions_list[line_number] + "\n" * 2)
+				self.fxtext_lines.append(line_number)
 				self.instructions_list[line_number] = ""
 
 
-	def analyze_while(self, instruction_name:str, instruction_params:list, line_number:int):
+	def emit_while(self, node: Instruction, line_number: int):
 		""" Tant Que condition """
 		self.instructions_stack.append("while")
 		# Rewrites the line
-		self.instructions_list[line_number] = f"Tant Que {' '.join(instruction_params)}"
+		self.instructions_list[line_number] = f"Tant Que {self.render_expression(node.expression)}"
 
 
-	def analyze_if(self, instruction_name:str, instruction_params:list, line_number:int):
+	def emit_if(self, node: Instruction, line_number: int):
 		""" Si condition """
 		self.instructions_stack.append("if")
 		# Rewrites the line
-		self.instructions_list[line_number] = f"Si {' '.join(instruction_params)}"
+		self.instructions_list[line_number] = f"Si {self.render_expression(node.expression)}"
 
 
-	def analyze_else(self, instruction_name:str, instruction_params:list, line_number:int):
+	def emit_else(self, node: None, line_number: int):
 		""" Sinon """
 		# Rewrites the line
 		self.instructions_list[line_number] = "Sinon"
 
 
-	def analyze_elif(self, instruction_name:str, instruction_params:list, line_number:int):
+	def emit_elif(self, node: Instruction, line_number: int):
 		""" Sinon Si condition """
 		# Rewrites the line
-		self.instructions_list[line_number] = f"Sinon Si {' '.join(instruction_params)}"
+		self.instructions_list[line_number] = f"Sinon Si {self.render_expression(node.expression)}"
 
 
-	def analyze_switch(self, instruction_name:str, instruction_params:list, line_number:int):
+	def emit_switch(self, node: Instruction, line_number: int):
 		""" SELON element """
 		self.instructions_stack.append("switch")
-		self.instructions_list[line_number] = f"SELON {' '.join(instruction_params)}"
+		self.instructions_list[line_number] = f"SELON {self.render_expression(node.expression)}"
 
 
-	def analyze_case(self, instruction_name:str, instruction_params:list, line_number:int):
+	def emit_case(self, node: Instruction, line_number: int):
 		""" Cas element """
 		# If there is no switch in the instruction stack, we error out to the user
 		if "switch" not in self.instructions_stack:
-			self.error(self.translate_method("compiler", "cpp", "errors", "case_outside_switch").format(
-				line_number=line_number + 1
-			))
+			self.error(self.translate_method("compilers", "cpp", "errors", "case_outside_switch").format(
+				line_number=self.get_line_label(line_number)
+			), "case_outside_switch")
 
 		# If there is no error, we continue
 		else:
 			self.instructions_stack.append("case")
-			self.instructions_list[line_number] = f"Cas {' '.join(instruction_params)}"
+			self.instructions_list[line_number] = f"Cas {self.render_expression(node.expression)}"
 
 
-	def analyze_default(self, instruction_name:str, instruction_params:list, line_number:int):
+	def emit_default(self, node: Instruction, line_number: int):
 		""" Autrement : """
 		# If there is no switch in the instruction stack, we error out to the user
 		if "switch" not in self.instructions_stack:
-			self.error(self.translate_method("compiler", "cpp", "errors", "default_outside_switch").format(
-				line_number=line_number + 1
-			))
+			self.error(self.translate_method("compilers", "cpp", "errors", "default_outside_switch").format(
+				line_number=self.get_line_label(line_number)
+			), "default_outside_switch")
 
 		# If there is no error, we continue
 		else:
 			self.instructions_stack.append("default")
-			self.instructions_list[line_number] = f"Autrement : {' '.join(instruction_params)}"
+			self.instructions_list[line_number] = f"Autrement : {self.render_expression(node.expression)}"
 
 
-	def analyze_print(self, instruction_name:str, instruction_params:list, line_number:int):
+	def emit_print(self, node: Instruction, line_number: int):
 		""" Afficher(elements) """
-		self.instructions_list[line_number] = f"Afficher({' '.join(instruction_params)})"
+		self.instructions_list[line_number] = f"Afficher({self.render_expression(node.expression)})"
 
 
-	def analyze_input(self, instruction_name:str, instruction_params:list, line_number:int):
+	def emit_input(self, node: Instruction, line_number: int):
 		""" Saisir(elements) """
-		self.instructions_list[line_number] = f"Saisir({' '.join(instruction_params)})"
+		self.instructions_list[line_number] = f"Saisir({self.render_expression(node.expression)})"
 
 
-	def analyze_precond(self, instruction_name:str, instruction_params:list, line_number:int):
+	def emit_precond(self, node: Comment, line_number: int):
 		""" Préconditions : elements """
-		self.instructions_list[line_number] = f"Préconditions : {' '.join(instruction_params)}"
+		self.instructions_list[line_number] = f"Préconditions : {node.text}"
 
 
-	def analyze_data(self, instruction_name:str, instruction_params:list, line_number:int):
+	def emit_data(self, node: Comment, line_number: int):
 		""" Données : elements """
-		self.instructions_list[line_number] = f"Données : {' '.join(instruction_params)}"
+		self.instructions_list[line_number] = f"Données : {node.text}"
 
 
-	def analyze_datar(self, instruction_name:str, instruction_params:list, line_number:int):
+	def emit_datar(self, node: Comment, line_number: int):
 		""" Donnée/Résultat : elements """
-		self.instructions_list[line_number] = f"Donnée/Résultat : {' '.join(instruction_params)}"
+		self.instructions_list[line_number] = f"Donnée/Résultat : {node.text}"
 
 
-	def analyze_result(self, instruction_name:str, instruction_params:list, line_number:int):
+	def emit_result(self, node: Comment, line_number: int):
 		""" Résultat : elements """
-		self.instructions_list[line_number] = f"Résultat : {' '.join(instruction_params)}"
+		self.instructions_list[line_number] = f"Résultat : {node.text}"
 
 
-	def analyze_desc(self, instruction_name:str, instruction_params:list, line_number:int):
+	def emit_desc(self, node: Comment, line_number: int):
 		""" Description : elements """
-		self.instructions_list[line_number] = f"Description : {' '.join(instruction_params)}"
+		self.instructions_list[line_number] = f"Description : {node.text}"
 
 
-	def analyze_return(self, instruction_name:str, instruction_params:list, line_number:int):
+	def emit_return(self, node: Instruction, line_number: int):
 		""" Retourner elements """
 		# Checks we're not in a procedure
 		if "proc" in self.instructions_stack:
-			self.error(self.translate_method("compiler", "cpp", "errors", "return_in_procedure").format(
-				line_number=line_number + 1
-			))
+			self.error(self.translate_method("compilers", "cpp", "errors", "return_in_procedure").format(
+				line_number=self.get_line_label(line_number)
+			), "return_in_procedure")
 
 		# Checks we're inside a function
 		elif "fx" not in self.instructions_stack:
-			self.error(self.translate_method("compiler", "cpp", "errors", "return_outside_function").format(
-				line_number=line_number + 1
-			))
+			self.error(self.translate_method("compilers", "cpp", "errors", "return_outside_function").format(
+				line_number=self.get_line_label(line_number)
+			), "return_outside_function")
 
 		# Writes the line correctly
 		else:
-			self.instructions_list[line_number] = f"Retourner {' '.join(instruction_params)}"
+			self.instructions_list[line_number] = f"Retourner {self.render_expression(node.expression)}"
 
 
-	def analyze_fx_start(self, instruction_name:str, instruction_params:list, line_number:int):
+	def emit_fx_start(self, node: Comment, line_number: int):
 		""" Début : """
 		# Removes 'vars' from the instruction stack if it is there
 		if self.instructions_stack[-1] == "vars":
 			self.instructions_stack.pop()
 
 		# Rewrites the line
-		self.instructions_list[line_number] = f"Début : {' '.join(instruction_params)}"
+		self.instructions_list[line_number] = f"Début : {node.text}"
 
 
-	def analyze_vars(self, instruction_name:str, instruction_params:list, line_number:int):
+	def emit_vars(self, node: Comment, line_number: int):
 		""" Variables locales : """
-		self.instructions_list[line_number] = f"Variables locales : {' '.join(instruction_params)}"
+		self.instructions_list[line_number] = f"Variables locales : {node.text}"
 		self.instructions_stack.append("vars")
 
 
-	def analyze_tab(self, instruction_name:str, instruction_params:list, line_number:int):
+	def emit_tab(self, node: ArrayDeclaration, line_number: int):
 		""" Name : tableau [ size ] de type Type """
-		self.analyze_arr(instruction_name, instruction_params, line_number)
+		self.emit_arr(node, line_number)
 
 
-	def analyze_arr(self, instruction_name:str, instruction_params:list, line_number:int):
+	def emit_arr(self, node: ArrayDeclaration, line_number: int):
 		""" Name : tableau [ size ] de type Type """
-		try:
-			# We construct the array size
-			arr_sizes = ""
-			for i in range(2, len(instruction_params)):
-				arr_sizes += f"[ {instruction_params[i]} ]"
-
-			# Getting the array type
-			arr_type = self.var_types[instruction_params[0]].lower()
-
-			# Building the final line
-			self.instructions_list[line_number] = f"{instruction_params[1]} : tableau{arr_sizes} de type {arr_type}"
+		# If the variable type doesn't exist
+		if node.type is not None and node.type not in self.var_types:
+			self.error(self.translate_method("compilers", "cpp", "errors", "unrecognized_var_type").format(
+				line_number=self.get_line_label(line_number), type=node.type
+			), "unrecognized_var_type", node.type)
 
 		# If the statement does not have all its parameters set
-		except IndexError:
-			self.error(self.translate_method("compiler", "cpp", "errors", "arr_missing_params").format(
-				line_number=line_number + 1
-			))
+		elif node.name is None:
+			self.error(self.translate_method("compilers", "cpp", "errors", "arr_missing_params").format(
+				line_number=self.get_line_label(line_number)
+			), "arr_missing_params")
 
-		# If the variable type doesn't exist
-		except KeyError:
-			self.error(self.translate_method("compiler", "cpp", "errors", "unrecognized_var_type").format(
-				line_number=line_number + 1, type=instruction_params[0]
-			))
+		else:
+			# We construct the array size
+			arr_sizes = "".join(f"[ {self.render_expression(size)} ]" for size in node.sizes)
 
+			# Building the final line
+			self.instructions_list[line_number] = f"{node.name} : tableau{arr_sizes} de type {self.var_types[node.type].lower()}"
 
-	def analyze_fx(self, instruction_name:str, instruction_params:list, line_number:int):
+
+	def emit_fx(self, node: FunctionDeclaration, line_number: int):
 		""" Creates a function definition """
-		# Prevents a crash when extra spaces are at the end of the line
-		while instruction_params[-1] == "": instruction_params.pop()
-
-		# Function to handle the parameters, whether they are arrays or standard variables
-		def handle_params(instruction_params):
-			# The list of parameters
-			params = []
-
-			# Fetches each parameter (going two by two, because each param goes <type> <name>)
-			for i in range(2, len(instruction_params), 2):
-				# Adds the parameter to the list of parameters
-				params.append(f"{instruction_params[i + 1]} : ")
-
-				# Try block in case there is an IndexError
-				try:
-					# Pointers
-					if self.use_ptrs_and_malloc and instruction_params[i][-1] == '*':
-						params[-1] += "Pointeur sur "
-						instruction_params[i] = instruction_params[i][:-1]
-
-					# Constants
-					if instruction_params[i].startswith("const_"):
-						params[-1] += "Constante "
-						instruction_params[i] = instruction_params[i][6:]
-
-					# If the param is an array, we parse it correctly
-					if instruction_params[i].startswith("arr"):
-						params[-1] += f"Tableau[{']['.join(instruction_params[i].split('_')[2:])}] de " \
-						              f"{self.var_types[instruction_params[i].split('_')[1]]}s"
-
-					# If the param is a structure, we parse it correctly
-					elif instruction_params[i].startswith("struct_"):
-						params[-1] += f"Structure {instruction_params[i][7:]}"
-
-					# If the param is NOT an array nor a structure
-					else:
-						# We add it to the params as the type, followed by the name, of whose we remove the
-						# first char if it is '&' (no datar mode in algorithmic)
-						params[-1] += self.var_types[instruction_params[i]][instruction_params[i][0] == '&':]
-
-				# If an IndexError is encountered, we remove the last param from the params list and continue
-				except IndexError:
-					params.pop()
-
-			# We merge back the params and return them
-			params = ", ".join(params)
-			return params
-
-		# Getting the parameters string
-		params = handle_params(instruction_params)
+		# The parameters, each of them written as <name> : <type>
+		params = []
+		for parameter in node.parameters:
+			if parameter.name is None:
+				raise ValueError(f"Unnamed parameter of type {parameter.type.text}")
+			params.append(f"{parameter.name} : {self.get_field_type(parameter.type)}")
+		params = ", ".join(params)
 
 		# Branching on whether it is a procedure or a function
-		if instruction_params[0] != "void":
+		return_type = node.return_type
+		if return_type.text != "void":
 			self.instructions_stack.append("fx")
 			# We write the line as a function
-			self.instructions_list[line_number] = f"Fonction {instruction_params[1]} ({params}) : "
-
-			# Pointers
-			if self.use_ptrs_and_malloc and instruction_params[0][-1] == '*':
-				self.instructions_list[line_number] += "Pointeur sur "
-				instruction_params[0] = instruction_params[0][:-1]
-
-			# If the return type is a structure
-			if instruction_params[0].startswith("struct_"):
-				# We add the structure message followed by the return type
-				self.instructions_list[line_number] += "Structure " + instruction_params[0][7:]
-
-			elif instruction_params[0].startswith("arr_"):
-				# We add the array message
-				instruction_params[0] = instruction_params[0][4:]
-
-				# We split the param into a type followed by dimensions
-				instruction_params[0] = instruction_params[0].split("_")
-
-				# We generate the message
-				try:
-					self.instructions_list[line_number] += f"Tableau de {self.var_types[instruction_params[0][0]]}"
-					for e in instruction_params[0][1:]:
-						self.instructions_list += f"[{e}]"
-				except KeyError:
-					self.error(f"Error on line {line_number + 1} : Var type '{instruction_params[0][0]}' unknown.")
-
-			# If the return type is not a structure
-			else:
-				# We add the return type
-				try:
-					self.instructions_list[line_number] += self.var_types[instruction_params[0]]
-				except KeyError:
-					self.error(f"Error on line {line_number + 1} : Var type '{instruction_params[0]}' unknown.")
+			self.instructions_list[line_number] = f"Fonction {node.name} ({params}) : "
+
+			# We add the return type
+			try:
+				self.instructions_list[line_number] += self.get_return_type(return_type)
+			except KeyError:
+				self.error(
+					f"Error on line {self.get_line_label(line_number)} : Var type '{return_type.text}' unknown.", "unrecognized_var_type",
+					return_type.text
+				)
 
 		else:  # Procedure
 			self.instructions_stack.append("proc")
 			# We write the line as a procedure
-			self.instructions_list[line_number] = f"Procédure {instruction_params[1]} ({params})"
+			self.instructions_list[line_number] = f"Procédure {node.name} ({params})"
 
 
-	def analyze_struct(self, instruction_name:str, instruction_params:list, line_number:int):
-		""" Creates a function definition """
-		# Prevents a crash when extra spaces are at the end of the line
-		while instruction_params[-1] == "": instruction_params.pop()
-
-		# Function to handle the parameters, whether they are arrays or standard variables
-		def handle_params(instruction_params):
-			# The list of parameters
-			params = []
-
-			# Fetches each parameter (going two by two, because each param goes <type> <name>)
-			for i in range(1, len(instruction_params), 2):
-				# Adds the parameter to the list of parameters
-				try:
-					params.append(f"{instruction_params[i + 1]} : ")
-				except IndexError:
-					self.error(self.translate_method("compiler", "algo", "errors", "structure_def_unnamed_param").format(
-						line_number=line_number + 1
-					))
-					return []
-
-				# Try block in case there is an IndexError
-				try:
-					# If the param is an array, we parse it correctly
-					if instruction_params[i].startswith("arr"):
-						try:
-							vtype = self.var_types[instruction_params[i].split('_')[1]]
-						except KeyError:
-							vtype = instruction_params[i].split('_')[1]
-						params[-1] += f"Tableau[{']['.join(instruction_params[i].split('_')[2:])}] de " \
-						              f"{vtype}s"
-
-					# If the param is a structure, we parse it correctly
-					elif instruction_params[i].startswith("struct_"):
-						params[-1] += f"Structure {instruction_params[i][7:]}"
-
-					# If the param is NOT an array
-					else:
-						# We add it to the params as the type, followed by the name, of whose we remove the
-						# first char if it is '&' (no datar mode in algorithmic)
-						params[-1] += self.var_types[instruction_params[i]][instruction_params[i][0] == '&':]
-
-				# If an IndexError is encountered, we remove the last param from the params list and continue
-				except IndexError:
-					params.pop()
-
-			# We return the params
-			return params
-
-		# Getting the parameters string
-		params = handle_params(instruction_params)
+	def emit_struct(self, node: StructDeclaration, line_number: int):
+		""" Creates a structure definition """
+		# The fields, each of them written as <name> : <type>
+		fields = []
+		for field in node.fields:
+			if field.name is None:
+				self.error(self.translate_method("compilers", "algo", "errors", "structure_def_unnamed_param").format(
+					line_number=self.get_line_label(line_number)
+				), "structure_def_unnamed_param")
+				return
+			fields.append(f"{field.name} : {self.get_field_type(field.type)}")
 
 		# We write the line as a structure
-		self.instructions_list[line_number] = f"Structure {instruction_params[0]}\n"
-		for param in params:
-			self.instructions_list[line_number] += self.tab_char * (len(self.instructions_stack) + 2) + param + "\n"
-		self.instructions_list[line_number] += self.tab_char * (len(self.instructions_stack) + 1) + "Fin Structure"
+		self.instructions_list[line_number] = "".join((
+			f"Structure {node.name}\n",
+			*(self.tab_char * (len(self.instructions_stack) + 2) + field + "\n" for field in fields),
+			self.tab_char * (len(self.instructions_stack) + 1) + "Fin Structure"
+		))
 
 
-	def analyze_CODE_RETOUR(self, instruction_name:str, instruction_params:list, line_number:int):
+	def emit_CODE_RETOUR(self, node: Instruction, line_number: int):
 		""" Analyzes the return code. """
 		self.instructions_list[line_number] = ""
 
 
-	def analyze_init(self, instruction_name:str, instruction_params:list, line_number:int):
+	def emit_init(self, node: StructInitialization, line_number: int):
 		""" Analyzes the structure initialization. """
-		if len(instruction_params) < 2:  # Error for missing parameters
-			self.error(self.translate_method("compiler", "algo", "errors", "struct_missing_args").format(
-				line_number=line_number + 1
-			))
-		elif len(instruction_params) % 2 == 1:  # Error for missing parameters
-			self.error(self.translate_method("compiler", "algo", "errors", "struct_args_not_even").format(
-				line_number=line_number + 1
-			))
+		if node.name is None:  # Error for missing parameters
+			self.error(self.translate_method("compilers", "cpp", "errors", "struct_missing_args").format(
+				line_number=self.get_line_label(line_number)
+			), "struct_missing_args")
+		elif node.field_without_value is not None:  # Error for missing parameters
+			self.error(self.translate_method("compilers", "cpp", "errors", "struct_args_not_even").format(
+				line_number=self.get_line_label(line_number)
+			), "struct_args_not_even")
 		else:
-			# Creates the structure initialization
-			self.instructions_list[line_number] = f"{instruction_params[1]} : Structure {instruction_params[0]}"
-
-			# Then for each extra couple of arguments, adds a initialization to this line
-			for i in range(2, len(instruction_params), 2):
-				self.instructions_list[line_number] += "\n" + self.tab_char * (len(self.instructions_stack) + 1)
-				self.instructions_list[line_number] += f"{instruction_params[1]}.{instruction_params[i]} <- {instruction_params[i + 1]}"
+			# Creates the structure initialization, then for each field, adds a initialization to this line
+			self.instructions_list[line_number] = ("\n" + self.tab_char * (len(self.instructions_stack) + 1)).join((
+				f"{node.name} : Structure {node.struct}",
+				*(f"{node.name}.{field} <- {self.render_expression(value)}" for field, value in node.values)
+			))
 
 
-	def analyze_delete(self, instruction_name:str, instruction_params:list, line_number:int):
+	def emit_delete(self, node: Deletion, line_number: int):
 		""" Delete keyword. Syntax : delete <var> or delete arr <var>. """
 		if self.use_ptrs_and_malloc:
-			if len(instruction_params) != 0 and instruction_params[0] == "arr":
-				if len(instruction_params) == 2:
-					self.instructions_list[line_number] = f"Libérer tableau {instruction_params[1]}"
-				else:
-					self.error(f"Error on line {line_number + 1} : Missing parameter 'var_name'.")
+			if node.name is None:
+				self.error(f"Error on line {self.get_line_label(line_number)} : Missing parameter 'var_name'.", "missing_var_name")
+			elif node.is_array:
+				self.instructions_list[line_number] = f"Libérer tableau {node.name}"
 			else:
-				if len(instruction_params) != 0:
-					self.instructions_list[line_number] = f"Libérer {instruction_params[0]}"
-				else:
-					self.error(f"Error on line {line_number+1} : Missing parameter 'var_name'.")
+				self.instructions_list[line_number] = f"Libérer {node.name}"
 		else:
-			self.error(f"Error on line {line_number+1} : Unknown keyword 'delete'. "
-			            "Maybe you forgot to enable the use of pointers and malloc ?")
+			self.error(f"Error on line {self.get_line_label(line_number)} : Unknown keyword 'delete'. "
+			            "Maybe you forgot to enable the use of pointers and malloc ?", "pointers_disabled")
 
 
-	def var_assignation(self, instruction:list, line_number:int):
-		"""
-		Assigns/reassigns a variable.
-		"""
-		# Reassigns a value with an operator
-		if instruction[1] != "=":
-			instruction.insert(2, f"{instruction[0]} {instruction[1][:-1]}")
-		# Assigns the value to the variable
-		instruction[1] = "<-"
-		# If pointers are enabled and the user gets the address of the variable
-		if self.use_ptrs_and_malloc:
-			if instruction[2][0] == "&":
-				instruction[2] = "Adresse mémoire de " + instruction[2][1:]
-			# NEW keyword
-			if instruction[2] == "new":
-				instruction[2] = "Réserver"
-				if len(instruction) > 3:
-					try:
-						# Adds the ability to make arrays
-						if "[" in instruction[3]:
-							var_type = instruction[3].split("[")[0]
-							rest = "[" + "[".join(instruction[3].split("[")[1:])
-						else:
-							var_type = instruction[3]
-							rest = ""
-						instruction[3] = self.var_types[var_type] + rest
-					except KeyError:
-						pass
-				else:
-					self.error(f"Error on line {line_number+1} : Cannot allocate nothing.")
-		self.instructions_list[line_number] = " ".join(instruction)
-
 	def final_trim(self, instruction_name:str, line_number:int):
-		""" Adds the line ends, transforms the function names, and adds the correct indentation """
-		# Adds the end of line
-		self.instructions_list[line_number] = self.instructions_list[line_number].replace("(ENDL)", "(FIN DE LIGNE)")
+		""" Adds the correct indentation """
+		# The state of the compilation, read once as it belongs to the context of the thread
+		instructions_list = self.instructions_list
+		instructions_stack = self.instructions_stack
+
+		line = instructions_list[line_number]
 
 		# Adds the correct tabbing (amount of tabs is equal to amount of instructions in the instructions stack,
 		# minus one if the current instruction is in the instruction names)
-		tab_amount = len(self.instructions_stack)
-		if instruction_name in (*self.instruction_names.keys(), "else", "elif", "fx_start", "vars"):
+		tab_amount = len(instructions_stack)
+		if instruction_name in self.dedented_instructions:
 			tab_amount -= 1
-		if len(self.instructions_stack) != 0 and (
-			"fx" in self.instructions_stack or
-			"proc" in self.instructions_stack or
-			(instruction_name == "end" and self.instructions_stack[-1] in ("fx", "proc"))
+		if len(instructions_stack) != 0 and (
+			"fx" in instructions_stack or
+			"proc" in instructions_stack or
+			(instruction_name == "end" and instructions_stack[-1] in ("fx", "proc"))
 		):
-			self.fxtext.append(self.tab_char * tab_amount + self.instructions_list[line_number])
-			if instruction_name == "end":
-				self.fxtext[-1] += "\n"
-			self.instructions_list[line_number] = ""
+			self.fxtext.append(self.tab_char * tab_amount + line + ("\n" if instruction_name == "end" else ""))
+			self.fxtext_lines.append(line_number)
+			instructions_list[line_number] = ""
 		else:
-			self.instructions_list[line_number] = self.tab_char * tab_amount + self.instructions_list[line_number]
+			instructions_list[line_number] = self.tab_char * tab_amount + line
 
 
 	def final_touches(self):
 		""" Concatenates everything into one string """
-		# Adds the function text
-		final_text = "".join(instruction + "\n" for instruction in self.fxtext)
-		# Adds the main
-		final_text += "Début\n"
-		final_text += "".join(self.tab_char + instruction + "\n" for instruction in self.instructions_list if instruction != "")
-		return final_text + "Fin"
+		return "".join(self.iter_final_touches())
+
+
+	def iter_source_chunks(self):
+		""" Yields the compiled code line by line, along with the source line of each line """
+		# Yields the function text
+		for instruction, line_number in zip(self.fxtext, self.fxtext_lines):
+			yield line_number, instruction + "\n"
+		# Yields the main
+		yield -1, "Début\n"
+		for line_number, instruction in enumerate(self.instructions_list):
+			if instruction != "":
+				yield line_number, self.tab_char + instruction + "\n"
+		yield -1, "Fin"
@@ -0,0 +1,118 @@
+"""
+Measures the compilation throughput of the compilers, in lines per second.
+Usage : python benchmark.py [file.algo] [--runs N] [--copies N] [--jobs N]
+Without a file, a sample program is used. The program is duplicated --copies times (with renamed functions and
+structures) to get a large enough input. The units cache is emptied before each run and the compiled code cache is
+disabled, so every line is compiled on each run. With --jobs, the units are compiled across that amount of processes.
+"""
+import re
+import sys
+import time
+
+from headless import HeadlessApp
+
+
+# The program compiled when no file is given
+SAMPLE_PROGRAM = """struct Flower int price string name
+const int MAX = 10
+
+fx bool isMultiple int n int x
+data Two integers (n and x)
+result Returns whether x is a divider of n
+fx_start
+return n % x == 0
+end
+
+fx void drawLine int n char c
+desc Draws a line of c with length n
+vars
+int i
+fx_start
+for i 0 n
+print c
+end
+print "(ENDL)"
+end
+
+int age i
+string name = "Bob Smith"
+arr int grades 5 5
+init Flower flower price 5 name "Rose"
+print "You are about to buy a " & flower.name & " for " & flower.price & " euros.(ENDL)"
+if flower.price > 5 ET age < 3
+print "Ouch"
+elif age == 2
+print "Two"
+else
+print "Cheap"
+end
+for i 0 len(grades)
+grades[i] += alea() % 10
+print " " & grades[i] & " |"
+end
+while age < 10 OU age > 30
+input age
+end
+switch age
+case 0
+name = "zero"
+end
+default
+name = "other"
+end
+end
+drawLine(puissance(2, 3), '-')
+"""
+
+
+def make_large_program(program: str, copies: int) -> str:
+	"""
+	Duplicates the program, renaming its functions and structures so each copy declares new ones.
+	:param program: The program to duplicate.
+	:param copies: The amount of copies.
+	"""
+	names = set(re.findall(r"^(?:fx \S+|struct) (\w+)", program, re.MULTILINE))
+	names_pattern = re.compile(r"\b(" + "|".join(map(re.escape, names)) + r")\b") if names else None
+	return "\n".join(
+		names_pattern.sub(lambda match: f"{match.group(1)}{i}", program) if names_pattern else program
+		for i in range(copies)
+	)
+
+
+def benchmark(app: HeadlessApp, code: str, compiler_name: str, runs: int) -> float:
+	"""
+	Compiles the code several times, and returns the best throughput in lines per second.
+	:param app: The headless app holding the compilers.
+	:param code: The code to compile.
+	:param compiler_name: The name of the compiler.
+	:param runs: The amount of compilations.
+	"""
+	app.compilers[compiler_name].output_cache = None
+	line_count = code.count("\n") + 1
+	best_time = float("inf")
+	for _ in range(runs):
+		app.compilers[compiler_name].units_cache.clear()
+		start = time.perf_counter()
+		if app.compile(code, compiler_name) is None:
+			raise ValueError(f"The code could not be compiled by the {compiler_name} compiler.")
+		best_time = min(best_time, time.perf_counter() - start)
+	return line_count / best_time
+
+
+if __name__ == "__main__":
+	args = sys.argv[1:]
+	runs = int(args[args.index("--runs") + 1]) if "--runs" in args else 5
+	copies = int(args[args.index("--copies") + 1]) if "--copies" in args else 200
+	jobs = int(args[args.index("--jobs") + 1]) if "--jobs" in args else 1
+
+	# Reads the program from the given file, if any
+	program = SAMPLE_PROGRAM
+	if args and not args[0].startswith("--"):
+		with open(args[0], "r", encoding="utf-8") as f:
+			program = f.read()
+	code = make_large_program(program, copies)
+
+	app = HeadlessApp(compile_jobs=jobs)
+	print(f"{code.count(chr(10)) + 1} lines, best of {runs} runs")
+	for compiler_name in app.compilers:
+		print(f"{compiler_name} : {benchmark(app, code, compiler_name, runs):,.0f} lines/s")
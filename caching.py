@@ -0,0 +1,279 @@
+"""
+Contains the caches used throughout the editor.
+"""
+from collections import OrderedDict
+import hashlib
+import os
+import tempfile
+import threading
+from typing import Any, Hashable, Optional
+
+
+class LRUCache:
+	def __init__(self, max_size: int = 4096):
+		"""
+		A bounded cache, evicting the least recently used entries first once it is full.
+		The cache is thread-safe, so it can be filled from background workers.
+		:param max_size: The maximum amount of entries the cache can hold.
+		"""
+		self.max_size = max(max_size, 1)  # The maximum amount of entries in the cache
+		self._entries = OrderedDict()  # The cached entries, from least to most recently used
+		self._lock = threading.Lock()  # Prevents concurrent modifications of the entries
+		self.hits = 0  # The amount of lookups that found their entry in the cache
+		self.misses = 0  # The amount of lookups that did not find their entry in the cache
+		self.evictions = 0  # The amount of entries removed because the cache was full
+
+
+	def get(self, key: Hashable, default: Any = None) -> Any:
+		"""
+		Returns the value cached for the given key, and marks it as the most recently used.
+		:param key: The key of the entry.
+		:param default: The value returned if the key is not in the cache. None by default.
+		:return: The cached value, or the default.
+		"""
+		with self._lock:
+			try:
+				value = self._entries[key]
+			except KeyError:
+				self.misses += 1
+				return default
+			self._entries.move_to_end(key)
+			self.hits += 1
+			return value
+
+
+	def put(self, key: Hashable, value: Any) -> None:
+		"""
+		Caches a value for the given key, evicting the least recently used entry if the cache is full.
+		:param key: The key of the entry.
+		:param value: The value to cache.
+		"""
+		with self._lock:
+			self._entries[key] = value
+			self._entries.move_to_end(key)
+			while len(self._entries) > self.max_size:
+				self._entries.popitem(last=False)
+				self.evictions += 1
+
+
+	def resize(self, max_size: int) -> None:
+		"""
+		Changes the maximum size of the cache, evicting entries if necessary.
+		:param max_size: The new maximum amount of entries.
+		"""
+		with self._lock:
+			self.max_size = max(max_size, 1)
+			while len(self._entries) > self.max_size:
+				self._entries.popitem(last=False)
+				self.evictions += 1
+
+
+	def clear(self) -> None:
+		"""
+		Empties the cache. The statistics are kept.
+		"""
+		with self._lock:
+			self._entries.clear()
+
+
+	@property
+	def hit_rate(self) -> float:
+		"""
+		The proportion of lookups that were found in the cache, between 0 and 1.
+		"""
+		lookups = self.hits + self.misses
+		return self.hits / lookups if lookups != 0 else 0.
+
+
+	def stats(self) -> dict:
+		"""
+		Returns the statistics of the cache, to help tuning its size.
+		"""
+		return {
+			"size": len(self._entries),
+			"max_size": self.max_size,
+			"hits": self.hits,
+			"misses": self.misses,
+			"evictions": self.evictions,
+			"hit_rate": self.hit_rate
+		}
+
+
+	def __contains__(self, key: Hashable) -> bool:
+		with self._lock:
+			return key in self._entries
+
+
+	def __len__(self) -> int:
+		return len(self._entries)
+
+
+
+class DiskCache:
+	def __init__(self, directory: str, max_size: int = 64 * 1024 * 1024):
+		"""
+		A cache of strings stored as files in a directory, so it is kept between runs and shared between processes.
+		Once the files take more than max_size bytes, the least recently used ones are deleted first.
+		The cache is thread-safe, and the files are written atomically, so several processes can use the same directory.
+		:param directory: The directory the cached entries are written to. Created if it does not exist.
+		:param max_size: The maximum size of the cached entries, in bytes.
+		"""
+		self.directory = directory  # The directory containing the cached entries
+		self.max_size = max(max_size, 1)  # The maximum size of the cached entries, in bytes
+		self._size = None  # The size of the cached entries, in bytes ; None until the directory is first read
+		self._lock = threading.Lock()  # Prevents concurrent modifications of the entries
+		self.hits = 0  # The amount of lookups that found their entry in the cache
+		self.misses = 0  # The amount of lookups that did not find their entry in the cache
+		self.evictions = 0  # The amount of entries removed because the cache was full
+
+
+	@staticmethod
+	def make_key(*parts: str) -> str:
+		"""
+		Returns a key identifying the given parts, the hash of their contents.
+		:param parts: The strings the cached value depends on, e.g. the source code and the options.
+		"""
+		digest = hashlib.sha256()
+		for part in parts:
+			encoded_part = part.encode("utf-8", "surrogatepass")
+			# Prefixes each part with its length, so ("ab", "c") and ("a", "bc") get different keys
+			digest.update(f"{len(encoded_part)}:".encode("ascii"))
+			digest.update(encoded_part)
+		return digest.hexdigest()
+
+
+	def _get_path(self, key: str) -> str:
+		""" Returns the path to the file of the entry with the given key. """
+		return os.path.join(self.directory, key + ".cache")
+
+
+	def get(self, key: str, default: Optional[str] = None) -> Optional[str]:
+		"""
+		Returns the value cached for the given key, and marks it as the most recently used.
+		:param key: The key of the entry, as given by make_key.
+		:param default: The value returned if the key is not in the cache. None by default.
+		:return: The cached value, or the default.
+		"""
+		path = self._get_path(key)
+		try:
+			with open(path, "r", encoding="utf-8", newline="") as f:
+				value = f.read()
+			os.utime(path)
+		except OSError:
+			with self._lock:
+				self.misses += 1
+			return default
+		with self._lock:
+			self.hits += 1
+		return value
+
+
+	def put(self, key: str, value: str) -> None:
+		"""
+		Caches a value for the given key, evicting the least recently used entries if the cache is full.
+		Failing to write the entry (e.g. on a read-only disk) is silently ignored, as the cache is only an optimization.
+		:param key: The key of the entry, as given by make_key.
+		:param value: The value to cache.
+		"""
+		with self._lock:
+			try:
+				os.makedirs(self.directory, exist_ok=True)
+				if self._size is None:
+					self._size = sum(size for _, size, _ in self._list_entries())
+
+				# Writes the entry to a temporary file first, so other processes never read a partially written entry
+				file_descriptor, temporary_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+				with os.fdopen(file_descriptor, "w", encoding="utf-8", newline="") as f:
+					f.write(value)
+				os.replace(temporary_path, self._get_path(key))
+				self._size += os.path.getsize(self._get_path(key))
+			except OSError:
+				return
+
+			if self._size > self.max_size:
+				self._evict()
+
+
+	def _list_entries(self) -> list:
+		"""
+		Returns the path, size and last use time of each cached entry, from least to most recently used.
+		"""
+		entries = []
+		for entry in os.scandir(self.directory):
+			if entry.name.endswith(".cache"):
+				try:
+					stat = entry.stat()
+				except OSError:  # Deleted by another process in the meantime
+					continue
+				entries.append((entry.path, stat.st_size, stat.st_mtime))
+		entries.sort(key=lambda entry: entry[2])
+		return entries
+
+
+	def _evict(self) -> None:
+		"""
+		Deletes the least recently used entries until the cache fits in its maximum size.
+		The size is read again from the directory first, as other processes may have added or removed entries.
+		"""
+		entries = self._list_entries()
+		self._size = sum(size for _, size, _ in entries)
+		for path, size, _ in entries:
+			if self._size <= self.max_size:
+				break
+			try:
+				os.remove(path)
+			except OSError:
+				continue
+			self._size -= size
+			self.evictions += 1
+
+
+	def resize(self, max_size: int) -> None:
+		"""
+		Changes the maximum size of the cache, evicting entries if necessary.
+		:param max_size: The new maximum size, in bytes.
+		"""
+		with self._lock:
+			self.max_size = max(max_size, 1)
+			if os.path.isdir(self.directory):
+				self._evict()
+
+
+	def clear(self) -> None:
+		"""
+		Deletes all the cached entries. The statistics are kept.
+		"""
+		with self._lock:
+			if os.path.isdir(self.directory):
+				for path, _, _ in self._list_entries():
+					try:
+						os.remove(path)
+					except OSError:
+						pass
+			self._size = 0
+
+
+	@property
+	def hit_rate(self) -> float:
+		"""
+		The proportion of lookups that were found in the cache, between 0 and 1.
+		"""
+		lookups = self.hits + self.misses
+		return self.hits / lookups if lookups != 0 else 0.
+
+
+	def stats(self) -> dict:
+		"""
+		Returns the statistics of the cache, to help tuning its size.
+		"""
+		with self._lock:
+			if self._size is None and os.path.isdir(self.directory):
+				self._size = sum(size for _, size, _ in self._list_entries())
+			return {
+				"size": self._size or 0,
+				"max_size": self.max_size,
+				"hits": self.hits,
+				"misses": self.misses,
+				"evictions": self.evictions,
+				"hit_rate": self.hit_rate
+			}
@@ -0,0 +1,615 @@
+"""
+Checks the code for semantic errors (use before declaration, type mismatches, misplaced blocks) in the background,
+so the errors can be shown while typing instead of when compiling.
+"""
+from bisect import bisect_left, bisect_right
+from collections import Counter, namedtuple
+from operator import attrgetter
+import threading
+import time
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from custom_types import Diagnostic, SymbolType
+from highlighting import BUILTIN_FUNCTIONS
+from symbol_table import common_prefix_length, find_declarations, find_identifiers
+
+
+# The words used in expressions that are neither keywords nor symbols
+EXPRESSION_WORDS = frozenset(("ET", "OU", "NON", "true", "false", "NULL", "new", "ENDL", "void"))
+
+# The keywords followed by free text rather than code
+FREE_TEXT_KEYWORDS = frozenset(("precond", "data", "datar", "result", "desc", "vars", "fx_start", "include"))
+
+# The keywords whose line declares symbols without using any
+DECLARATION_KEYWORDS = frozenset(("fx", "struct"))
+
+# The literal types each basic type can be assigned
+ASSIGNABLE_TYPES = {
+	"int": frozenset(("int", "char")),
+	"float": frozenset(("int", "float")),
+	"string": frozenset(("string",)),
+	"char": frozenset(("char",)),
+	"bool": frozenset(("bool",))
+}
+
+# The symbol kinds which can be used before being declared
+HOISTED_KINDS = frozenset(("struct", "function", "procedure"))
+
+
+def get_literal_type(value: str) -> Optional[str]:
+	"""
+	Returns the basic type of a literal value, or None if the value is not a literal.
+	:param value: A single word, e.g. '"abc"' or '3.5'.
+	"""
+	if len(value) >= 2 and value[0] == value[-1] == '"':
+		return "string"
+	if len(value) == 3 and value[0] == value[-1] == "'":
+		return "char"
+	if value in ("true", "false"):
+		return "bool"
+	if value.lstrip("-").isdigit():
+		return "int"
+	integer_part, dot, decimal_part = value.lstrip("-").partition(".")
+	if dot and (integer_part + decimal_part).isdigit():
+		return "float"
+	return None
+
+
+def find_column(line: str, name: str) -> int:
+	"""
+	Returns the column of the first use of the identifier in the line, or 0 if it is not found.
+	:param line: The line.
+	:param name: The identifier.
+	"""
+	for column, identifier in find_identifiers(line):
+		if identifier == name:
+			return column
+	return 0
+
+
+# The facts found on a line, which only depend on the line and the blocks opened before it
+LineFacts = namedtuple("LineFacts", [
+	"diagnostics",  # The diagnostics independent of the rest of the document, as (column, code, arguments)
+	"uses",  # The identifiers used by the line, as (column, name)
+	"structs",  # The structures used as types by the line, as (column, name)
+	"assignment"  # The literal assigned by the line as (column, name, literal type), or None
+])
+
+# The blocks opened before a line, each as (keyword, whether it is a procedure)
+BlocksState = Tuple[Tuple[str, bool], ...]
+
+# The gap between the order keys of the lines when they are numbered
+KEY_SPACING = 1 << 64
+
+# The order of the diagnostics found by resolving the names, on each line
+NAME_DIAGNOSTIC_ORDER = {"undeclared": 0, "unknown_type": 1, "redeclared": 2, "type_mismatch": 3}
+
+# Marks a name to resolve again in every scope, e.g. because its global declarations changed
+ALL_SCOPES = object()
+
+
+class LineRecord:
+	__slots__ = (
+		"key", "line", "declarations", "facts", "names", "global_names", "function_before", "function_after", "scope",
+		"name_diagnostics", "diagnostics"
+	)
+
+	def __init__(self, key: int, line: str, declarations: Tuple[SymbolType, ...]):
+		"""
+		The analysis of a line of the document, which stays the same object while the lines before it are edited.
+		:param key: The order key of the line : the keys of the lines increase along the document, and do not change
+			when lines are added or removed before them (unless there is no room left between two keys), so the lines
+			of a name can be ordered without their index.
+		:param line: The line.
+		:param declarations: The symbols declared by the line.
+		"""
+		self.key = key
+		self.line = line
+		self.declarations = declarations
+		self.facts: Optional[LineFacts] = None  # The facts found on the line, None until analyzed
+		self.names: FrozenSet[str] = frozenset()  # The names the line declares, uses or assigns
+		self.global_names: FrozenSet[str] = frozenset()  # The names the line declares as global variables
+		self.function_before: Optional[LineRecord] = None  # The line opening the function the line is in, if any
+		self.function_after: Optional[LineRecord] = None  # The line opening the function the next line is in, if any
+		self.scope: Optional[LineRecord] = None  # The line opening the function whose local symbols the line sees, if any
+		self.name_diagnostics: Dict[str, tuple] = {}  # The diagnostics of each name of the line with any, as (column, code, arguments)
+		self.diagnostics: tuple = tuple()  # All the diagnostics of the line, as (column, code, arguments)
+
+
+class SemanticChecker:
+	def __init__(self, var_types: Iterable[str], keywords: Iterable[str]):
+		"""
+		Checks the code for semantic errors.
+		The facts of each line (uses, declarations, blocks) are kept along with the blocks opened before it. After an
+		edit, only the changed lines are analyzed again, followed by the next lines until the opened blocks are the
+		same as before the edit. The lines declaring, using or assigning each name are indexed by function, so only
+		the names of the analyzed lines are then resolved again, in the functions of these lines, unless their global
+		declarations changed.
+		:param var_types: The basic variable types (e.g. 'int').
+		:param keywords: The keywords of the language, which are not symbols.
+		"""
+		self.var_types = frozenset(var_types)
+		self.keywords = frozenset(keywords)
+		self.included_names: FrozenSet[str] = frozenset()  # The symbols declared by the files the document includes
+		self._reset()
+
+		self._analysis_lock = threading.Lock()  # Prevents concurrent analyses
+		self._condition = threading.Condition()  # Wakes up the worker when a text is submitted
+		self._pending_text: Optional[str] = None  # The text waiting to be checked
+		self._submitted_text: Optional[str] = None  # The last text submitted
+		self._thread: Optional[threading.Thread] = None  # The worker thread, started on the first submission
+
+
+	def _reset(self) -> None:
+		"""
+		Forgets the analysis of every line.
+		"""
+		self._lines: List[str] = []  # The lines at the last analysis
+		self._records: List[LineRecord] = []  # The analysis of each line
+		self._keys: List[int] = []  # The order key of each line, increasing
+		self._states: List[BlocksState] = [tuple()]  # The blocks opened before each line, plus at the end
+		self._hoisted: Dict[str, Counter] = {"struct": Counter(), "callable": Counter()}  # The symbols usable anywhere
+		self._name_lines: Dict[str, Dict[Optional[LineRecord], set]] = {}  # The records of the lines declaring, using or assigning each name, by scope
+		self._global_declarations: Dict[str, set] = {}  # The records of the lines declaring each name as a global variable
+		self._flagged_lines: set = set()  # The records of the lines with diagnostics
+		self._diagnostics: Dict[int, Tuple[Diagnostic, ...]] = {}  # The latest diagnostics of each line with any
+
+
+	def reload_keywords(self, var_types: Iterable[str], keywords: Iterable[str]) -> None:
+		"""
+		Changes the types and keywords of the language, and forgets the analysis so it is done again.
+		:param var_types: The basic variable types (e.g. 'int').
+		:param keywords: The keywords of the language, which are not symbols.
+		"""
+		with self._analysis_lock:
+			self.var_types = frozenset(var_types)
+			self.keywords = frozenset(keywords)
+			self._reset()
+		with self._condition:
+			self._submitted_text = None
+
+
+	def set_included_names(self, names: Iterable[str]) -> None:
+		"""
+		Changes the symbols declared by the files the document includes, which can be used anywhere in the document,
+		and publishes the diagnostics again.
+		:param names: The names of the symbols.
+		"""
+		with self._analysis_lock:
+			names = frozenset(names)
+			changed_names = {name: {ALL_SCOPES} for name in names ^ self.included_names}
+			self.included_names = names
+			self._publish(self._resolve_names(changed_names))
+
+
+	def submit(self, text: str) -> None:
+		"""
+		Schedules the text to be checked in the background. Returns immediately.
+		:param text: The whole text of the document.
+		"""
+		with self._condition:
+			if text is self._submitted_text:
+				return
+			self._submitted_text = self._pending_text = text
+			self._condition.notify()
+
+		# Starts the worker if it is not running yet
+		if self._thread is None:
+			self._thread = threading.Thread(target=self._run, name="SemanticChecker", daemon=True)
+			self._thread.start()
+
+
+	def _run(self) -> None:
+		"""
+		The worker loop, checking the latest submitted text whenever there is one.
+		"""
+		while True:
+			with self._condition:
+				while self._pending_text is None:
+					self._condition.wait()
+				text = self._pending_text
+				self._pending_text = None
+			self.update(text.split("\n"))
+
+
+	@property
+	def diagnostics(self) -> Dict[int, Tuple[Diagnostic, ...]]:
+		"""
+		The diagnostics of the latest checked text, by line index. Only lines with diagnostics are present.
+		"""
+		return self._diagnostics
+
+
+	def update(self, lines: List[str]) -> Tuple[int, int]:
+		"""
+		Checks the new lines of the document, only analyzing the lines that changed along with the lines whose
+		opened blocks changed because of them, and only resolving the names of these lines, then publishes the new
+		diagnostics.
+		:param lines: All the lines of the document.
+		:return: The range of lines that were analyzed, as (start, end) with end excluded.
+		"""
+		with self._analysis_lock:
+			# Finds the region that changed since the last analysis
+			start = common_prefix_length(self._lines, lines)
+			if start == len(self._lines) == len(lines):
+				return start, start
+			suffix = common_prefix_length(self._lines[start:], lines[start:], reverse=True)
+			old_end, new_end = len(self._lines) - suffix, len(lines) - suffix
+			changed_names: Dict[str, set] = {}  # The scopes to resolve each name again in
+			analyzed_records = set()
+
+			# Updates the hoisted symbols with the declarations of the changed lines, their uses being resolved again
+			new_declarations = [find_declarations(line, self.var_types) for line in lines[start:new_end]]
+			old_declarations = [record.declarations for record in self._records[start:old_end]]
+			for declarations, change in ((old_declarations, -1), (new_declarations, 1)):
+				for declarations_of_line in declarations:
+					for symbol in declarations_of_line:
+						if symbol.kind in HOISTED_KINDS:
+							self._hoisted["struct" if symbol.kind == "struct" else "callable"][symbol.name] += change
+							changed_names.setdefault(symbol.name, set()).add(ALL_SCOPES)
+
+			# Replaces the records of the changed lines
+			for record in self._records[start:old_end]:
+				self._unindex_record(record, changed_names)
+				self._flagged_lines.discard(record)
+			keys = self._make_keys(start, old_end, new_end - start)
+			self._lines[start:old_end] = lines[start:new_end]
+			self._keys[start:old_end] = keys
+			self._records[start:old_end] = [
+				LineRecord(key, line, declarations)
+				for key, line, declarations in zip(keys, lines[start:new_end], new_declarations)
+			]
+			self._states[start + 1:old_end + 1] = [None] * (new_end - start)
+
+			# Analyzes the lines from the first changed one, until the opened blocks are the same as before
+			blocks = self._states[start]
+			function = self._records[start - 1].function_after if start > 0 else None
+			line_number = start
+			while line_number < len(lines):
+				record = self._records[line_number]
+				self._unindex_record(record, changed_names)
+				blocks, function = self._analyze_line(record, blocks, function)
+				self._index_record(record, changed_names)
+				analyzed_records.add(record)
+				line_number += 1
+				if line_number >= new_end and self._states[line_number] == blocks and (
+					line_number == len(lines) or self._records[line_number].function_before is function
+				):
+					break
+				self._states[line_number] = blocks
+				# Yields to the interface thread regularly
+				if line_number % 256 == 0:
+					time.sleep(0)
+
+			self._publish(analyzed_records | self._resolve_names(changed_names))
+			return start, line_number
+
+
+	def _make_keys(self, start: int, end: int, count: int) -> List[int]:
+		"""
+		Returns the order keys of the lines replacing the given lines, between the keys of the lines around them.
+		Numbers the lines again if there is no room left between these keys.
+		:param start: The index of the first replaced line.
+		:param end: The index of the line after the last replaced line.
+		:param count: The amount of new lines.
+		"""
+		low = self._keys[start - 1] if start > 0 else 0
+		high = self._keys[end] if end < len(self._keys) else low + (count + 1) * KEY_SPACING
+		step = (high - low) // (count + 1)
+		if step == 0:
+			for index, record in enumerate(self._records):
+				record.key = self._keys[index] = (index + 1) * KEY_SPACING
+			return self._make_keys(start, end, count)
+		return [low + step * (index + 1) for index in range(count)]
+
+
+	def _index_record(self, record: LineRecord, changed_names: Dict[str, set]) -> None:
+		"""
+		Adds the line to the lines of each of its names.
+		:param record: The analyzed line.
+		:param changed_names: The scopes to resolve each name again in, added to.
+		"""
+		for name in record.names:
+			self._name_lines.setdefault(name, {}).setdefault(record.scope, set()).add(record)
+			changed_names.setdefault(name, set()).add(record.scope)
+		for name in record.global_names:
+			self._global_declarations.setdefault(name, set()).add(record)
+			changed_names[name].add(ALL_SCOPES)
+
+
+	def _unindex_record(self, record: LineRecord, changed_names: Dict[str, set]) -> None:
+		"""
+		Removes the line from the lines of each of its names.
+		:param record: The line, analyzed or not.
+		:param changed_names: The scopes to resolve each name again in, added to.
+		"""
+		for name in record.names:
+			scopes = self._name_lines[name]
+			scopes[record.scope].discard(record)
+			if not scopes[record.scope]:
+				del scopes[record.scope]
+				if not scopes:
+					del self._name_lines[name]
+			changed_names.setdefault(name, set()).add(record.scope)
+		for name in record.global_names:
+			self._global_declarations[name].discard(record)
+			if not self._global_declarations[name]:
+				del self._global_declarations[name]
+			changed_names[name].add(ALL_SCOPES)
+		record.name_diagnostics = {}
+
+
+	def _analyze_line(self, record: LineRecord, blocks: BlocksState,
+	                  function: Optional[LineRecord]) -> Tuple[BlocksState, Optional[LineRecord]]:
+		"""
+		Analyzes a line and stores its facts and names.
+		:param record: The line.
+		:param blocks: The blocks opened before the line.
+		:param function: The line opening the function the line is in, if any.
+		:return: The blocks opened after the line, and the line opening the function the next line is in, if any.
+		"""
+		line = record.line
+		words = [word for word in line.split(" ") if word != ""]
+		keyword = words[0] if words else ""
+		diagnostics, uses, structs = [], [], []
+
+		# Checks the blocks
+		if keyword == "end":
+			if not blocks:
+				diagnostics.append((line.find(keyword), "unexpected_end", tuple()))
+			blocks = blocks[:-1]
+		elif keyword in ("else", "elif"):
+			if not blocks or blocks[-1][0] != "if":
+				diagnostics.append((line.find(keyword), "else_outside_if", (("keyword", keyword),)))
+		elif keyword in ("case", "default"):
+			if not blocks or blocks[-1][0] != "switch":
+				diagnostics.append((line.find(keyword), "case_outside_switch", (("keyword", keyword),)))
+		elif keyword == "return":
+			function_block = next((block for block in reversed(blocks) if block[0] == "fx"), None)
+			if function_block is None:
+				diagnostics.append((line.find(keyword), "return_outside_function", tuple()))
+			elif function_block[1]:
+				diagnostics.append((line.find(keyword), "return_in_procedure", tuple()))
+		elif keyword == "fx" and any(block[0] == "fx" for block in blocks):
+			diagnostics.append((line.find(keyword), "nested_function", tuple()))
+
+		# Checks the types used by the line, and finds the identifiers it uses
+		self._check_types(line, words, diagnostics, structs)
+		if words and keyword not in FREE_TEXT_KEYWORDS and keyword not in DECLARATION_KEYWORDS:
+			self._find_uses(line, words, record.declarations, uses, structs)
+
+		# Opens the new blocks
+		if keyword in ("for", "while", "if", "switch", "case", "default"):
+			blocks = blocks + ((keyword, False),)
+		elif keyword == "fx":
+			blocks = blocks + (("fx", len(words) > 1 and words[1] == "void"),)
+
+		facts = LineFacts(tuple(diagnostics), tuple(uses), tuple(structs), self._find_assignment(line, words))
+		record.facts = facts
+		record.names = frozenset((
+			*(name for _, name in facts.uses), *(name for _, name in facts.structs),
+			*(symbol.name for symbol in record.declarations if symbol.kind not in HOISTED_KINDS),
+			*((facts.assignment[1],) if facts.assignment is not None else ())
+		))
+
+		# The local symbols are those of the function since its opening line, nested functions included
+		record.function_before = function
+		if not any(block[0] == "fx" for block in blocks):
+			function = None
+		elif function is None:
+			function = record
+		record.function_after = function
+		record.scope = record.function_before or record.function_after
+		if function is None:
+			record.global_names = frozenset(
+				symbol.name for symbol in record.declarations if symbol.kind not in HOISTED_KINDS
+			)
+		else:
+			record.global_names = frozenset()
+		return blocks, function
+
+
+	def _check_types(self, line: str, words: List[str], diagnostics: list, structs: list):
+		"""
+		Checks the types written on the line exist.
+		:param line: The line.
+		:param words: The words of the line.
+		:param diagnostics: The diagnostics of the line, appended to.
+		:param structs: The structures used as types, checked once the whole document is known, appended to.
+		"""
+		if not words:
+			return
+		keyword = words[0]
+		if keyword in ("arr", "tab"):
+			types = words[1:2]
+		elif keyword == "fx":
+			types = words[1:2] + words[3::2]
+		else:
+			return
+
+		for written_type in types:
+			# Removes the pointer, constness and array parts of the type
+			base_type = written_type.lstrip("&").rstrip("*")
+			if base_type.startswith("const_"):
+				base_type = base_type[6:]
+			if base_type.startswith("arr_"):
+				base_type = base_type.split("_")[1]
+
+			if base_type.startswith("struct_"):
+				structs.append((line.find(written_type), base_type[7:]))
+			elif base_type not in self.var_types and not (keyword == "fx" and base_type == "void"):
+				diagnostics.append((line.find(written_type), "unknown_type", (("type", written_type),)))
+
+
+	def _find_uses(self, line: str, words: List[str], declarations: Tuple[SymbolType, ...], uses: list,
+	               structs: list):
+		"""
+		Finds the identifiers used by the line which need to be declared.
+		:param line: The line.
+		:param words: The words of the line.
+		:param declarations: The symbols declared by the line.
+		:param uses: The identifiers used, appended to.
+		:param structs: The structures used as types, appended to.
+		"""
+		keyword = words[0]
+		declared_names = frozenset(symbol.name for symbol in declarations)
+		if keyword == "init":
+			ignored_names = frozenset(words[3::2])
+		elif keyword in ("arr", "tab"):
+			ignored_names = frozenset(words[1:2])
+		else:
+			ignored_names = frozenset()
+		equal_sign = line.find("=")
+
+		for column, identifier in find_identifiers(line):
+			if (
+				identifier in self.keywords or identifier in self.var_types or identifier in EXPRESSION_WORDS
+				or identifier in BUILTIN_FUNCTIONS or identifier in ignored_names
+				or identifier.startswith(("arr_", "struct_", "const_"))
+			):
+				continue
+			# The declared names are not uses, except in their own initial value
+			if identifier in declared_names and (equal_sign == -1 or column < equal_sign):
+				continue
+			# The structure of an initialization is resolved with the other structures
+			if keyword == "init" and identifier == words[1]:
+				structs.append((column, identifier))
+			else:
+				uses.append((column, identifier))
+
+
+	def _find_assignment(self, line: str, words: List[str]) -> Optional[Tuple[int, str, str]]:
+		"""
+		Returns the literal assigned to a variable on the line, if any.
+		:param line: The line.
+		:param words: The words of the line.
+		:return: The assignment as (column of the value, name of the variable, type of the literal), or None.
+		"""
+		if len(words) == 4 and words[2] == "=" and words[0] in self.var_types:
+			name, value = words[1], words[3]
+		elif len(words) == 3 and words[1] == "=":
+			name, value = words[0], words[2]
+		else:
+			return None
+		value_type = get_literal_type(value)
+		return None if value_type is None else (line.rfind(value), name, value_type)
+
+
+	def _resolve_names(self, changed_names: Dict[str, set]) -> set:
+		"""
+		Resolves each name in the given scopes, from the lines of the scope declaring, using or assigning it, in order,
+		and from the global declarations of the name. Stores the diagnostics of each of these lines about the name.
+		:param changed_names: The scopes to resolve each name again in : the lines opening their function, None for
+			the lines outside of any function, and ALL_SCOPES for every scope.
+		:return: The records of the lines whose diagnostics may have changed.
+		"""
+		structs, callables = self._hoisted["struct"], self._hoisted["callable"]
+		changed_records = set()
+		for name, scopes in changed_names.items():
+			name_scopes = self._name_lines.get(name, {})
+			if ALL_SCOPES in scopes:
+				scopes = name_scopes.keys()
+			struct_known = structs[name] > 0 or name in self.included_names
+			hoisted = struct_known or callables[name] > 0
+
+			# The global declarations of the name, and the type of the name after each of them
+			global_declarations = sorted(self._global_declarations.get(name, ()), key=attrgetter("key"))
+			global_keys = [record.key for record in global_declarations]
+			global_types = []
+			for record in global_declarations:
+				for symbol in record.declarations:
+					if symbol.name == name and symbol.kind not in HOISTED_KINDS:
+						symbol_type = symbol.type if symbol.kind != "array" and symbol.type in self.var_types else None
+				global_types.append(symbol_type)
+
+			for scope in scopes:
+				name_lines = sorted(name_scopes.get(scope, ()), key=attrgetter("key"))
+				changed_records.update(name_lines)
+				local_declared, local_type = False, None  # The declaration of the name in the function of the scope
+
+				for record in name_lines:
+					facts = record.facts
+					global_index = bisect_left(global_keys, record.key)  # The global declarations before the line
+					diagnostics = []
+
+					# Checks the name is declared before
+					for column, used_name in facts.uses:
+						if used_name == name and not (hoisted or global_index > 0 or local_declared):
+							diagnostics.append((column, "undeclared", (("name", name),)))
+					for column, struct_name in facts.structs:
+						if struct_name == name and not struct_known:
+							diagnostics.append((column, "unknown_type", (("type", f"struct_{name}"),)))
+
+					# Declares the name
+					global_declared = global_index > 0
+					for symbol in record.declarations:
+						if symbol.name != name or symbol.kind in HOISTED_KINDS:
+							continue
+						if record.function_after is not None:
+							redeclared = local_declared
+							local_declared = True
+							local_type = symbol.type if symbol.kind != "array" and symbol.type in self.var_types else None
+						else:
+							redeclared = global_declared
+							global_declared = True
+						if redeclared:
+							diagnostics.append((find_column(record.line, name), "redeclared", (("name", name),)))
+
+					# Checks the literal assigned matches the type of the variable
+					if facts.assignment is not None and facts.assignment[1] == name:
+						column, _, value_type = facts.assignment
+						if local_declared:
+							variable_type = local_type
+						else:
+							global_index = bisect_right(global_keys, record.key)
+							variable_type = global_types[global_index - 1] if global_index > 0 else None
+						if variable_type in ASSIGNABLE_TYPES and value_type not in ASSIGNABLE_TYPES[variable_type]:
+							diagnostics.append((column, "type_mismatch", (
+								("name", name), ("type", variable_type), ("value_type", value_type)
+							)))
+
+					if diagnostics:
+						record.name_diagnostics[name] = tuple(diagnostics)
+					else:
+						record.name_diagnostics.pop(name, None)
+		return changed_records
+
+
+	def _publish(self, changed_records: Iterable[LineRecord]) -> None:
+		"""
+		Gathers the diagnostics of the changed lines, and replaces the published diagnostics with those of every line
+		with any.
+		:param changed_records: The records of the lines whose diagnostics may have changed.
+		"""
+		for record in changed_records:
+			if record.facts is None:
+				continue
+			name_diagnostics = sorted(
+				(diagnostic for diagnostics in record.name_diagnostics.values() for diagnostic in diagnostics),
+				key=lambda diagnostic: (NAME_DIAGNOSTIC_ORDER[diagnostic[1]], diagnostic[0])
+			)
+			record.diagnostics = (*record.facts.diagnostics, *name_diagnostics)
+			if record.diagnostics:
+				self._flagged_lines.add(record)
+			else:
+				self._flagged_lines.discard(record)
+
+		diagnostics: Dict[int, List[Diagnostic]] = {}
+		for record in self._flagged_lines:
+			line_number = bisect_left(self._keys, record.key)
+			diagnostics[line_number] = [
+				Diagnostic(line_number, column, code, dict(arguments)) for column, code, arguments in record.diagnostics
+			]
+
+		# Reports the blocks never closed on their opening line
+		depth = len(self._states[-1])
+		for line_number in range(len(self._lines) - 1, -1, -1):
+			if depth == 0:
+				break
+			if len(self._states[line_number]) < depth <= len(self._states[line_number + 1]):
+				diagnostics.setdefault(line_number, []).append(Diagnostic(
+					line_number, 0, "unclosed_block", {"keyword": self._states[line_number + 1][depth - 1][0]}
+				))
+				depth -= 1
+
+		self._diagnostics = {line_number: tuple(result) for line_number, result in diagnostics.items()}
@@ -1,8 +1,209 @@
-from typing import Union
+from array import array
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from operator import attrgetter
+import os
+import sys
+import threading
+from typing import Any, Callable, Dict, FrozenSet, Iterator, List, Optional, Sequence, Tuple, Union
+
+from caching import DiskCache, LRUCache
+from custom_types import Assignment, Diagnostic, Expression, Instruction, Statement, Token, Unit, VariableDeclaration
+from parsing import (
+	NODE_PARSERS, Program, build_program, parse_assignment, parse_node, parse_program, parse_statement,
+	parse_variable_declaration
+)
 # TODO : Interpreter
 
 
+# Marks an output value not set by a unit
+_UNSET = object()
+
+# The amount of statements emitted between two checks of the cancellation of the compilation
+CANCEL_CHECK_INTERVAL = 256
+
+# The stages of the compilation the plugins can add passes to, in the order they run :
+# - 'pre_parse' : called with the compiler and the source code, returns the source code to parse, keeping each line at
+#   its place so the errors point to the right lines ;
+# - 'instruction' : called with the compiler and each statement before it is dispatched, returns the statement to
+#   dispatch, possibly rewritten (its node is then parsed again from its keyword and params), or None if the pass
+#   compiled the line itself into compiler.instructions_list ;
+# - 'post_analysis' : called with the compiler once every statement was analyzed, e.g. to report errors through
+#   compiler.error() ;
+# - 'pre_emit' : called with the compiler before the analyzed lines of an error-free compilation are put together into
+#   the compiled code, e.g. to rewrite compiler.instructions_list.
+PASS_STAGES = ("pre_parse", "instruction", "post_analysis", "pre_emit")
+
+
+def get_code_version(function: Callable) -> Optional[tuple]:
+	"""
+	Returns what identifies the version of the code of a function, e.g. an instruction or a pass registered by a
+	plugin : its name, the file and line it is defined at, and the modification time of this file.
+	:param function: The function, or a method.
+	:return: The version of the code, or None if its file cannot be found (e.g. a built-in or a callable object).
+	"""
+	code = getattr(getattr(function, "__func__", function), "__code__", None)
+	if code is None:
+		return None
+	try:
+		modification_time = os.stat(code.co_filename).st_mtime_ns
+	except OSError:
+		return None
+	return getattr(function, "__qualname__", None), code.co_filename, code.co_firstlineno, modification_time
+
+
+def is_separate_word(tokens: Sequence[Token], index: int) -> bool:
+	"""
+	Returns whether a token is written as a separate word, between spaces or at the ends of its expression.
+	:param tokens: The tokens of the expression.
+	:param index: The index of the token.
+	"""
+	return (index == 0 or tokens[index - 1].kind == "space") and (
+		index == len(tokens) - 1 or tokens[index + 1].kind == "space"
+	)
+
+
+class CompilationCancelled(Exception):
+	"""
+	Raised by the compilation when its cancel event is set, e.g. because the code it compiles is already outdated.
+	"""
+	pass
+
+
+class CompilationContext:
+	def __init__(self, options: Optional[Dict[str, Any]] = None, cancel_event: Optional[threading.Event] = None):
+		"""
+		Holds the state of a single compilation, so a compiler can compile on several threads at once.
+		The state attributes of the compiler (e.g. instructions_list) are those of the context of the current thread.
+		:param options: The settings of the compiler overridden for this compilation only, by name, e.g.
+			{"tab_char": "  "}. The compiler itself is left unchanged.
+		:param cancel_event: When set, cancels the compilation ; None if not cancellable.
+		"""
+		self.options = options or {}
+		self.cancel_event = cancel_event
+
+		self.instructions_list = []  # The list of instructions to be compiled
+		self.instructions_stack = []  # The stack of the instructions (indicates the number of tabs and the last instruction block's name)
+		self.errored = False
+		self.diagnostics: List[Diagnostic] = []  # The errors found during the compilation, in order
+		self.program: Optional[Program] = None  # The program being compiled
+		self.source_code = ""  # The code being compiled
+		self.source_lines: List[str] = []  # The lines of the code being compiled, as written by the user
+		self.current_line_number = 0  # The index of the line being compiled
+		self.cached = False  # Whether the compiled code was found in the output cache
+		self.source_map: Optional[array] = None  # The source line of each line of the compiled code ; None until built
+
+
+class ContextAttribute(property):
+	def __init__(self, name: str):
+		"""
+		An attribute of the compiler holding the state of a compilation, stored in the context of the current thread.
+		It is read through a C getter, as it is read on each line.
+		:param name: The name of the attribute.
+		"""
+		def set_attribute(compiler, value):
+			setattr(compiler._local.context, name, value)
+		super().__init__(attrgetter(f"_local.context.{name}"), set_attribute)
+
+
+class OptionAttribute(property):
+	def __init__(self, name: str):
+		"""
+		A setting of the compiler, copied into the context of each compilation unless overridden by its options.
+		Setting it changes the value of the next compilations, and of the current one of the thread if not overridden.
+		:param name: The name of the attribute.
+		"""
+		def set_option(compiler, value):
+			compiler._settings[name] = value
+			context = compiler._local.context
+			if name not in context.options:
+				setattr(context, name, value)
+		super().__init__(attrgetter(f"_local.context.{name}"), set_option)
+
+
+class _CompilerLocal(threading.local):
+	def __init__(self, compiler: "Compiler"):
+		""" The context of the current (or last) compilation of each thread. """
+		self.context = compiler.create_context()
+
+
+# The pool of processes compiling the units in parallel, shared by all the compilers and created when first needed
+_process_pool: Optional[ProcessPoolExecutor] = None
+_process_pool_size = 0
+_process_pool_lock = threading.Lock()
+
+# The compilers of a worker process, by settings fingerprint
+_worker_compilers: Dict[str, "Compiler"] = {}
+
+
+def _get_process_pool(jobs: int) -> ProcessPoolExecutor:
+	"""
+	Returns the pool of processes compiling the units, creating it again if its size changed.
+	:param jobs: The amount of processes.
+	"""
+	global _process_pool, _process_pool_size
+	with _process_pool_lock:
+		if _process_pool is None or _process_pool_size != jobs:
+			if _process_pool is not None:
+				_process_pool.shutdown(wait=False)
+			_process_pool = ProcessPoolExecutor(max_workers=jobs)
+			_process_pool_size = jobs
+		return _process_pool
+
+
+def _shutdown_process_pool() -> None:
+	"""
+	Shuts down the pool of processes, e.g. after a failure, so it gets created again when needed.
+	"""
+	global _process_pool
+	with _process_pool_lock:
+		if _process_pool is not None:
+			_process_pool.shutdown(wait=False)
+			_process_pool = None
+
+
+def _compile_units_in_worker(worker_factory: Callable[[], "Compiler"], fingerprint: str, options: Dict[str, Any],
+                             var_types: FrozenSet[str], units: List[Tuple[str, str]]) -> Optional[list]:
+	"""
+	Compiles units in a worker process, with a compiler created once per settings.
+	:param worker_factory: The function creating the compiler.
+	:param fingerprint: The settings fingerprint of the compiler of the main process.
+	:param options: The options of the compilation in the main process.
+	:param var_types: The basic variable types the program was parsed with.
+	:param units: The kind and source of each unit.
+	:return: The output of each unit (None for the units with errors), or None if the compiler cannot be created in the
+		worker or does not have the same settings as the one of the main process.
+	"""
+	compiler = _worker_compilers.get(fingerprint)
+	if compiler is None:
+		# The compiler might not exist in the worker, e.g. if it was added by a plugin
+		try:
+			compiler = worker_factory()
+		except Exception:
+			return None
+		compiler._local.context = compiler.create_context(options)
+		if compiler._get_settings_fingerprint() != fingerprint:
+			return None
+		_worker_compilers[fingerprint] = compiler
+	compiler._local.context = compiler.create_context(options)
+	return [compiler._compile_standalone_unit(kind, source, var_types) for kind, source in units]
+
+
 class Compiler:
+	# The state of the compilation, which belongs to the context of the current thread
+	instructions_list = ContextAttribute("instructions_list")
+	instructions_stack = ContextAttribute("instructions_stack")
+	errored = ContextAttribute("errored")
+	diagnostics = ContextAttribute("diagnostics")
+	program = ContextAttribute("program")
+	source_code = ContextAttribute("source_code")
+	source_lines = ContextAttribute("source_lines")
+	current_line_number = ContextAttribute("current_line_number")
+	cancel_event = ContextAttribute("cancel_event")
+
+	# The settings changing the output, which can be overridden for a single compilation
+	var_types = OptionAttribute("var_types")
+	tab_char = OptionAttribute("tab_char")
+
 	def __init__(self, instruction_names: Union[dict, tuple], var_types:dict, other_instructions:list, stdscr, translations: dict, translate_method, tab_char:str= "\t"):
 		"""
 		Initializes a new compiler.
@@ -11,273 +212,928 @@ class Compiler:
 		:param var_types: Dictionaries containing the translation of the variable names
 			Keys : ('int', 'float', 'string', 'bool', 'char')
 		"""
+		# The state of the compilations, one per thread, and the settings they copy
+		self._settings = {}
+		self._local = _CompilerLocal(self)
+
 		# Dictionaries containing the translation of the variable names and the translation of the instructions
 		self.instruction_names = instruction_names
 		self.var_types = var_types
 		self.other_instructions = other_instructions
 
-		# Compilation-related variables
-		self.instructions_list = []  # The list of instructions to be compiled
-		self.instructions_stack = []  # The stack of the instructions (indicates the number of tabs and the last instruction block's name)
+		# Incremental compilation
+		self.units_cache = LRUCache(1024)  # The output of each compiled top-level unit, by source and options ; None to disable
+		self.unit_output_lists = tuple()  # The names of the list attributes the units append their output to
+		self.unit_output_values = tuple()  # The names of the attributes the units can set
+		self.unit_line_lists = tuple()  # The names of the unit output lists holding source line indexes, cached relative to the unit
+		self.output_cache: Optional[DiskCache] = None  # The compiled code of each program, kept between runs ; None to disable
+
+		# Parallel compilation of the units
+		self.worker_factory: Optional[Callable[[], "Compiler"]] = None  # A picklable function creating this compiler in another process ; None to disable
+		self.parallel_jobs = 1  # The amount of processes compiling the units ; 1 to compile in this process only
+		self.parallel_min_units = 64  # The minimum amount of units to compile for the compilation to be parallel
+		self.parallel_min_lines = 4000  # The minimum amount of lines to compile for the compilation to be parallel
 
 		# Use variables
 		self.stdscr = stdscr
-		self.errored = False
 		self.tab_char = tab_char
 		self.translations = translations
 		self.translate_method = translate_method
 
+		# Instruction dispatch, resolved once instead of on each line
+		self.statement_emitters = {}  # The bound emit_* method of each instruction, called with its node, by instruction name
+		self.instruction_handlers = {}  # The registered or analyze_* handler of the other instructions, called with their words
+		self.dedented_instructions = frozenset()  # The instructions written one indentation level lower
+		self._registered_handlers = {}  # The handlers registered through register_instruction(), by instruction name
+		self._registered_dedented = set()  # The registered instructions written one indentation level lower
+		self._dispatch_sources = None  # The instructions the dispatch tables were built from
+		self.build_dispatch_tables()
+
+		# Compilation passes, resolved into flat lists once so the compilations without passes do no extra work
+		self._registered_passes: List[Tuple[str, Optional[str], Callable]] = []  # The (stage, instruction name, pass) added through register_pass()
+		self.pre_parse_passes = tuple()  # The passes rewriting the source code
+		self.instruction_passes = {}  # The passes called on the statements of each instruction, by instruction name
+		self.any_instruction_passes = tuple()  # The passes called on the statements of the other instructions
+		self.post_analysis_passes = tuple()  # The passes called once the statements were analyzed
+		self.pre_emit_passes = tuple()  # The passes called before the compiled code is put together
+
+
+	def compile(self, instructions_list: Union[list, Program], options: Optional[Dict[str, Any]] = None,
+	            cancel_event: Optional[threading.Event] = None):
+		"""
+		Compiles the program, dispatching each statement to the correct functions based on its keyword.
+		If the program is regular, each top-level unit is compiled on its own, and the units whose source and options
+		did not change since a previous compilation are reused from the cache.
+		The compilation goes on after an error, so all the errors are found at once, in self.diagnostics.
+		The state of the compilation is held by a new context, so several threads can compile with the same compiler
+		at once. The diagnostics read from the compiler are then those of the last compilation of the current thread.
+		:param instructions_list: The parsed program, or the list of instructions, a list of strings, which gets parsed.
+		:param options: The settings of the compiler overridden for this compilation only, by name,
+			e.g. {"tab_char": "  "}.
+		:param cancel_event: When set, cancels the compilation ; None if not cancellable.
+		:return: The compiled code, or None if any error was found.
+		:exception CompilationCancelled: If the cancel event gets set during the compilation.
+		"""
+		self._local.context = self.create_context(options, cancel_event)
+
+		# Returns the compiled code of the program if it was already compiled with the same options
+		output_key = self.get_output_key(instructions_list)
+		if output_key is not None:
+			cached_output = self._get_cached_output(output_key)
+			if cached_output is not None:
+				return cached_output
+
+		# Checks if an error occurred
+		if not self._compile_program(instructions_list):
+			return None
+
+		# Makes the final adjustments to each line and puts everything together
+		final_compiled_code = self.final_touches()
+		if output_key is not None:
+			self.output_cache.put(output_key, self._encode_source_map() + final_compiled_code)
+
+		# Finally returns the compiled code
+		return final_compiled_code
+
+
+	def compile_iter(self, instructions_list: Union[list, Program], options: Optional[Dict[str, Any]] = None,
+	                 cancel_event: Optional[threading.Event] = None) -> Optional[Iterator[str]]:
+		"""
+		Compiles the program like the compile method, but returns the compiled code as an iterator of chunks, put
+		together as they are consumed. The compiled code can then be written to a file or a pipe without ever being
+		in memory as a whole, and the first chunks are available sooner.
+		The chunks are read from the context of the compilation, so they must be consumed on the same thread, before
+		its next compilation.
+		:param instructions_list: The parsed program, or the list of instructions, a list of strings, which gets parsed.
+		:param options: The settings of the compiler overridden for this compilation only, by name.
+		:param cancel_event: When set, cancels the compilation ; None if not cancellable.
+		:return: An iterator of the chunks of the compiled code, or None if any error was found.
+		"""
+		self._local.context = self.create_context(options, cancel_event)
+
+		output_key = self.get_output_key(instructions_list)
+		if output_key is not None:
+			cached_output = self._get_cached_output(output_key)
+			if cached_output is not None:
+				return iter((cached_output,))
+
+		if not self._compile_program(instructions_list):
+			return None
+		if output_key is not None:
+			return self._cache_chunks(output_key, self.iter_final_touches())
+		return self.iter_final_touches()
+
+
+	def create_context(self, options: Optional[Dict[str, Any]] = None,
+	                   cancel_event: Optional[threading.Event] = None) -> CompilationContext:
+		"""
+		Creates the context of a new compilation, holding the settings of the compiler overridden by the options.
+		:param options: The settings of the compiler overridden for this compilation only, by name.
+		:param cancel_event: When set, cancels the compilation ; None if not cancellable.
+		"""
+		context = CompilationContext(options, cancel_event)
+		for name, value in self._settings.items():
+			setattr(context, name, context.options.get(name, value))
+		return context
+
+
+	@property
+	def context(self) -> CompilationContext:
+		"""
+		The context of the current (or last) compilation of the current thread, holding its state and diagnostics.
+		"""
+		return self._local.context
+
 
-	def compile(self, instructions_list:list):
+	def get_output_key(self, instructions_list: Union[list, Program]) -> Optional[str]:
 		"""
-		Dispatches the compilation to the correct functions based on the instruction params.
-		:param instructions_list: The list of instructions, a list of strings.
+		Returns the key of the compiled code of the program in the output cache : the hash of the source code, the
+		compiler, its options and instructions, the instructions and passes registered by the plugins, and the version
+		of the code of the compiler and of these instructions and passes.
+		:param instructions_list: The parsed program, or the list of instructions.
+		:return: The key, or None if the output cache is disabled, or if the code of an instruction or pass registered
+			by a plugin cannot be found, in which case its version is unknown.
 		"""
-		# Resets the errored state
+		if self.output_cache is None:
+			return None
+		source = instructions_list.source if isinstance(instructions_list, Program) else "\n".join(instructions_list)
+
+		# The modification time of the files of the compiler, so the cached outputs of a previous version are not reused
+		code_versions = []
+		for cls in type(self).__mro__[:-1]:
+			module_path = getattr(sys.modules.get(cls.__module__), "__file__", None)
+			if module_path is not None:
+				code_versions.append((cls.__qualname__, os.stat(module_path).st_mtime_ns))
+		registered_handlers = sorted(
+			(name, get_code_version(handler), name in self._registered_dedented)
+			for name, handler in self._registered_handlers.items()
+		)
+		registered_passes = [
+			(stage, instruction_name, get_code_version(compilation_pass))
+			for stage, instruction_name, compilation_pass in self._registered_passes
+		]
+		if any(version is None for _, version, _ in registered_handlers) or any(
+			version is None for _, _, version in registered_passes
+		):
+			return None
+		return DiskCache.make_key(
+			source, repr((code_versions, registered_handlers, registered_passes)), self._get_settings_fingerprint()
+		)
+
+
+	def _get_settings_fingerprint(self) -> str:
+		"""
+		Returns a text identifying the compiler and the settings changing its output, its options and instructions.
+		Two compilers with the same fingerprint give the same output for the same units.
+		"""
+		return repr((type(self).__qualname__, self.get_options_key(), self.instruction_names, self.other_instructions))
+
+
+	def _get_cached_output(self, output_key: str) -> Optional[str]:
+		"""
+		Returns the compiled code cached with the given key, if any, and restores its source map. The compiled code
+		was free of errors, so the diagnostics are reset.
+		:param output_key: The key of the compiled code, given by get_output_key.
+		"""
+		cached_output = self.output_cache.get(output_key)
+		if cached_output is None:
+			return None
 		self.errored = False
+		self.diagnostics = []
+		self.context.cached = True
+
+		# The source map is cached on the first line, before the compiled code
+		encoded_source_map, cached_output = cached_output.split("\n", 1)
+		self.context.source_map = array("i", map(int, encoded_source_map.split()))
+		return cached_output
+
+
+	def _encode_source_map(self) -> str:
+		"""
+		Returns the source map of the compilation as the first line of its entry in the output cache.
+		"""
+		return " ".join(map(str, self.source_map)) + "\n"
+
+
+	def _cache_chunks(self, output_key: str, chunks: Iterator[str]) -> Iterator[str]:
+		"""
+		Yields the chunks of the compiled code, and caches the compiled code once they were all yielded.
+		:param output_key: The key of the compiled code, given by get_output_key.
+		:param chunks: The chunks of the compiled code.
+		"""
+		compiled_chunks = []
+		for chunk in chunks:
+			compiled_chunks.append(chunk)
+			yield chunk
+		self.output_cache.put(output_key, self._encode_source_map() + "".join(compiled_chunks))
+
+
+	def _compile_program(self, instructions_list: Union[list, Program]) -> bool:
+		"""
+		Compiles each statement of the program, without putting the compiled code together.
+		:param instructions_list: The parsed program, or the list of instructions, a list of strings, which gets parsed.
+		:return: Whether the program compiled without any error.
+		"""
+		# Parses the instructions if they were not already
+		if isinstance(instructions_list, Program):
+			program = instructions_list
+			if self.pre_parse_passes:
+				program = self._run_pre_parse_passes(program.source, program)
+		elif self.pre_parse_passes:
+			program = self._run_pre_parse_passes("\n".join(instructions_list), None)
+		else:
+			program = parse_program("\n".join(instructions_list), self.var_types.keys())
+
+		# Rebuilds the dispatch tables if the instructions were modified since they were built (e.g. by a plugin)
+		if self._dispatch_sources != self._get_dispatch_sources():
+			self.build_dispatch_tables()
+
+		# Compiles the program unit by unit, or as a whole if a unit cannot be compiled independently
+		self._prepare_compilation(program)
+		if not (self.units_cache is not None and program.is_regular and self._emit_units(program)):
+			self._prepare_compilation(program)
+			self._emit_statements(program.statements)
+
+		for post_analysis_pass in self.post_analysis_passes:
+			post_analysis_pass(self)
+		if self.errored:
+			return False
+		for pre_emit_pass in self.pre_emit_passes:
+			pre_emit_pass(self)
+		return True
+
+
+	def _run_pre_parse_passes(self, source: str, program: Optional[Program]) -> Program:
+		"""
+		Rewrites the source code with the pre-parse passes, then parses it.
+		:param source: The source code.
+		:param program: The source code already parsed, whose statements are reused for the lines the passes did not
+			change, and whose included files are kept if the passes kept the amount of lines ; None if not parsed yet.
+		:return: The parsed rewritten code.
+		"""
+		for pre_parse_pass in self.pre_parse_passes:
+			source = pre_parse_pass(self, source)
+		if program is None:
+			return parse_program(source, self.var_types.keys())
+		if source == program.source:
+			return program
+		parsed_program = parse_program(source, program.var_types, program)
+		if not program.modules or len(parsed_program.statements) != len(program.statements):
+			return parsed_program
+		return build_program(source, parsed_program.statements, program.var_types, program.modules, program.include_errors)
+
+
+	def _prepare_compilation(self, program: Program):
+		"""
+		Resets the state of the compiler before compiling the given program.
+		:param program: The program about to be compiled.
+		"""
+		# Resets the errored state and the stack of the instructions
+		self.errored = False
+		self.diagnostics = []
+		self.instructions_stack = []
+		self.program = program
+		self.source_code = program.source
+		self.source_lines = program.lines
 
 		# Calls the pre-compilation cleaning method
 		self.prepare_new_compilation()
 
-		# Keeps as an attribute the list of instructions
-		self.instructions_list = instructions_list
+		# Keeps as an attribute the list of instructions, each of them being rewritten by the emitters
+		self.instructions_list = program.lines
+
+
+	def _emit_statements(self, statements: List[Statement]):
+		"""
+		Emits the statements in order, checking regularly whether the compilation was cancelled.
+		:param statements: The statements to emit.
+		:exception CompilationCancelled: If the cancel event is set.
+		"""
+		# Only goes through the instruction passes if there are any
+		if self.instruction_passes or self.any_instruction_passes:
+			emit_statement = self._emit_statement_with_passes
+		else:
+			emit_statement = self._emit_statement
+		for start in range(0, len(statements), CANCEL_CHECK_INTERVAL):
+			if self.cancel_event is not None and self.cancel_event.is_set():
+				raise CompilationCancelled()
+			for statement in statements[start:start + CANCEL_CHECK_INTERVAL]:
+				emit_statement(statement)
+
+
+	def _emit_statement_with_passes(self, statement: Statement):
+		"""
+		Emits a statement after going through the instruction passes of its keyword.
+		:param statement: The statement to emit.
+		"""
+		self._local.context.current_line_number = statement.line_number
+		original_statement = statement
+		for instruction_pass in self.instruction_passes.get(statement.keyword, self.any_instruction_passes):
+			statement = instruction_pass(self, statement)
+			# The pass compiled the line itself
+			if statement is None:
+				return
+		# The node of a rewritten statement is the one of its new words
+		if statement is not original_statement:
+			statement = statement._replace(node=parse_node(statement.keyword, statement.params, self.var_types))
+		self._emit_statement(statement)
+
 
-		# Creates the instruction names
-		instruction_names = self.instruction_names
-		if isinstance(self.instruction_names, dict):
-			instruction_names = instruction_names.keys()
+	def _emit_statement(self, statement: Statement):
+		"""
+		Emits a statement, dispatching its node to the correct functions based on its keyword.
+		:param statement: The statement to emit.
+		"""
+		i = statement.line_number
+		instruction_name = statement.keyword
+		node = statement.node
+		context = self._local.context
 
-		# Interprets each instruction one by one
-		for i, line in enumerate(self.instructions_list):
-			# Checks if no error occurred
-			if self.errored: break
+		# Remembers the state before the line, to recover from its errors
+		context.current_line_number = i
+		diagnostics_count = len(context.diagnostics)
+		stack_depth = len(context.instructions_stack)
 
-			line = line.split(' ')
-			instruction_name = line[0]
-			instruction_params = line[1:]
+		try:
+			# Based on the instruction's name, dispatches its node to the correct functions
+			emitter = self.statement_emitters.get(instruction_name)
+			if emitter is not None:
+				# The statements whose parameters could not be parsed are malformed
+				if node is None and instruction_name in NODE_PARSERS:
+					raise ValueError(f"Malformed {instruction_name} statement")
+				emitter(node, i)
 
-			# Based on the instruction's name, dispatches to the correct functions
-			if instruction_name in (*instruction_names, *self.other_instructions):
-				# Turns the fx_name into a callback function : The analyze_%name% method of this class.
-				try: fx_name = getattr(self, f"analyze_{instruction_name}")
-				except Exception: raise NotImplementedError(f"Function {instruction_name} not implemented")
-				# Calls the callback function and gives it the instruction's name and params, along with the line number
-				fx_name(instruction_name, instruction_params, i)
+			elif instruction_name in self.instruction_handlers:
+				# Calls the handler and gives it the instruction's name and params, along with the line number
+				self.instruction_handlers[instruction_name](instruction_name, list(statement.params), i)
+				self.instructions_list[i] = self.rewrite_line(self.instructions_list[i])
 
 			# Defines a variable if wanted
-			elif instruction_name in self.var_types or (
-				instruction_name and instruction_name[-1] == "*" and instruction_name[:-1] in self.var_types
+			elif instruction_name in context.var_types or (
+				instruction_name and instruction_name[-1] == "*" and instruction_name[:-1] in context.var_types
 			):
-				self.define_var(line, i)
+				# The program may have been parsed with other variable types
+				if not isinstance(node, VariableDeclaration):
+					node = parse_variable_declaration(instruction_name, statement.params)
+				if node is None:
+					raise ValueError("Missing value")
+				self.emit_declaration(node, i)
 
 			# Reassigns a variable if wanted
-			elif len(instruction_params) != 0:
-				if instruction_params[0].endswith("="):
-					self.var_assignation(line, i)
+			elif statement.params and statement.params[0].endswith("="):
+				if not isinstance(node, Assignment):
+					node = parse_assignment(instruction_name, statement.params)
+				if node is None:
+					raise ValueError("Missing value")
+				self.emit_assignment(node, i)
 
-			# Makes the final trimming to the line
-			self.final_trim(instruction_name, i)
+			# Any other line is an expression, e.g. a function call
+			elif isinstance(node, Instruction):
+				self.emit_expression_statement(node, i)
 
-		# Also checks if an error occurred
-		if self.errored:
-			return None
+		# A malformed line (e.g. missing parameters) makes the handlers fail
+		except (IndexError, KeyError, ValueError):
+			self.error(
+				self.translate_method("compilers", "errors", "invalid_statement").format(line_number=self.get_line_label(i)),
+				"invalid_statement"
+			)
+
+		# Recovers from the errors of the line, so the next lines are compiled in the right block
+		if len(context.diagnostics) != diagnostics_count:
+			self._recover(statement, stack_depth)
+			return
 
-		# Makes the final adjustments to each line and puts everything together
-		final_compiled_code = self.final_touches()
+		# Makes the final trimming to the line
+		self.final_trim(instruction_name, i)
 
-		# Finally returns the compiled code
-		return final_compiled_code
+
+	def _recover(self, statement: Statement, stack_depth: int):
+		"""
+		Restores the stack of the instructions after an erroneous line, as if the line had been compiled correctly.
+		:param statement: The erroneous statement.
+		:param stack_depth: The size of the stack of the instructions before the line.
+		"""
+		del self.instructions_stack[stack_depth + 1:]
+		if statement.kind == "block_start":
+			# Opens the block, so its 'end' closes it
+			if len(self.instructions_stack) == stack_depth:
+				self.instructions_stack.append(statement.keyword)
+		elif statement.kind == "block_end":
+			# Closes the block, if it was not
+			if len(self.instructions_stack) == stack_depth and self.instructions_stack:
+				self.instructions_stack.pop()
+		else:
+			del self.instructions_stack[stack_depth:]
+		self.instructions_list[statement.line_number] = ""
+
+
+	def _get_dispatch_sources(self) -> tuple:
+		"""
+		Returns the instructions the dispatch tables are built from, to know when they need to be rebuilt.
+		"""
+		return tuple(self.instruction_names), tuple(self.other_instructions)
+
+
+	def get_dedented_instructions(self) -> tuple:
+		"""
+		Returns the instructions written one indentation level lower than the block they are in.
+		"""
+		return (*self.instruction_names, "else", "elif")
+
+
+	def build_dispatch_tables(self):
+		"""
+		Resolves the emitter or handler of each instruction, and the instructions written one indentation level lower.
+		Gets called on creation, and before a compilation if the instructions were modified since.
+		"""
+		self._dispatch_sources = self._get_dispatch_sources()
+		emitters = {}
+		handlers = {}
+		for instruction_name in (*self.instruction_names, *self.other_instructions):
+			# Turns the instruction name into a callback function : The emit_%name% method of this class, or the
+			# analyze_%name% method of the compilers written before the nodes
+			emitter = getattr(self, f"emit_{instruction_name}", None)
+			if emitter is not None:
+				emitters[instruction_name] = emitter
+			else:
+				handlers[instruction_name] = getattr(self, f"analyze_{instruction_name}", self._not_implemented)
+		# The registered handlers replace the methods of the compiler
+		for instruction_name, handler in self._registered_handlers.items():
+			emitters.pop(instruction_name, None)
+			handlers[instruction_name] = handler
+		self.statement_emitters = emitters
+		self.instruction_handlers = handlers
+		self.dedented_instructions = frozenset((*self.get_dedented_instructions(), *self._registered_dedented))
+
+
+	def register_instruction(self, instruction_name: str, handler: Callable[[str, list, int], None], dedented: bool = False):
+		"""
+		Adds an instruction to the compiler, or replaces the handler of an existing one.
+		:param instruction_name: The keyword of the instruction.
+		:param handler: The function called with the instruction's name, its params, and the line number, which
+			rewrites self.instructions_list[line_number]. The line is then rewritten by rewrite_line, as the handler
+			works on the words of the line rather than on its node.
+		:param dedented: Whether the instruction is written one indentation level lower than the block it is in,
+			like 'else'.
+		"""
+		self._registered_handlers[instruction_name] = handler
+		if dedented:
+			self._registered_dedented.add(instruction_name)
+		else:
+			self._registered_dedented.discard(instruction_name)
+		self.build_dispatch_tables()
+
+
+	def register_pass(self, stage: str, compilation_pass: Callable, instruction_name: Optional[str] = None):
+		"""
+		Adds a pass to a stage of the compilation (see PASS_STAGES). The passes of a stage run in the order they were
+		added. Like the emit_* methods, the instruction passes are not called again on the units reused from the
+		units cache, nor any pass on the code reused from the output cache.
+		:param stage: The stage of the compilation, e.g. 'post_analysis'.
+		:param compilation_pass: The function called at this stage, with the compiler as first argument.
+		:param instruction_name: For the 'instruction' stage, the keyword of the statements the pass is called on ;
+			None to call it on every statement.
+		:exception ValueError: If the stage does not exist.
+		"""
+		if stage not in PASS_STAGES:
+			raise ValueError(f"Unknown compilation stage {stage}, expected one of {', '.join(PASS_STAGES)}")
+		self._registered_passes.append((stage, instruction_name, compilation_pass))
+		self.build_pass_lists()
+
+
+	def unregister_pass(self, stage: str, compilation_pass: Callable):
+		"""
+		Removes a pass from a stage of the compilation.
+		:param stage: The stage of the compilation the pass was added to.
+		:param compilation_pass: The pass.
+		"""
+		self._registered_passes = [
+			registered_pass for registered_pass in self._registered_passes
+			if registered_pass[0] != stage or registered_pass[2] is not compilation_pass
+		]
+		self.build_pass_lists()
+
+
+	def build_pass_lists(self):
+		"""
+		Resolves the passes of each stage of the compilation into the lists the compilation calls.
+		Gets called each time a pass is added or removed.
+		"""
+		passes = {stage: [] for stage in PASS_STAGES}
+		instruction_passes = {}
+		for stage, instruction_name, compilation_pass in self._registered_passes:
+			if stage != "instruction":
+				passes[stage].append(compilation_pass)
+				continue
+			# The passes of every instruction are also called on the instructions having their own passes, in order
+			if instruction_name is None:
+				passes[stage].append(compilation_pass)
+				for instruction_passes_list in instruction_passes.values():
+					instruction_passes_list.append(compilation_pass)
+			else:
+				instruction_passes.setdefault(instruction_name, list(passes[stage])).append(compilation_pass)
+
+		self.pre_parse_passes = tuple(passes["pre_parse"])
+		self.instruction_passes = {name: tuple(passes_list) for name, passes_list in instruction_passes.items()}
+		self.any_instruction_passes = tuple(passes["instruction"])
+		self.post_analysis_passes = tuple(passes["post_analysis"])
+		self.pre_emit_passes = tuple(passes["pre_emit"])
+
+		# The cached units were compiled with the previous passes
+		if self.units_cache is not None:
+			self.units_cache.clear()
+
+
+	@staticmethod
+	def _not_implemented(instruction_name: str, instruction_params: list, line_number: int):
+		"""
+		Handles the instructions without any emit_* or analyze_* method.
+		"""
+		raise NotImplementedError(f"Function {instruction_name} not implemented")
+
+
+	def _emit_units(self, program: Program) -> bool:
+		"""
+		Emits the program unit by unit, reusing the cached output of the unchanged units.
+		:param program: The program to emit.
+		:return: False if a unit left some blocks open, in which case the units cannot be compiled independently.
+			The units with errors are not cached, so their errors are found again on the next compilation.
+		"""
+		lines = program.lines
+		options = self.get_options_key()
+		keys = [(unit.kind, "\n".join(lines[unit.start:unit.end]), options) for unit in program.units]
+
+		# Compiles the units missing from the cache across the worker processes, if there are enough of them
+		compiled_outputs = self._compile_units_in_parallel(program, keys)
+
+		for unit, key in zip(program.units, keys):
+			cached_output = compiled_outputs.get(key)
+			if cached_output is not None:
+				self.units_cache.put(key, cached_output)
+			else:
+				cached_output = self.units_cache.get(key)
+
+			# Reuses the output of the unit if it was already compiled
+			if cached_output is not None:
+				unit_lines, added_lists, set_values = cached_output
+				self.instructions_list[unit.start:unit.end] = unit_lines
+				for name, added_items in zip(self.unit_output_lists, added_lists):
+					if name in self.unit_line_lists:
+						added_items = [line_number + unit.start for line_number in added_items]
+					getattr(self, name).extend(added_items)
+				for name, value in set_values:
+					setattr(self, name, value)
+				continue
+
+			# Caches what the unit added to the outputs, unless it has errors
+			unit_output = self._emit_unit(program, unit)
+			if self.instructions_stack:
+				return False
+			if unit_output is not None:
+				self.units_cache.put(key, unit_output)
+		return True
+
+
+	def _emit_unit(self, program: Program, unit: Unit) -> Optional[tuple]:
+		"""
+		Emits the statements of a unit, and returns what it added to the outputs : its lines, the items it added to
+		each of the unit output lists, and the unit output values it set.
+		:param program: The program containing the unit.
+		:param unit: The unit to emit.
+		:return: The output of the unit, or None if it has errors.
+		"""
+		# Remembers the state of the outputs, so what the unit adds to them can be found
+		lists_lengths = [len(getattr(self, name)) for name in self.unit_output_lists]
+		previous_values = [getattr(self, name) for name in self.unit_output_values]
+		for name in self.unit_output_values:
+			setattr(self, name, _UNSET)
+
+		diagnostics_count = len(self.diagnostics)
+		self._emit_statements(program.statements[unit.start:unit.end])
+
+		set_values = []
+		for name, previous_value in zip(self.unit_output_values, previous_values):
+			if getattr(self, name) is _UNSET:
+				setattr(self, name, previous_value)
+			else:
+				set_values.append((name, getattr(self, name)))
+		if len(self.diagnostics) != diagnostics_count:
+			return None
+
+		# The source lines are cached relative to the unit, as the unit can be reused at another position
+		added_lists = []
+		for name, length in zip(self.unit_output_lists, lists_lengths):
+			added_items = getattr(self, name)[length:]
+			if name in self.unit_line_lists:
+				added_items = [line_number - unit.start for line_number in added_items]
+			added_lists.append(tuple(added_items))
+		return self.instructions_list[unit.start:unit.end], tuple(added_lists), tuple(set_values)
+
+
+	def _compile_standalone_unit(self, kind: str, source: str, var_types: FrozenSet[str]) -> Optional[tuple]:
+		"""
+		Compiles a unit on its own, e.g. in a worker process. The lines are parsed on their own, so they give the same
+		statements as when parsed with the rest of the program.
+		:param kind: The kind of the unit.
+		:param source: The source code of the unit.
+		:param var_types: The basic variable types the program was parsed with.
+		:return: The output of the unit, as returned by _emit_unit, or None if it has errors or leaves blocks open.
+		"""
+		statements = tuple(parse_statement(line, i, var_types) for i, line in enumerate(source.split("\n")))
+		unit = Unit(kind, 0, len(statements))
+		program = Program(source, statements, {}, (unit,), True, var_types)
+		self._prepare_compilation(program)
+		unit_output = self._emit_unit(program, unit)
+		return None if self.instructions_stack else unit_output
+
+
+	def _compile_units_in_parallel(self, program: Program, keys: list) -> dict:
+		"""
+		Compiles the units missing from the units cache across a pool of processes, if the program is large enough
+		for the parallel compilation to be faster. The units are compiled independently, so their outputs are the same
+		as when compiled in this process, and get merged in order by _emit_units.
+		:param program: The program being compiled.
+		:param keys: The units cache key of each unit of the program.
+		:return: The output of the compiled units, by key. The units with errors are missing, so they get compiled in
+			this process and their errors get reported.
+		:exception CompilationCancelled: If the cancel event is set.
+		"""
+		# The plugins' instructions and passes are only known by this process
+		if self.worker_factory is None or self.parallel_jobs <= 1 or self._registered_handlers or self._registered_passes:
+			return {}
+
+		# Finds the units to compile, each one only once
+		missing_units = {}
+		for unit, key in zip(program.units, keys):
+			if key not in missing_units and key not in self.units_cache:
+				missing_units[key] = unit
+		lines_count = sum(unit.end - unit.start for unit in missing_units.values())
+		if len(missing_units) < self.parallel_min_units or lines_count < self.parallel_min_lines:
+			return {}
+
+		# Splits the units into batches of about the same amount of lines, a few per process to balance the load
+		batch_size = lines_count // (self.parallel_jobs * 4) + 1
+		batches = [[]]
+		batch_lines_count = 0
+		for key, unit in missing_units.items():
+			if batch_lines_count >= batch_size:
+				batches.append([])
+				batch_lines_count = 0
+			batches[-1].append((key, (unit.kind, key[1])))
+			batch_lines_count += unit.end - unit.start
+
+		fingerprint = self._get_settings_fingerprint()
+		compiled_outputs = {}
+		# The parallel compilation is only an optimization, so any failure of the pool falls back to compiling here
+		try:
+			pool = _get_process_pool(self.parallel_jobs)
+			futures = [
+				pool.submit(
+					_compile_units_in_worker, self.worker_factory, fingerprint, self.context.options, program.var_types,
+					[unit for _, unit in batch]
+				)
+				for batch in batches
+			]
+			for batch, future in zip(batches, futures):
+				while True:
+					if self.cancel_event is not None and self.cancel_event.is_set():
+						for other_future in futures:
+							other_future.cancel()
+						raise CompilationCancelled()
+					try:
+						outputs = future.result(timeout=0.05)
+						break
+					except FutureTimeoutError:
+						pass
+				# The compiler of the worker does not have the same settings
+				if outputs is None:
+					for other_future in futures:
+						other_future.cancel()
+					return {}
+				for (key, _), unit_output in zip(batch, outputs):
+					if unit_output is not None:
+						compiled_outputs[key] = unit_output
+		except CompilationCancelled:
+			raise
+		except Exception:
+			_shutdown_process_pool()
+			return {}
+		return compiled_outputs
+
+
+	def get_options_key(self) -> tuple:
+		"""
+		Returns the options changing the output of the compiler, so the cached units compiled with other options
+		are not reused.
+		"""
+		return self.tab_char, tuple(self.var_types.items())
 
 
 	def prepare_new_compilation(self):
 		"""
 		Gets called before compilation so the compiler can clean itself.
+		The state of the compilation is held by the ContextAttribute attributes of the compiler, which are assigned new
+		values here rather than cleared, as the previous ones belong to the context of another compilation.
 		"""
 		pass
 
 
-	def analyze_const(self, instruction_name:str, instruction_params:list, line_number:int):
+	def emit_const(self, node: Optional[tuple], line_number: int):
 		"""
-		Analyzes a constant.
+		Emits a constant.
 		"""
 		pass
 
 
-	def analyze_for(self, instruction_name:str, instruction_params:list, line_number:int):
+	def emit_for(self, node: Optional[tuple], line_number: int):
 		"""
-		Analyzes a constant.
+		Emits a constant.
 		"""
 		pass
 
 
-	def analyze_end(self, instruction_name:str, instruction_params:list, line_number:int):
+	def emit_end(self, node: Optional[tuple], line_number: int):
 		"""
-		Analyzes a constant.
+		Emits a constant.
 		"""
 		pass
 
 
-	def analyze_while(self, instruction_name:str, instruction_params:list, line_number:int):
+	def emit_while(self, node: Optional[tuple], line_number: int):
 		"""
-		Analyzes a constant.
+		Emits a constant.
 		"""
 		pass
 
 
-	def analyze_if(self, instruction_name:str, instruction_params:list, line_number:int):
+	def emit_if(self, node: Optional[tuple], line_number: int):
 		"""
-		Analyzes a constant.
+		Emits a constant.
 		"""
 		pass
 
 
-	def analyze_else(self, instruction_name:str, instruction_params:list, line_number:int):
+	def emit_else(self, node: Optional[tuple], line_number: int):
 		"""
-		Analyzes a constant.
+		Emits a constant.
 		"""
 		pass
 
 
-	def analyze_elif(self, instruction_name:str, instruction_params:list, line_number:int):
+	def emit_elif(self, node: Optional[tuple], line_number: int):
 		"""
-		Analyzes a constant.
+		Emits a constant.
 		"""
 		pass
 
 
-	def analyze_switch(self, instruction_name:str, instruction_params:list, line_number:int):
+	def emit_switch(self, node: Optional[tuple], line_number: int):
 		"""
-		Analyzes a constant.
+		Emits a constant.
 		"""
 		pass
 
 
-	def analyze_case(self, instruction_name:str, instruction_params:list, line_number:int):
+	def emit_case(self, node: Optional[tuple], line_number: int):
 		"""
-		Analyzes a constant.
+		Emits a constant.
 		"""
 		pass
 
 
-	def analyze_default(self, instruction_name:str, instruction_params:list, line_number:int):
+	def emit_default(self, node: Optional[tuple], line_number: int):
 		"""
-		Analyzes a constant.
+		Emits a constant.
 		"""
 		pass
 
 
-	def analyze_print(self, instruction_name:str, instruction_params:list, line_number:int):
+	def emit_print(self, node: Optional[tuple], line_number: int):
 		"""
-		Analyzes a constant.
+		Emits a constant.
 		"""
 		pass
 
 
-	def analyze_input(self, instruction_name:str, instruction_params:list, line_number:int):
+	def emit_input(self, node: Optional[tuple], line_number: int):
 		"""
-		Analyzes a constant.
+		Emits a constant.
 		"""
 		pass
 
 
-	def analyze_fx(self, instruction_name:str, instruction_params:list, line_number:int):
+	def emit_fx(self, node: Optional[tuple], line_number: int):
 		"""
-		Analyzes a constant.
+		Emits a constant.
 		"""
 		pass
 
 
-	def analyze_precond(self, instruction_name:str, instruction_params:list, line_number:int):
+	def emit_precond(self, node: Optional[tuple], line_number: int):
 		"""
-		Analyzes a constant.
+		Emits a constant.
 		"""
 		pass
 
 
-	def analyze_data(self, instruction_name:str, instruction_params:list, line_number:int):
+	def emit_data(self, node: Optional[tuple], line_number: int):
 		"""
-		Analyzes a constant.
+		Emits a constant.
 		"""
 		pass
 
 
-	def analyze_datar(self, instruction_name:str, instruction_params:list, line_number:int):
+	def emit_datar(self, node: Optional[tuple], line_number: int):
 		"""
-		Analyzes a constant.
+		Emits a constant.
 		"""
 		pass
 
 
-	def analyze_result(self, instruction_name:str, instruction_params:list, line_number:int):
+	def emit_result(self, node: Optional[tuple], line_number: int):
 		"""
-		Analyzes a constant.
+		Emits a constant.
 		"""
 		pass
 
 
-	def analyze_return(self, instruction_name:str, instruction_params:list, line_number:int):
+	def emit_return(self, node: Optional[tuple], line_number: int):
 		"""
-		Analyzes a constant.
+		Emits a constant.
 		"""
 		pass
 
 
-	def analyze_desc(self, instruction_name:str, instruction_params:list, line_number:int):
+	def emit_desc(self, node: Optional[tuple], line_number: int):
 		"""
-		Analyzes a constant.
+		Emits a constant.
 		"""
 		pass
 
 
-	def analyze_fx_start(self, instruction_name:str, instruction_params:list, line_number:int):
+	def emit_fx_start(self, node: Optional[tuple], line_number: int):
 		"""
-		Analyzes a constant.
+		Emits a constant.
 		"""
 		pass
 
 
-	def analyze_vars(self, instruction_name:str, instruction_params:list, line_number:int):
+	def emit_vars(self, node: Optional[tuple], line_number: int):
 		"""
-		Analyzes local variables.
+		Emits local variables.
 		"""
 		pass
 
 
-	def analyze_arr(self, instruction_name:str, instruction_params:list, line_number:int):
+	def emit_arr(self, node: Optional[tuple], line_number: int):
 		"""
-		Analyzes local variables.
+		Emits local variables.
 		"""
 		pass
 
 
-	def analyze_CODE_RETOUR(self, instruction_name:str, instruction_params:list, line_number:int):
+	def emit_CODE_RETOUR(self, node: Optional[tuple], line_number: int):
 		"""
-		Analyzes the return code.
+		Emits the return code.
 		"""
 		pass
 
 
-	def analyze_struct(self, instruction_name:str, instruction_params:list, line_number:int):
+	def emit_struct(self, node: Optional[tuple], line_number: int):
 		"""
-		Analyzes a structure.
+		Emits a structure.
 		"""
 		pass
 
 
-	def analyze_init(self, instruction_name:str, instruction_params:list, line_number:int):
+	def emit_init(self, node: Optional[tuple], line_number: int):
 		"""
-		Analyzes a structure initialization.
+		Emits a structure initialization.
 		"""
 		pass
 
 
-	def analyze_delete(self, instruction_name:str, instruction_params:list, line_number:int):
+	def emit_delete(self, node: Optional[tuple], line_number: int):
 		"""
-		Analyzes a structure initialization.
+		Emits a structure initialization.
 		"""
 		raise NotImplementedError
 
 
+	def emit_include(self, node: Instruction, line_number: int):
+		"""
+		Reports an include directive which could not be resolved, as the resolved ones are replaced by the included
+		files before the compilation (see modules.ModuleLinker).
+		"""
+		code, path = self.program.include_errors.get(line_number, ("include_not_found", node.expression.text))
+		self.error(
+			self.translate_method("compilers", "errors", code).format(
+				line_number=self.get_line_label(line_number), path=path
+			),
+			code, path
+		)
+
+
 	def final_trim(self, instruction_name:str, line_number:int):
 		"""
 		Makes the final trim to the line.
@@ -292,25 +1148,135 @@ class Compiler:
 		pass
 
 
-	def define_var(self, instruction:list, line_number:int):
+	def iter_final_touches(self) -> Iterator[str]:
+		"""
+		Makes the final touches like final_touches, but yields the compiled code in chunks, the ones of
+		iter_source_chunks. The source map is built along the way, and stored once every chunk was yielded :
+		a line comes from the chunk that starts it.
+		"""
+		context = self._local.context
+		source_map = array("i")
+		line_open = False  # Whether the last line of the compiled code is not ended yet
+		for source_line, chunk in self.iter_source_chunks():
+			if chunk:
+				if not line_open:
+					source_map.append(source_line)
+				line_open = chunk[-1] != "\n"
+				# Each line end starts a new line, except the one ending the chunk
+				new_lines_count = chunk.count("\n") - (not line_open)
+				if new_lines_count > 0:
+					source_map.extend((source_line,) * new_lines_count)
+			yield chunk
+		context.source_map = source_map
+
+
+	def iter_source_chunks(self) -> Iterator[Tuple[int, str]]:
+		"""
+		Yields the chunks of the compiled code, each along with the index of the source line it comes from, or -1 if it
+		is generated (e.g. an include).
+		By default, yields the whole result of final_touches at once, as generated.
+		"""
+		yield -1, self.final_touches()
+
+
+	@property
+	def source_map(self) -> array:
+		"""
+		The index of the source line of each line of the compiled code of the last compilation of the current thread,
+		-1 for the generated lines (e.g. the includes). Built by iter_final_touches while the compiled code is put
+		together, or when first read if the compiler puts it together without it.
+		"""
+		context = self._local.context
+		if context.source_map is None:
+			for _ in self.iter_final_touches():
+				pass
+		return context.source_map
+
+
+	def get_source_line(self, output_line: int) -> Optional[int]:
+		"""
+		Returns the source line a line of the compiled code comes from, from the source map of the last compilation of
+		the current thread, in constant time.
+		:param output_line: The index of the line of the compiled code.
+		:return: The index of the source line, or None if the line was generated or is not in the compiled code.
+		"""
+		source_map = self.source_map
+		if 0 <= output_line < len(source_map) and source_map[output_line] >= 0:
+			return source_map[output_line]
+		return None
+
+
+	def emit_declaration(self, declaration: VariableDeclaration, line_number: int):
 		"""
 		Is called when a variable is defined.
 		"""
 		pass
 
 
-	def var_assignation(self, instruction:list, line_number:int):
+	def emit_assignment(self, assignment: Assignment, line_number: int):
 		"""
-		Is called when a variable is defined.
+		Is called when a variable is assigned.
 		"""
 		pass
 
 
-	def error(self, message:str="Error."):
+	def emit_expression_statement(self, instruction: Instruction, line_number: int):
+		"""
+		Is called on the lines made of a single expression, e.g. a function call. By default, the line is kept as is.
+		"""
+		pass
+
+
+	def render_expression(self, expression: Expression, replacements: Optional[Dict[str, str]] = None) -> str:
+		"""
+		Writes an expression in the compiled language. By default, the expression is kept as is.
+		:param expression: The expression.
+		:param replacements: The replacement of some names or operators, by text. The operators are only replaced when
+			written as a separate word, e.g. '&' in 'a & b' but not in '&a'.
+		:return: The text of the expression.
+		"""
+		if not replacements:
+			return expression.text
+		tokens = expression.tokens
+		return "".join(
+			replacements.get(token.text, token.text)
+			if token.kind == "name" or (token.kind == "operator" and is_separate_word(tokens, i)) else token.text
+			for i, token in enumerate(tokens)
+		)
+
+
+	def rewrite_line(self, line: str) -> str:
+		"""
+		Rewrites a line compiled by a registered or analyze_* handler, which works on the words of the line rather than
+		on its node, so its expressions were not rendered. By default, the line is kept as is.
+		:param line: The line to rewrite.
+		:return: The rewritten line.
+		"""
+		return line
+
+
+	def get_line_label(self, line_number: int) -> str:
+		"""
+		Returns the line number shown in the error messages for a line of the program being compiled, prefixed by the
+		name of its file if it comes from an included file.
+		:param line_number: The index of the line.
+		"""
+		return self.program.get_line_label(line_number)
+
+
+	def error(self, message:str="Error.", code:str="error", word:str=None, line_number:int=None):
 		"""
-		Errors out to the user.
+		Reports an error in the code, without stopping the compilation.
+		The compilation goes on from the next line, and the compile method returns None.
+		:param message: The translated message of the error.
+		:param code: The identifier of the error, e.g. 'unrecognized_var_type'.
+		:param word: The word of the line the error is about, to find the column of the error. If None, the column is 0.
+		:param line_number: The index of the line of the error. If None, the line being compiled.
 		"""
-		self.stdscr.clear()
-		self.stdscr.addstr(0, 0, message)
-		self.stdscr.getch()
+		if line_number is None:
+			line_number = self.current_line_number
+		column = 0
+		if word is not None and line_number < len(self.source_lines):
+			column = max(self.source_lines[line_number].find(word), 0)
+		self.diagnostics.append(Diagnostic(line_number, column, code, {}, message))
 		self.errored = True
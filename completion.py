@@ -0,0 +1,292 @@
+"""
+Completes the words typed by the user, from the keywords, the built-in functions and the symbols of the document.
+"""
+import time
+from typing import Dict, Iterable, List, Optional, Set
+
+from highlighting import BUILTIN_FUNCTIONS
+from symbol_table import SymbolTable
+
+
+class _TrieNode:
+	__slots__ = ("children", "is_word")
+
+	def __init__(self):
+		self.children: Dict[str, "_TrieNode"] = {}  # The next nodes, by character
+		self.is_word: bool = False  # Whether a word ends on this node
+
+
+class Trie:
+	def __init__(self, words: Iterable[str] = tuple()):
+		"""
+		A prefix tree of words, to find all the words starting with a prefix in a time proportional to the prefix.
+		:param words: The words initially in the trie.
+		"""
+		self._root = _TrieNode()
+		self._size = 0
+		for word in words:
+			self.insert(word)
+
+
+	def insert(self, word: str) -> None:
+		"""
+		Adds a word to the trie.
+		:param word: The word to add.
+		"""
+		node = self._root
+		for char in word:
+			next_node = node.children.get(char)
+			if next_node is None:
+				next_node = node.children[char] = _TrieNode()
+			node = next_node
+		if not node.is_word:
+			node.is_word = True
+			self._size += 1
+
+
+	def remove(self, word: str) -> None:
+		"""
+		Removes a word from the trie, along with the nodes only it was using.
+		:param word: The word to remove. Nothing happens if it is not in the trie.
+		"""
+		path = [self._root]
+		for char in word:
+			node = path[-1].children.get(char)
+			if node is None:
+				return
+			path.append(node)
+		if not path[-1].is_word:
+			return
+		path[-1].is_word = False
+		self._size -= 1
+
+		# Removes the nodes that no longer lead to any word
+		for i in range(len(word) - 1, -1, -1):
+			node = path[i + 1]
+			if node.is_word or node.children:
+				break
+			del path[i].children[word[i]]
+
+
+	def _find_node(self, prefix: str) -> Optional[_TrieNode]:
+		"""
+		Returns the node reached by the given prefix, or None if no word starts with it.
+		:param prefix: The prefix.
+		"""
+		node = self._root
+		for char in prefix:
+			node = node.children.get(char)
+			if node is None:
+				return None
+		return node
+
+
+	def starting_with(self, prefix: str, limit: int = None, deadline: float = None) -> List[str]:
+		"""
+		Returns the words starting with the given prefix, shortest first.
+		:param prefix: The prefix.
+		:param limit: The maximum amount of words to return. No limit if None.
+		:param deadline: A time.perf_counter() value after which the search stops early. No deadline if None.
+		"""
+		node = self._find_node(prefix)
+		if node is None:
+			return []
+
+		# Goes through the subtree breadth first, so the shortest words are found first
+		words = []
+		level = [(prefix, node)]
+		while level:
+			next_level = []
+			for word, node in level:
+				if deadline is not None and time.perf_counter() > deadline:
+					return words
+				if node.is_word:
+					words.append(word)
+					if limit is not None and len(words) >= limit:
+						return words
+				next_level.extend((word + char, child) for char, child in sorted(node.children.items()))
+			level = next_level
+		return words
+
+
+	def fuzzy_starting_with(self, prefix: str, max_distance: int, limit: int = None, deadline: float = None) -> List[str]:
+		"""
+		Returns the words starting with a prefix at most max_distance edits (Levenshtein distance) away from the
+		given prefix, closest first.
+		The rows of the edit distance matrix are computed along the branches of the trie, so the common prefixes of
+		the words are only computed once, and branches too far from the prefix are skipped.
+		:param prefix: The prefix.
+		:param max_distance: The maximum amount of insertions, deletions and substitutions.
+		:param limit: The maximum amount of words to return. No limit if None.
+		:param deadline: A time.perf_counter() value after which the search stops early. No deadline if None.
+		"""
+		matches: Dict[str, int] = {}  # The distance of each matched word
+		counts = [0] * (max_distance + 1)  # The amount of matched words at each distance
+
+		# Every branch whose prefix is close enough has all its words matching, shortest first, until enough words
+		# match at that distance. Returns False if the deadline passed.
+		def add_subtree(word: str, node: _TrieNode, distance: int) -> bool:
+			for matched_word in Trie._subtree_words(word, node, deadline):
+				if limit is not None and sum(counts[:distance + 1]) >= limit:
+					return True
+				previous_distance = matches.get(matched_word)
+				if previous_distance is None or previous_distance > distance:
+					if previous_distance is not None:
+						counts[previous_distance] -= 1
+					matches[matched_word] = distance
+					counts[distance] += 1
+			return deadline is None or time.perf_counter() <= deadline
+
+		stack = [("", self._root, list(range(len(prefix) + 1)))]
+		while stack:
+			if deadline is not None and time.perf_counter() > deadline:
+				break
+			word, node, row = stack.pop()
+			if row[-1] <= max_distance:
+				if not add_subtree(word, node, row[-1]):
+					break
+				# Going deeper can still find closer matches, but not if the prefix is matched exactly
+				if row[-1] == 0:
+					continue
+			for char, child in node.children.items():
+				new_row = [row[0] + 1]
+				for i in range(1, len(prefix) + 1):
+					new_row.append(min(
+						new_row[i - 1] + 1,
+						row[i] + 1,
+						row[i - 1] + (prefix[i - 1] != char)
+					))
+				if min(new_row) <= max_distance:
+					stack.append((word + char, child, new_row))
+
+		words = sorted(matches, key=lambda matched_word: (matches[matched_word], len(matched_word), matched_word))
+		return words if limit is None else words[:limit]
+
+
+	@staticmethod
+	def _subtree_words(word: str, node: _TrieNode, deadline: float = None) -> Iterable[str]:
+		"""
+		Yields all the words of the subtree of the given node, shortest first.
+		:param word: The word leading to the node.
+		:param node: The root of the subtree.
+		:param deadline: A time.perf_counter() value after which the walk stops early. No deadline if None.
+		"""
+		level = [(word, node)]
+		while level:
+			next_level = []
+			for word, node in level:
+				if deadline is not None and time.perf_counter() > deadline:
+					return
+				if node.is_word:
+					yield word
+				next_level.extend((word + char, child) for char, child in sorted(node.children.items()))
+			level = next_level
+
+
+	def __contains__(self, word: str) -> bool:
+		node = self._find_node(word)
+		return node is not None and node.is_word
+
+
+	def __len__(self) -> int:
+		return self._size
+
+
+class CompletionEngine:
+	def __init__(self, app, symbol_table: SymbolTable, latency_budget: float = 0.005, max_distance: int = 1):
+		"""
+		Completes words from the keywords, the built-in functions and the symbols declared in the document.
+		The symbols are kept up to date through the symbol table, so only the names that changed are indexed again.
+		:param app: The instance of the app.
+		:param symbol_table: The table of the symbols declared in the document.
+		:param latency_budget: The maximum time in seconds a completion request can take.
+		:param max_distance: The maximum edit distance of the fuzzy matches. 0 disables fuzzy matching.
+		"""
+		self.app = app
+		self.latency_budget = latency_budget
+		self.max_distance = max_distance
+		self.trie = Trie()  # All the words that can be completed
+		self._sources: Dict[str, int] = {}  # How many sources (keywords, symbols) each word of the trie comes from
+		self._keywords: Set[str] = set()  # The keywords and built-in functions currently in the trie
+
+		self.reload_keywords()
+		self._on_symbols_changed(set(symbol_table.symbol_names()), set())
+		symbol_table.add_listener(self._on_symbols_changed)
+
+
+	def _add_word(self, word: str) -> None:
+		"""
+		Adds a source to the word, inserting it in the trie if it is new.
+		:param word: The word to add.
+		"""
+		count = self._sources.get(word, 0)
+		if count == 0:
+			self.trie.insert(word)
+		self._sources[word] = count + 1
+
+
+	def _remove_word(self, word: str) -> None:
+		"""
+		Removes a source of the word, removing it from the trie once it no longer has any.
+		:param word: The word to remove.
+		"""
+		count = self._sources.get(word, 0)
+		if count <= 1:
+			self._sources.pop(word, None)
+			self.trie.remove(word)
+		else:
+			self._sources[word] = count - 1
+
+
+	def reload_keywords(self) -> None:
+		"""
+		Reloads the keywords from the app.
+		Should be called after they are modified.
+		"""
+		keywords = set(BUILTIN_FUNCTIONS)
+		for statements in self.app.color_control_flow.values():
+			keywords.update(statements)
+		for word in self._keywords - keywords:
+			self._remove_word(word)
+		for word in keywords - self._keywords:
+			self._add_word(word)
+		self._keywords = keywords
+
+
+	def _on_symbols_changed(self, added: Set[str], removed: Set[str]) -> None:
+		"""
+		Updates the trie with the symbol names that appeared in or disappeared from the document.
+		:param added: The names that were added to the document.
+		:param removed: The names that were removed from the document.
+		"""
+		for name in removed:
+			self._remove_word(name)
+		for name in added:
+			self._add_word(name)
+
+
+	def complete(self, prefix: str, limit: int = 10, fuzzy: bool = True) -> List[str]:
+		"""
+		Returns the words completing the given prefix, within the latency budget.
+		Words starting with the prefix come first, shortest first, followed by the fuzzy matches, closest first.
+		:param prefix: The beginning of the word typed by the user.
+		:param limit: The maximum amount of completions.
+		:param fuzzy: Whether to add the words starting with a prefix close to the given one.
+		:return: The completions, which may be incomplete if the latency budget ran out.
+		"""
+		if prefix == "":
+			return []
+		deadline = time.perf_counter() + self.latency_budget
+		completions = [word for word in self.trie.starting_with(prefix, limit + 1, deadline) if word != prefix][:limit]
+
+		# Only looks for fuzzy matches if the prefix is long enough for them to be relevant
+		if fuzzy and self.max_distance > 0 and len(prefix) > self.max_distance and len(completions) < limit:
+			found = set(completions)
+			found.add(prefix)
+			# The prefix itself may be among the matches, so one more is asked for
+			for word in self.trie.fuzzy_starting_with(prefix, self.max_distance, limit + 1, deadline):
+				if word not in found:
+					completions.append(word)
+					if len(completions) >= limit:
+						break
+		return completions
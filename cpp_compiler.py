@@ -1,19 +1,68 @@
 """
 Uses the Compiler class to compile the project into C++.
 """
-from compiler import Compiler
+import re
+from typing import Dict, Optional, Sequence
 
+from compiler import Compiler, ContextAttribute, OptionAttribute, is_separate_word
+from custom_types import (
+	ArrayDeclaration, Assignment, Comment, ConstantDeclaration, Deletion, Expression, Field, ForLoop,
+	FunctionDeclaration, Instruction, StructDeclaration, StructInitialization, Token, TypeReference,
+	VariableDeclaration
+)
 
-def ifsanitize(string:str) -> str:
-	"""
-	Transforms all ET into &&, etc.
-	:param string: The string to sanitize.
-	:return: The sanitized string.
-	"""
-	return string.replace('ET', '&&').replace('OU', '||').replace('NON', '!')
+
+# The algorithmic built-in functions and constants, by their C++ equivalent
+BUILTIN_MAPPINGS = {
+	"puissance(": "pow(",
+	"racine(": "sqrt(",
+	"aleatoire(": "rand(",
+	"alea(": "rand(",
+	"NULL": "nullptr"
+}
+
+# The features used by the built-in functions, recorded when they get rewritten
+BUILTIN_FEATURES = {
+	"puissance(": "math",
+	"racine(": "math",
+	"aleatoire(": "random",
+	"alea(": "random"
+}
+
+# The includes needed by each feature, in the order they are written
+FEATURE_INCLUDES = {
+	"math": "#include <math.h>\n",
+	"random": "#include <stdlib.h>\n#include <time.h>\n",
+	"len": "#include <stdlib.h>\n"
+}
+
+# The line end marker of the print statements
+ENDL_MARKER = "(ENDL)"
+
+# Matches the calls to the len function, with the name of the array as first group
+LEN_PATTERN = re.compile(r"len\(([^)]*)\)")
+
+# Matches the names, to tell the built-in functions and constants from the other rewritten texts
+NAME_PATTERN = re.compile(r"[^\W\d]\w*")
+
+# The logical operators of the conditions, by their C++ equivalent
+CONDITION_OPERATORS = {"ET": "&&", "OU": "||", "NON": "!"}
+
+# The operator separating the printed elements, by its C++ equivalent
+PRINT_OPERATORS = {"&": "<<"}
 
 
 class CppCompiler(Compiler):
+	constants = ContextAttribute("constants")
+	constants_lines = ContextAttribute("constants_lines")
+	fxtext = ContextAttribute("fxtext")
+	fxtext_lines = ContextAttribute("fxtext_lines")
+	return_code = ContextAttribute("return_code")
+	used_features = ContextAttribute("used_features")
+	use_struct_keyword = OptionAttribute("use_struct_keyword")
+	use_ptrs_and_malloc = OptionAttribute("use_ptrs_and_malloc")
+	using_namespace_std = OptionAttribute("using_namespace_std")
+
 	def __init__(self, instruction_names:tuple, var_types:dict, other_instructions:list, stdscr, app,
 	                use_struct_keyword:bool=True):
 		super().__init__(instruction_names, var_types, other_instructions, stdscr, app.translations, app.get_translation, app.tab_char)
@@ -22,72 +71,294 @@ class CppCompiler(Compiler):
 		self.constants = []
 		# Creates a list of function lines
 		self.fxtext = []
+		# Creates the lists of the index of the source line of each constant and function line
+		self.constants_lines = []
+		self.fxtext_lines = []
 		# Creates the return code
 		self.return_code = "0"
+		# Creates the list of the features used by the compiled code, such as "math" or "random"
+		self.used_features = []
 
 		# Chooses whether we use the struct keyword in the functions' return type and arguments
 		self.use_struct_keyword = use_struct_keyword
+		# Chooses whether the pointers are enabled and whether the std namespace is used, from the settings of the app
+		self.use_ptrs_and_malloc = app.use_ptrs_and_malloc
+		self.using_namespace_std = app.using_namespace_std
 
 		# Creates some use variables
 		self.app = app
 
+		# The outputs of each unit, cached for the incremental compilation
+		self.unit_output_lists = ("constants", "fxtext", "used_features", "constants_lines", "fxtext_lines")
+		self.unit_line_lists = ("constants_lines", "fxtext_lines")
+		self.unit_output_values = ("return_code",)
+
+		# The built-in functions rewritten in each line ; new ones can be added to the mappings
+		self.builtin_mappings = dict(BUILTIN_MAPPINGS)
+		self.builtin_features = dict(BUILTIN_FEATURES)  # The feature used by each built-in function, if any
+		self.feature_includes = dict(FEATURE_INCLUDES)
+		self.rewrites = tuple()  # The texts rewritten in each line, with their replacement and feature, in order
+		self.call_rewrites = {}  # The replacement and feature of each called built-in function, by name
+		self.name_rewrites = {}  # The replacement and feature of each built-in constant, by name
+		self.text_rewrites = tuple()  # The other texts rewritten in the expressions, with their replacement and feature
+		self.build_rewrites()
+
 
 	def prepare_new_compilation(self):
 		"""
 		Resets everything before compilation.
 		"""
-		self.constants.clear()
-		self.fxtext.clear()
+		self.constants = []
+		self.fxtext = []
+		self.constants_lines = []
+		self.fxtext_lines = []
 		self.return_code = "0"
+		self.used_features = []
+		self.build_rewrites()
+
+
+	def get_options_key(self) -> tuple:
+		""" The options changing the output of the compiler. """
+		return (
+			*super().get_options_key(), self.use_ptrs_and_malloc, self.using_namespace_std,
+			self.use_struct_keyword, tuple(self.builtin_mappings.items()),
+			tuple(self.builtin_features.items())
+		)
+
+
+	def build_rewrites(self):
+		"""
+		Builds the table of the texts rewritten in each line, in order, with their replacement : the line ends, then the
+		built-in functions, along with the feature they use. The built-in functions and constants are also sorted by
+		name, to rewrite the names of the expressions rather than their text. Gets called before each compilation, so
+		the modifications of the mappings are applied.
+		"""
+		self.rewrites = ((ENDL_MARKER, "\\n", None), *(
+			(text, replacement, self.builtin_features.get(text))
+			for text, replacement in self.builtin_mappings.items()
+		))
+		self.call_rewrites = {}
+		self.name_rewrites = {}
+		text_rewrites = []
+		for text, replacement, feature in self.rewrites[1:]:
+			if text[-1:] == "(" and replacement[-1:] == "(" and NAME_PATTERN.fullmatch(text[:-1]):
+				self.call_rewrites[text[:-1]] = (replacement[:-1], feature)
+			elif NAME_PATTERN.fullmatch(text):
+				self.name_rewrites[text] = (replacement, feature)
+			else:
+				text_rewrites.append((text, replacement, feature))
+		self.text_rewrites = tuple(text_rewrites)
+
+
+	def rewrite_line(self, line: str) -> str:
+		"""
+		Rewrites the line ends, the built-in functions, the len function, and removes the std:: prefix if the std
+		namespace is used, in the text of a line compiled by a handler. Records the features used by the rewritten
+		functions.
+		:param line: The line to rewrite.
+		:return: The rewritten line.
+		"""
+		for text, replacement, feature in self.rewrites:
+			if text in line:
+				line = line.replace(text, replacement)
+				if feature is not None:
+					self.used_features.append(feature)
+
+		# Adds the len function, in a single scan of the line
+		if "len(" in line:
+			line, count = LEN_PATTERN.subn(r"(sizeof(\1)/sizeof(\1[0]))", line)
+			if count:
+				self.used_features.append("len")
+
+		if self.using_namespace_std:
+			line = line.replace("std::", "")
+		return line
+
+
+	def render_expression(self, expression: Expression, replacements: Optional[Dict[str, str]] = None) -> str:
+		"""
+		Writes the line ends of the string literals, the built-in functions and constants, the len function, and
+		removes the std:: prefix if the std namespace is used. Records the features used by the rewritten functions.
+		"""
+		text = self._render_tokens(expression.tokens, replacements or {})
+		for rewritten_text, replacement, feature in self.text_rewrites:
+			if rewritten_text in text:
+				text = text.replace(rewritten_text, replacement)
+				if feature is not None:
+					self.used_features.append(feature)
+		return text
+
+
+	def _render_tokens(self, tokens: Sequence[Token], replacements: Dict[str, str]) -> str:
+		"""
+		Writes the tokens of an expression (see render_expression).
+		:param tokens: The tokens.
+		:param replacements: The replacement of some operators or names, by text.
+		"""
+		parts = []
+		i = 0
+		while i < len(tokens):
+			kind, text = tokens[i]
+			if kind == "string":
+				parts.append(text.replace(ENDL_MARKER, "\\n"))
+			elif kind == "name":
+				is_call = i + 1 < len(tokens) and tokens[i + 1].text == "("
+				# Writes the length of the arrays with sizeof
+				if text == "len" and is_call:
+					closing_index = self._find_closing_parenthesis(tokens, i + 1)
+					if closing_index is not None:
+						array = self._render_tokens(tokens[i + 2:closing_index], replacements)
+						parts.append(f"(sizeof({array})/sizeof({array}[0]))")
+						self.used_features.append("len")
+						i = closing_index + 1
+						continue
+				# Removes the std:: prefix
+				if text == "std" and self.using_namespace_std and tuple(token.text for token in tokens[i + 1:i + 3]) == (":", ":"):
+					i += 3
+					continue
+				rewrite = (self.call_rewrites if is_call else self.name_rewrites).get(text)
+				if rewrite is not None:
+					text, feature = rewrite
+					if feature is not None:
+						self.used_features.append(feature)
+				parts.append(replacements.get(text, text))
+			elif kind == "operator" and text in replacements and is_separate_word(tokens, i):
+				parts.append(replacements[text])
+			else:
+				parts.append(text)
+			i += 1
+		return "".join(parts)
+
+
+	@staticmethod
+	def _find_closing_parenthesis(tokens: Sequence[Token], opening_index: int) -> Optional[int]:
+		"""
+		Finds the parenthesis closing the one at the given index.
+		:param tokens: The tokens of the expression.
+		:param opening_index: The index of the opening parenthesis.
+		:return: The index of the closing parenthesis, or None if it is not closed.
+		"""
+		depth = 0
+		for i in range(opening_index, len(tokens)):
+			if tokens[i].text == "(":
+				depth += 1
+			elif tokens[i].text == ")":
+				depth -= 1
+				if depth == 0:
+					return i
+		return None
+
+
+	def get_std_name(self, name: str) -> str:
+		""" Returns the name of an element of the standard library, prefixed by std:: if the std namespace is not used """
+		return name if self.using_namespace_std else f"std::{name}"
+
+
+	def get_type_name(self, var_type: str) -> str:
+		"""
+		Returns the C++ equivalent of a basic variable type, without the std:: prefix if the std namespace is used.
+		:exception KeyError: If the type is unknown.
+		"""
+		type_name = self.var_types[var_type]
+		return type_name.replace("std::", "") if self.using_namespace_std else type_name
 
 
-	def analyze_const(self, instruction_name:str, instruction_params:list, line_number:int):
+	def get_field_declaration(self, field: Field) -> Optional[str]:
+		"""
+		Writes the declaration of a parameter of a function or of a field of a structure.
+		:param field: The type and name of the parameter or field.
+		:return: The declaration, or None if the field is not named.
+		:exception KeyError: If the type is unknown, or is a pointer while the pointers are disabled.
+		"""
+		type_reference = field.type
+		if type_reference.is_pointer and not self.use_ptrs_and_malloc:
+			raise KeyError(type_reference.text)
+		is_pointer = "*" if type_reference.is_pointer else ""
+		is_const = "const " if type_reference.is_const else ""
+
+		# If the field is an array, we write its dimensions after its name
+		if type_reference.kind == "array":
+			item_type = self.get_type_name(type_reference.base) if type_reference.base in self.var_types else type_reference.base
+			dimensions = f"[{']['.join(type_reference.dimensions)}]"
+		# If the field is a structure
+		elif type_reference.kind == "struct":
+			item_type, dimensions = "struct " * self.use_struct_keyword + type_reference.base, ""
+		else:
+			item_type, dimensions = self.get_type_name(type_reference.base), ""
+
+		if field.name is None:
+			return None
+		return f"{is_const}{item_type}{is_pointer} {field.name}{dimensions}"
+
+
+	def get_return_type(self, type_reference: TypeReference) -> str:
+		"""
+		Writes the return type of a function.
+		:exception KeyError: If the type is unknown, constant or an array, or is a pointer while the pointers are
+			disabled.
+		"""
+		if type_reference.is_const or type_reference.kind == "array" or (
+			type_reference.is_pointer and not self.use_ptrs_and_malloc
+		):
+			raise KeyError(type_reference.text)
+		if type_reference.kind == "struct":
+			return_type = "struct " * self.use_struct_keyword + type_reference.base
+		else:
+			return_type = self.get_type_name(type_reference.base)
+		return return_type + "*" * type_reference.is_pointer
+
+
+	def emit_const(self, node: ConstantDeclaration, line_number: int):
 		""" Constante : Nom : Paramètres """
 		# Adds a constant to the list of constants
-		self.constants.append(f"const {' '.join(instruction_params)};")
+		const_type = self.get_type_name(node.type) if node.type in self.var_types else node.type
+		self.constants.append(f"const {const_type} {node.name} = {self.render_expression(node.value)};")
+		self.constants_lines.append(line_number)
 
 		# Empties the line
 		self.instructions_list[line_number] = ""
 
 
-	def define_var(self, instruction:list, line_number:int):
+	def emit_declaration(self, declaration: VariableDeclaration, line_number: int):
 		""" Noms, séparés, par, des, virgules : Type(s) """
 		# Finding the type of the variable
-		if instruction[0][-1] == "*":
-			if self.app.use_ptrs_and_malloc:
-				var_type = f"{self.var_types[instruction[0][:-1]]}*"
+		if declaration.type.is_pointer:
+			if self.use_ptrs_and_malloc:
+				var_type = f"{self.get_type_name(declaration.type.base)}*"
 			else:
-				return self.error(f"Error line {line_number + 1} : Use of pointers was disabled.")
+				return self.error(f"Error line {self.get_line_label(line_number)} : Use of pointers was disabled.", "pointers_disabled")
 		else:
-			var_type = self.var_types[instruction[0]]
+			var_type = self.get_type_name(declaration.type.base)
 
-		# If the third argument is an equals ('=') sign, we use the shorthand for quick variable assignation
-		if len(instruction) > 2 and instruction[2] == "=":
-			# We remove the type of the variable from the instructions list
-			instruction.pop(0)
-
-			# We call the variable assignation method to generate an assignation string
-			self.var_assignation(instruction, line_number)
+		# If the variable is given a value, we assign it in its declaration
+		if declaration.value is not None:
+			self.instructions_list[line_number] = f"{var_type} {declaration.names[0]} = {self.render_expression(declaration.value)}"
 
 		# Otherwise, we define all the variables quickly
 		else:
-			# Getting the names of each variable
-			variable_names = ", ".join(instruction[1:])
+			self.instructions_list[line_number] = var_type + " " + ", ".join(declaration.names)
+
+
+	def emit_assignment(self, assignment: Assignment, line_number: int):
+		""" Assigns/reassigns a variable. """
+		self.instructions_list[line_number] = f"{assignment.target} {assignment.operator} {self.render_expression(assignment.value)}"
 
-			# Creating the string
-			self.instructions_list[line_number] = var_type + " " + variable_names
 
+	def emit_expression_statement(self, instruction: Instruction, line_number: int):
+		""" Writes the expression, e.g. a function call """
+		self.instructions_list[line_number] = self.render_expression(instruction.expression)
 
-	def analyze_for(self, instruction_name:str, instruction_params:list, line_number:int):
+
+	def emit_for(self, node: ForLoop, line_number: int):
 		""" Pour i allant de 0 à n avec un pas de 1 """
 		self.instructions_stack.append("for")
 		# Creates the for loop's body
-		self.instructions_list[line_number] = f"for ({instruction_params[0]} = {instruction_params[1]}; " \
-		f"{instruction_params[0]} <= {instruction_params[2]}; " \
-		f"{instruction_params[0]} += {1 if len(instruction_params) < 4 else instruction_params[3]}) " + "{"
+		self.instructions_list[line_number] = f"for ({node.variable} = {self.render_expression(node.start)}; " \
+		f"{node.variable} <= {self.render_expression(node.end)}; " \
+		f"{node.variable} += {1 if node.step is None else self.render_expression(node.step)}) " + "{"
 
 
-	def analyze_end(self, instruction_name:str, instruction_params:list, line_number:int):
+	def emit_end(self, node: None, line_number: int):
 		""" Fin names[elem] """
 		# Pops the element at the end of the stack and stores it in a variable
 		last_elem = self.instructions_stack.pop()
@@ -98,6 +369,7 @@ class CppCompiler(Compiler):
 
 		elif last_elem in ("fx", "proc"):
 			self.fxtext.append("}\n")
+			self.fxtext_lines.append(line_number)
 			self.instructions_list[line_number] = ""
 
 		# Otherwise it's just a curly bracket
@@ -105,60 +377,60 @@ class CppCompiler(Compiler):
 			self.instructions_list[line_number] = "}"
 
 
-	def analyze_while(self, instruction_name:str, instruction_params:list, line_number:int):
+	def emit_while(self, node: Instruction, line_number: int):
 		""" Tant Que condition """
 		self.instructions_stack.append("while")
 		# Rewrites the line for the while loop
-		self.instructions_list[line_number] = f"while ({ifsanitize(' '.join(instruction_params))}) " + "{"
+		self.instructions_list[line_number] = f"while ({self.render_expression(node.expression, CONDITION_OPERATORS)}) " + "{"
 
 
-	def analyze_if(self, instruction_name:str, instruction_params:list, line_number:int):
+	def emit_if(self, node: Instruction, line_number: int):
 		""" Si condition """
 		self.instructions_stack.append("if")
 		# Rewrites the line
-		self.instructions_list[line_number] = f"if ({ifsanitize(' '.join(instruction_params))}) " + "{"
+		self.instructions_list[line_number] = f"if ({self.render_expression(node.expression, CONDITION_OPERATORS)}) " + "{"
 
 
-	def analyze_else(self, instruction_name:str, instruction_params:list, line_number:int):
+	def emit_else(self, node: None, line_number: int):
 		""" Sinon """
 		# Rewrites the line
 		self.instructions_list[line_number] = "} else {"
 
 
-	def analyze_elif(self, instruction_name:str, instruction_params:list, line_number:int):
+	def emit_elif(self, node: Instruction, line_number: int):
 		""" Sinon Si condition """
 		# Rewrites the line
-		self.instructions_list[line_number] = "} " + f"else if ({ifsanitize(' '.join(instruction_params))}) " + " {"
+		self.instructions_list[line_number] = "} " + f"else if ({self.render_expression(node.expression, CONDITION_OPERATORS)}) " + " {"
 
 
-	def analyze_switch(self, instruction_name:str, instruction_params:list, line_number:int):
+	def emit_switch(self, node: Instruction, line_number: int):
 		""" SELON element """
 		self.instructions_stack.append("switch")
 		# Rewrites the line
-		self.instructions_list[line_number] = f"switch ({' '.join(instruction_params)}) " + "{"
+		self.instructions_list[line_number] = f"switch ({self.render_expression(node.expression)}) " + "{"
 
 
-	def analyze_case(self, instruction_name:str, instruction_params:list, line_number:int):
+	def emit_case(self, node: Instruction, line_number: int):
 		""" Cas element """
 		# If there is no switch in the instruction stack, we error out to the user
 		if "switch" not in self.instructions_stack:
 			self.error(self.translate_method("compilers", "cpp", "errors", "case_outside_switch").format(
-				line_number=(line_number + 1)
-			))
+				line_number=self.get_line_label(line_number)
+			), "case_outside_switch")
 
 		# If there is no error, we continue
 		else:
 			self.instructions_stack.append("case")
-			self.instructions_list[line_number] = f"case {' '.join(instruction_params)}:"
+			self.instructions_list[line_number] = f"case {self.render_expression(node.expression)}:"
 
 
-	def analyze_default(self, instruction_name:str, instruction_params:list, line_number:int):
+	def emit_default(self, node: Instruction, line_number: int):
 		""" Autrement : """
 		# If there is no switch in the instruction stack, we error out to the user
 		if "switch" not in self.instructions_stack:
 			self.error(self.translate_method("compilers", "cpp", "errors", "default_outside_switch").format(
-				line_number=(line_number + 1)
-			))
+				line_number=self.get_line_label(line_number)
+			), "default_outside_switch")
 
 		# If there is no error, we continue
 		else:
@@ -166,424 +438,258 @@ class CppCompiler(Compiler):
 			self.instructions_list[line_number] = "default:"
 
 
-	def analyze_print(self, instruction_name:str, instruction_params:list, line_number:int):
+	def emit_print(self, node: Instruction, line_number: int):
 		""" Afficher(elements) """
-		# Creates the string to print
-		string_to_print = ' '.join(instruction_params)
-
-		# Turns all & into <<
-		string_to_print = string_to_print.replace(' & ', ' << ')
-
-		# Rewrites the string
-		self.instructions_list[line_number] = f"std::cout << {string_to_print}"
+		# Writes the elements to print, turning all & into <<
+		self.instructions_list[line_number] = f"{self.get_std_name('cout')} << {self.render_expression(node.expression, PRINT_OPERATORS)}"
 
 
-	def analyze_input(self, instruction_name:str, instruction_params:list, line_number:int):
+	def emit_input(self, node: Instruction, line_number: int):
 		""" Saisir(elements) """
-		self.instructions_list[line_number] = f"std::cin >> {' '.join(instruction_params)}"
+		self.instructions_list[line_number] = f"{self.get_std_name('cin')} >> {self.render_expression(node.expression)}"
 
 
-	def analyze_precond(self, instruction_name:str, instruction_params:list, line_number:int):
+	def emit_precond(self, node: Comment, line_number: int):
 		""" Préconditions : elements """
-		self.instructions_list[line_number] = f"// Préconditions : {' '.join(instruction_params)}"
+		self.instructions_list[line_number] = f"// Préconditions : {node.text}"
 
 
-	def analyze_data(self, instruction_name:str, instruction_params:list, line_number:int):
+	def emit_data(self, node: Comment, line_number: int):
 		""" Données : elements """
-		self.instructions_list[line_number] = f"// Données : {' '.join(instruction_params)}"
+		self.instructions_list[line_number] = f"// Données : {node.text}"
 
 
-	def analyze_datar(self, instruction_name:str, instruction_params:list, line_number:int):
+	def emit_datar(self, node: Comment, line_number: int):
 		""" Donnée/Résultat : elements """
-		self.instructions_list[line_number] = f"// Donnée/Résultat : {' '.join(instruction_params)}"
+		self.instructions_list[line_number] = f"// Donnée/Résultat : {node.text}"
 
 
-	def analyze_result(self, instruction_name:str, instruction_params:list, line_number:int):
+	def emit_result(self, node: Comment, line_number: int):
 		""" Résultat : elements """
-		self.instructions_list[line_number] = f"// Résultat : {' '.join(instruction_params)}"
+		self.instructions_list[line_number] = f"// Résultat : {node.text}"
 
 
-	def analyze_desc(self, instruction_name:str, instruction_params:list, line_number:int):
+	def emit_desc(self, node: Comment, line_number: int):
 		""" Description : elements """
-		self.instructions_list[line_number] = f"// Description : {' '.join(instruction_params)}"
+		self.instructions_list[line_number] = f"// Description : {node.text}"
 
 
-	def analyze_return(self, instruction_name:str, instruction_params:list, line_number:int):
+	def emit_return(self, node: Instruction, line_number: int):
 		""" Retourner elements """
 		# Checks we're not in a procedure
 		if "proc" in self.instructions_stack:
 			self.error(self.translate_method("compilers", "cpp", "errors", "return_in_procedure").format(
-				line_number=(line_number + 1)
-			))
+				line_number=self.get_line_label(line_number)
+			), "return_in_procedure")
 
 		# Checks we're inside a function
 		elif "fx" not in self.instructions_stack:
 			self.error(self.translate_method("compilers", "cpp", "errors", "return_outside_function").format(
-				line_number=(line_number + 1)
-			))
+				line_number=self.get_line_label(line_number)
+			), "return_outside_function")
 
 		# Writes the line correctly
 		else:
-			self.instructions_list[line_number] = f"return {' '.join(instruction_params)}"
+			self.instructions_list[line_number] = f"return {self.render_expression(node.expression)}"
 
 
-	def analyze_vars(self, instruction_name:str, instruction_params:list, line_number:int):
+	def emit_vars(self, node: Comment, line_number: int):
 		""" Variables locales : """
-		self.instructions_list[line_number] = f"// Variables locales : {' '.join(instruction_params)}"
+		self.instructions_list[line_number] = f"// Variables locales : {node.text}"
 
 
-	def analyze_fx_start(self, instruction_name:str, instruction_params:list, line_number:int):
+	def emit_fx_start(self, node: Comment, line_number: int):
 		""" Début : """
 		# Empties the line
 		self.instructions_list[line_number] = ""
 
 
-	def analyze_tab(self, instruction_name:str, instruction_params:list, line_number:int):
+	def emit_tab(self, node: ArrayDeclaration, line_number: int):
 		""" Name : tableau [ size ] de type Type """
-		self.analyze_arr(instruction_name, instruction_params, line_number)
+		self.emit_arr(node, line_number)
 
 
-	def analyze_arr(self, instruction_name:str, instruction_params:list, line_number:int):
+	def emit_arr(self, node: ArrayDeclaration, line_number: int):
 		""" Name : tableau [ size ] de type Type """
-		try:
-			# We construct the array size
-			arr_sizes = ""
-			for i in range(2, len(instruction_params)):
-				arr_sizes += f"[{instruction_params[i]}]"
-
-			# Building the final line
-			self.instructions_list[line_number] = f"{self.var_types[instruction_params[0]]} {instruction_params[1]}{arr_sizes};"
+		# If the variable type doesn't exist
+		if node.type is not None and node.type not in self.var_types:
+			self.error(self.translate_method("compilers", "cpp", "errors", "unrecognized_var_type").format(
+				line_number=self.get_line_label(line_number), type=node.type
+			), "unrecognized_var_type", node.type)
 
 		# If the statement does not have all its parameters set
-		except IndexError:
+		elif node.name is None:
 			self.error(self.translate_method("compilers", "cpp", "errors", "arr_missing_params").format(
-				line_number=(line_number + 1)
-			))
+				line_number=self.get_line_label(line_number)
+			), "arr_missing_params")
 
-		# If the variable type doesn't exist
-		except KeyError:
-			self.error(self.translate_method("compilers", "cpp", "errors", "unrecognized_var_type").format(
-				line_number=(line_number + 1), type=instruction_params[0]
-			))
+		else:
+			# We construct the array size
+			arr_sizes = "".join(f"[{self.render_expression(size)}]" for size in node.sizes)
 
+			# Building the final line
+			self.instructions_list[line_number] = f"{self.get_type_name(node.type)} {node.name}{arr_sizes};"
 
-	def analyze_init(self, instruction_name:str, instruction_params:list, line_number:int):
-		""" Analyzes the structure initialization. """
 
-		if len(instruction_params) < 2:  # Error for missing parameters
+	def emit_init(self, node: StructInitialization, line_number: int):
+		""" Analyzes the structure initialization. """
+		param_amount = 2 * len(node.values) + (node.struct is not None) + (node.name is not None) + \
+		               (node.field_without_value is not None)
+		if node.name is None:  # Error for missing parameters
 			self.error(self.translate_method("compilers", "cpp", "errors", "struct_missing_args").format(
-				line_number=(line_number + 1), param_amount=len(instruction_params)
-			))
-		elif len(instruction_params) % 2 == 1:  # Error for missing parameters
+				line_number=self.get_line_label(line_number), param_amount=param_amount
+			), "struct_missing_args")
+		elif node.field_without_value is not None:  # Error for missing parameters
 			self.error(self.translate_method("compilers", "cpp", "errors", "struct_args_not_even").format(
-				line_number=(line_number + 1), param_amount=len(instruction_params)
-			))
+				line_number=self.get_line_label(line_number), param_amount=param_amount
+			), "struct_args_not_even")
 		else:
-			# Creates the structure initialization
-			self.instructions_list[line_number] = f"struct {instruction_params[0]} {instruction_params[1]};"
-
-			# Then for each extra couple of arguments, adds a initialization to this line
-			for i in range(2, len(instruction_params), 2):
-				self.instructions_list[line_number] += "\n" + self.tab_char * (len(self.instructions_stack) + 1)
-				self.instructions_list[line_number] += f"{instruction_params[1]}.{instruction_params[i]} = {instruction_params[i + 1]};"
-			self.instructions_list[line_number] = self.instructions_list[line_number][:-1]
+			# Creates the structure initialization, then for each field, adds a initialization to this line
+			self.instructions_list[line_number] = ("\n" + self.tab_char * (len(self.instructions_stack) + 1)).join((
+				f"struct {node.struct} {node.name};",
+				*(f"{node.name}.{field} = {self.render_expression(value)};" for field, value in node.values)
+			))[:-1]
 
 
-	def analyze_delete(self, instruction_name:str, instruction_params:list, line_number:int):
+	def emit_delete(self, node: Deletion, line_number: int):
 		""" Analyzes the delete keyword. """
-		if self.app.use_ptrs_and_malloc:
-			if len(instruction_params) != 0:
-				if instruction_params[0] == "arr":
-					if len(instruction_params) == 2:
-						self.instructions_list[line_number] = f"delete[] {instruction_params[1]}"
-					else:
-						self.error(f"Error on line {line_number + 1} : Missing parameter 'var_name'.")
-				else:
-					self.instructions_list[line_number] = f"delete {instruction_params[0]}"
+		if self.use_ptrs_and_malloc:
+			if node.name is None:
+				self.error(f"Error on line {self.get_line_label(line_number)} : Missing parameter 'var_name'.", "missing_var_name")
+			elif node.is_array:
+				self.instructions_list[line_number] = f"delete[] {node.name}"
 			else:
-				self.error(f"Error on line {line_number+1} : Missing parameter 'var_name'.")
+				self.instructions_list[line_number] = f"delete {node.name}"
 		else:
-			self.error(f"Error on line {line_number + 1} : Unknown keyword 'delete'. "
-			           "Maybe you forgot to enable the use of pointers and malloc ?")
+			self.error(f"Error on line {self.get_line_label(line_number)} : Unknown keyword 'delete'. "
+			           "Maybe you forgot to enable the use of pointers and malloc ?", "pointers_disabled")
 
 
-	def analyze_fx(self, instruction_name:str, instruction_params:list, line_number:int):
+	def emit_fx(self, node: FunctionDeclaration, line_number: int):
 		""" Creates a function definition """
-		# Prevents a crash when extra spaces are at the end of the line
-		while instruction_params[-1] == "": instruction_params.pop()
-
-		# Function to handle the parameters, whether they are arrays or standard variables
-		def handle_params(instruction_params):
-			# The list of parameters
-			params = []
-
-			# Fetches each parameter (going two by two, because each param goes <type> <name>)
-			for i in range(2, len(instruction_params), 2):
-				# Adds the parameter to the list of parameters
-				params.append("")
-
-				if self.app.use_ptrs_and_malloc and instruction_params[i][-1] == '*':
-					is_pointer = '*'
-					instruction_params[i] = instruction_params[i][:-1]
-				else:
-					is_pointer = ''
-
-				if instruction_params[i].startswith('const_'):
-					is_const = "const "
-					instruction_params[i] = instruction_params[i][6:]
-				else:
-					is_const = ""
-
-				# Try block in case there is an IndexError
-				try:
-					# If the param is an array, we parse it correctly
-					if instruction_params[i].startswith("arr"):
-						current_array_param = instruction_params[i].split("_")
-						params[-1] += f"{is_const}{self.var_types[current_array_param[1]]}{is_pointer} {instruction_params[i + 1]}[{']['.join(current_array_param[2:])}]"
-
-					# If the param is a structure, we parse it correctly
-					elif instruction_params[i].startswith("struct_"):
-						params[-1] += is_const + "struct " * self.use_struct_keyword + f"{instruction_params[i][7:]}{is_pointer} {instruction_params[i + 1]}"
-
-					# If the param is NOT an array
-					else:
-						# We add it to the params as the type, followed by the name, of whose we remove the
-						# first char if it is '&' (no datar mode in algorithmic)
-						params[-1] += is_const + self.var_types[instruction_params[i]] + is_pointer + " " + instruction_params[i + 1][instruction_params[i][0] == '&':]
-
-				# If an IndexError is encountered, we remove the last param from the params list and continue
-				except IndexError:
-					params.pop()
-
-			# We merge back the params and return them
-			params = ", ".join(params)
-			return params
-
-		# Getting the parameters string
-		params = handle_params(instruction_params)
+		# The parameters, the ones without a name being left out
+		params = ", ".join(filter(None, map(self.get_field_declaration, node.parameters)))
 
 		# Branching on whether it is a procedure or a function
-		if instruction_params[0] != "void":
+		if node.return_type.text != "void":
 			self.instructions_stack.append("fx")
-
-			if self.app.use_ptrs_and_malloc and instruction_params[0][-1] == '*':
-				is_pointer = '*'
-				instruction_params[0] = instruction_params[0][:-1]
-			else:
-				is_pointer = ''
-
-			# If the return type is not a structure
-			if not instruction_params[0].startswith("struct_"):
-				# We add the return type
-				self.instructions_list[line_number] = self.var_types[instruction_params[0]]
-
-			# If the return type is a structure
-			else:
-				# We add the structure message followed by the return type
-				self.instructions_list[line_number] = "struct " * self.use_struct_keyword + instruction_params[0][7:]
-
-			# Check pointers
-			self.instructions_list[line_number] += is_pointer
-
 			# We write the line as a function
-			self.instructions_list[line_number] += f" {instruction_params[1]}({params}) " + "{"
+			self.instructions_list[line_number] = self.get_return_type(node.return_type) + f" {node.name}({params}) " + "{"
 
 		else:  # Procedure
 			self.instructions_stack.append("proc")
 			# We write the line as a procedure
-			self.instructions_list[line_number] = f"void {instruction_params[1]}({params}) " + "{"
+			self.instructions_list[line_number] = f"void {node.name}({params}) " + "{"
 
 		# If the name of the function/procedure is 'main', we error out
-		if instruction_params[1] == "main":
-			self.error(f"Error on line {line_number + 1} : Cannot name function/procedure 'main'.")
-
+		if node.name == "main":
+			self.error(f"Error on line {self.get_line_label(line_number)} : Cannot name function/procedure 'main'.", "main_function_name", "main")
 
 
-	def analyze_struct(self, instruction_name:str, instruction_params:list, line_number:int):
+	def emit_struct(self, node: StructDeclaration, line_number: int):
 		""" Creates a structure definition """
-		# Prevents a crash when extra spaces are at the end of the line
-		while instruction_params[-1] == "": instruction_params.pop()
-
-		# Function to handle the parameters, whether they are arrays or standard variables
-		def handle_params(instruction_params):
-			# The list of parameters
-			params = []
-
-			# Fetches each parameter (going two by two, because each param goes <type> <name>)
-			for i in range(1, len(instruction_params), 2):
-				# Adds the parameter to the list of parameters
-				params.append("")
-
-				# Try block in case there is an IndexError
-				try:
-					# If the param is an array, we parse it correctly
-					if instruction_params[i].startswith("arr"):
-						current_array_param = instruction_params[i].split("_")
-						try:
-							vtype = self.var_types[instruction_params[i].split('_')[1]]
-						except KeyError:
-							vtype = instruction_params[i].split('_')[1]
-						params[-1] += f"{vtype} {current_array_param[2]}[{']['.join(current_array_param[2:])}]"
-
-					# If the param is a structure, we parse it correctly
-					elif instruction_params[i].startswith("struct_"):
-						params[-1] += "struct " * self.use_struct_keyword + f"{instruction_params[i][7:]} {instruction_params[i + 1]}"
-
-					# If the param is NOT an array
-					else:
-						# We add it to the params as the type, followed by the name, of whose we remove the
-						# first char if it is '&' (no datar mode in algorithmic)
-						params[-1] += self.var_types[instruction_params[i]] + " " + instruction_params[i + 1][instruction_params[i][0] == '&':]
-
-				# If an IndexError is encountered, we remove the last param from the params list and continue
-				except IndexError:
-					params.pop()
-
-			# We return back the parameters
-			return params
-
-		# Getting the parameters string
-		params = handle_params(instruction_params)
+		# The fields, the ones without a name being left out
+		fields = [declaration for declaration in map(self.get_field_declaration, node.fields) if declaration is not None]
 
-		# Branching on whether it is a procedure or a function
 		# We write the line as a structure
-		self.constants.append("")
-		self.constants[-1] += f"struct {instruction_params[0]}" + " {\n"
-		for param in params:
-			self.constants[-1] += self.tab_char * (len(self.instructions_stack) + 1) + param + ";\n"
-		self.constants[-1] += self.tab_char * len(self.instructions_stack) + "};"
+		self.constants.append("".join((
+			f"struct {node.name}" + " {\n",
+			*(self.tab_char * (len(self.instructions_stack) + 1) + field + ";\n" for field in fields),
+			self.tab_char * len(self.instructions_stack) + "};"
+		)))
+		self.constants_lines.append(line_number)
 		self.instructions_list[line_number] = ""
 
 
-	def analyze_CODE_RETOUR(self, instruction_name:str, instruction_params:list, line_number:int):
+	def emit_CODE_RETOUR(self, node: Instruction, line_number: int):
 		""" Changes the return code at the end of the function. """
 		self.instructions_list[line_number] = ""
-		self.return_code = " ".join(instruction_params)
+		self.return_code = node.expression.text
 
 
 	def final_trim(self, instruction_name:str, line_number:int):
-		""" Adds the line ends, transforms the function names, and adds the correct indentation """
-		# Adds the end of line
-		self.instructions_list[line_number] = self.instructions_list[line_number].replace("(ENDL)", "\\n")
-
-		# Adds the power, sqrt, and rand functions
-		for algo_function, cpp_function in (
-				("puissance(", "pow("),
-				("racine(", "sqrt("),
-				("aleatoire(", "rand("),
-				("alea(", "rand("),
-				("NULL", "nullptr")
-		):
-			self.instructions_list[line_number] = self.instructions_list[line_number].replace(algo_function, cpp_function)
-
-		# Function to find all the instances of a substring in a string
-		def find_all(full_string: str, search: str):
-			"""
-			Finds all instances of a substring in a string.
-			:param full_string: The string to search into.
-			:param search: The string of whom to find all the instances.
-			:return: A generator containing all the indexes of the substring.
-			"""
-			start = 0
-			while True:
-				start = full_string.find(search, start)
-				if start == -1: return
-				yield start
-				start += len(search)
-
-		# Adds the len function
-		if "len(" in self.instructions_list[line_number]:
-			for index in find_all(self.instructions_list[line_number], "len("):
-				var_name = self.instructions_list[line_number][
-		           index + 4 :
-		           index + 4 + self.instructions_list[line_number][index + 4:].find(")")
-		        ]
-				self.instructions_list[line_number] = self.instructions_list[line_number].replace(
-					f"len({var_name})",
-					f"(sizeof({var_name})/sizeof({var_name}[0]))",
-					1
-				)
+		""" Adds the semicolons and the correct indentation """
+		# The state of the compilation, read once as it belongs to the context of the thread
+		instructions_stack = self.instructions_stack
 
+		line = self.instructions_list[line_number]
 
 		# Adds the correct tabbing (amount of tabs is equal to amount of instructions in the instructions stack,
 		# minus one if the current instruction is in the instruction names)
-		tab_amount = len(self.instructions_stack)
-		if instruction_name in (*self.instruction_names, "else", "elif"):
+		tab_amount = len(instructions_stack)
+		is_dedented = instruction_name in self.dedented_instructions
+		if is_dedented:
 			tab_amount -= 1
 
 		# Adds a semicolon if necessary
-		if not (
-				self.instructions_list[line_number].startswith("//") or
-				self.instructions_list[line_number].endswith("}") or
-				instruction_name in (*self.instruction_names, "else", "elif")
-		):
-			self.instructions_list[line_number] += ";"
+		if not (line.startswith("//") or line.endswith("}") or is_dedented):
+			line += ";"
 
 		# Writes the line
-		self.instructions_list[line_number] = self.app.tab_char * tab_amount + self.instructions_list[line_number]
-
-		# Removes the std:: if we use the std namespace
-		if self.app.using_namespace_std:
-			self.instructions_list[line_number] = self.instructions_list[line_number].replace("std::", "")
+		line = self.tab_char * tab_amount + line
 
 		# Adds it to fxtext if necessary
-		if len(self.instructions_stack) != 0 and (
-			"fx" in self.instructions_stack or
-			"proc" in self.instructions_stack or
-			(instruction_name == "end" and self.instructions_stack[-1] in ("fx", "proc"))
+		if len(instructions_stack) != 0 and (
+			"fx" in instructions_stack or
+			"proc" in instructions_stack or
+			(instruction_name == "end" and instructions_stack[-1] in ("fx", "proc"))
 		):
-			self.fxtext.append(self.instructions_list[line_number])
-			if instruction_name == "end":
-				self.fxtext[-1] += "\n"
-			self.instructions_list[line_number] = ""
+			self.fxtext.append(line + "\n" if instruction_name == "end" else line)
+			self.fxtext_lines.append(line_number)
+			line = ""
+		self.instructions_list[line_number] = line
 
 
 	def final_touches(self):
 		""" Concatenates everything into one string """
-		# Initializes the final compiled code
-		final_compiled_code = "#include <iostream>\n"
+		return "".join(self.iter_final_touches())
 
-		# We import math.h if we use power or sqrt in the code
-		if "puissance(" in self.app.current_text or "racine(" in self.app.current_text:
-			final_compiled_code += "#include <math.h>\n"
 
-		# If we use random in the code, we import stdlib.h and time.h
-		if 'aleatoire(' in self.app.current_text or 'alea(' in self.app.current_text:
-			final_compiled_code += "#include <stdlib.h>\n#include <time.h>\n"
+	def iter_source_chunks(self):
+		""" Yields the compiled code part by part, the main function line by line, along with their source line """
+		yield -1, "#include <iostream>\n"
 
-		# If we use len in the code, we import stdlib.h
-		if 'len(' in self.app.current_text:
-			final_compiled_code += "#include <stdlib.h>\n"
+		# We import the headers of the features used in the compiled code (math.h for power or sqrt, stdlib.h and
+		# time.h for random, stdlib.h for len)
+		used_features = set(self.used_features)
+		for feature, includes in self.feature_includes.items():
+			if feature in used_features:
+				yield -1, includes
 
 		# If we use the std namespace, we put it there
-		if self.app.using_namespace_std:
-			final_compiled_code += "using namespace std;\n"
+		if self.using_namespace_std:
+			yield -1, "using namespace std;\n"
 
 		# We add a simple blank line
-		final_compiled_code += "\n"
+		yield -1, "\n"
 
-		# We add the constants text to the final_compiled_code
-		final_compiled_code += "\n".join(self.constants)
+		# We add the constants text to the final_compiled_code, one per line
+		separator = ""
+		for constant, line_number in zip(self.constants, self.constants_lines):
+			yield line_number, separator + constant
+			separator = "\n"
 		# We also add another newline if there are constants declared
 		if len(self.constants) != 0:
-			final_compiled_code += "\n\n"
+			yield -1, "\n\n"
 
 		# We then add the function's text
-		final_compiled_code += "\n".join(text for text in self.fxtext if text.replace(self.tab_char, "") != ";")
+		separator = ""
+		for text, line_number in zip(self.fxtext, self.fxtext_lines):
+			if text.replace(self.tab_char, "") != ";":
+				yield line_number, separator + text
+				separator = "\n"
 
 		# We start to add the main function
-		final_compiled_code += "\n\nint main() {\n"
+		yield -1, "\n\nint main() {\n"
 
 		# We add the srand(time(NULL)) statement if we are using random
-		if "aleatoire(" in self.app.current_text or "alea(" in self.app.current_text:
-			final_compiled_code += self.tab_char + "srand(time(NULL));\n"
+		if "random" in used_features:
+			yield -1, self.tab_char + "srand(time(NULL));\n"
 
 		# We then add each instruction along with a tab
-		for instruction in self.instructions_list:
+		for line_number, instruction in enumerate(self.instructions_list):
 			if instruction.replace(self.tab_char, "") != ";" and instruction != "":
-				final_compiled_code += self.tab_char + instruction + "\n"
+				yield line_number, self.tab_char + instruction + "\n"
 
 		# We complete the compilation
-		final_compiled_code += self.tab_char + f"return {self.return_code};\n" + "}"
-
-		return final_compiled_code
+		yield -1, self.tab_char + f"return {self.return_code};\n" + "}"
@@ -17,3 +17,177 @@ OptionType = namedtuple("OptionType", [
 	"current_state",
 	"callback_trigger"
 ])
+
+# The type used to define a symbol declared in the code
+SymbolType = namedtuple("SymbolType", [
+	"name",
+	"kind",
+	"type"
+])
+
+# The type used to define a problem found in the code
+# The message is set when the problem was already described by its finder (e.g. a compiler), otherwise the code and
+# arguments are used to translate it
+Diagnostic = namedtuple("Diagnostic", [
+	"line",
+	"column",
+	"code",
+	"arguments",
+	"message"
+], defaults=(None,))
+
+# The type used to define a parsed line of code, along with its node (see the types below), None if it has none
+Statement = namedtuple("Statement", [
+	"line_number",
+	"keyword",
+	"params",
+	"kind",
+	"node"
+], defaults=(None,))
+
+# The type used to define a lexed part of an expression, whose kind is 'string', 'char', 'number', 'name', 'operator',
+# 'punctuation' or 'space'
+Token = namedtuple("Token", [
+	"kind",
+	"text"
+])
+
+# The type used to define an expression, as written and as tokens
+Expression = namedtuple("Expression", [
+	"text",
+	"tokens"
+])
+
+# The type used to define a type written in the code (e.g. 'int*', 'const_arr_int_5' or 'struct_Flower'), whose kind
+# is 'basic', 'array' or 'struct', and whose base is the basic type, the type of the items or the name of the structure
+TypeReference = namedtuple("TypeReference", [
+	"text",
+	"kind",
+	"base",
+	"is_pointer",
+	"is_const",
+	"dimensions"
+])
+
+# The type used to define a parameter of a function or a field of a structure, whose name is None if it is missing
+Field = namedtuple("Field", [
+	"type",
+	"name"
+])
+
+# The type used to define the declaration of variables, with the value of the variable if it is assigned one
+VariableDeclaration = namedtuple("VariableDeclaration", [
+	"type",
+	"names",
+	"value"
+])
+
+# The type used to define the assignment of a variable, whose operator is e.g. '=' or '+='
+Assignment = namedtuple("Assignment", [
+	"target",
+	"operator",
+	"value"
+])
+
+# The type used to define the declaration of an array, whose type and name are None if they are missing
+ArrayDeclaration = namedtuple("ArrayDeclaration", [
+	"type",
+	"name",
+	"sizes"
+])
+
+# The type used to define the declaration of a constant
+ConstantDeclaration = namedtuple("ConstantDeclaration", [
+	"type",
+	"name",
+	"value"
+])
+
+# The type used to define the declaration of a structure
+StructDeclaration = namedtuple("StructDeclaration", [
+	"name",
+	"fields"
+])
+
+# The type used to define the declaration of a function, or of a procedure if its return type is 'void'
+FunctionDeclaration = namedtuple("FunctionDeclaration", [
+	"return_type",
+	"name",
+	"parameters"
+])
+
+# The type used to define the initialization of a structure, with the value of each of its initialized fields
+# The name is None if it is missing, and the field without value is set if the values are not given in pairs
+StructInitialization = namedtuple("StructInitialization", [
+	"struct",
+	"name",
+	"values",
+	"field_without_value"
+])
+
+# The type used to define a 'for' loop, whose step is None if it is not given
+ForLoop = namedtuple("ForLoop", [
+	"variable",
+	"start",
+	"end",
+	"step"
+])
+
+# The type used to define the freeing of a variable, or of an array, whose name is None if it is missing
+Deletion = namedtuple("Deletion", [
+	"name",
+	"is_array"
+])
+
+# The type used to define an instruction taking an expression (e.g. 'print' or 'if'), or a line only made of an
+# expression (e.g. a function call)
+Instruction = namedtuple("Instruction", [
+	"expression"
+])
+
+# The type used to define an instruction taking free text (e.g. 'desc'), not parsed as an expression
+Comment = namedtuple("Comment", [
+	"text"
+])
+
+# The type used to define a top-level part of a program (a function, or a run of main code)
+Unit = namedtuple("Unit", [
+	"kind",
+	"start",
+	"end"
+])
+
+# The type used to define the result of the compilation of a file outside of the interface
+CompilationResult = namedtuple("CompilationResult", [
+	"path",
+	"output_path",
+	"duration",
+	"error",
+	"diagnostics",
+	"cached"
+])
+
+# The type used to define the latest compilation of the live preview
+PreviewResult = namedtuple("PreviewResult", [
+	"compiler_name",
+	"source",
+	"output",
+	"diagnostics"
+])
+
+# The type used to define a target the code can be compiled to
+TargetType = namedtuple("TargetType", [
+	"compiler_name",
+	"extension",
+	"create_compiler",
+	"get_options"
+])
+
+# The type used to define the lines of a program coming from an included file
+ModuleSpan = namedtuple("ModuleSpan", [
+	"name",
+	"path",
+	"start",
+	"end",
+	"include_line"
+])
@@ -0,0 +1,133 @@
+"""
+Formats the code : removes the indentation and the spaces at the end of the lines, puts a single space between the
+words, and keeps at most one empty line in a row. The spaces inside the string and character literals are kept.
+The words are the parameters of the instructions, so only the spaces between them change : the formatted code compiles
+the same way, without the empty words given by the stray spaces.
+python main.py --format src/ [--check] [--config plugins_config.json]
+"""
+import os
+import re
+import sys
+import time
+from typing import List, Tuple
+
+from headless import HeadlessApp, find_source_files, write_atomically
+
+
+# Matches the string and character literals, whose spaces are kept, the runs of spaces, and the text between them.
+# Like split_words, an unclosed string lasts until the end of the line.
+FORMAT_TOKEN_PATTERN = re.compile(r'''"[^"]*"?|'[^'"]?'|[ \t]+|[^ \t"']+|.''')
+
+
+def format_line(line: str) -> str:
+	"""
+	Formats a line in a single pass over its tokens. The lines already formatted are returned as-is, without being
+	tokenized.
+	:param line: The line.
+	:return: The formatted line.
+	"""
+	if "  " not in line and "\t" not in line and line[:1] != " " and line[-1:] != " ":
+		return line
+
+	parts = []
+	for token in FORMAT_TOKEN_PATTERN.findall(line):
+		if token[0] in " \t":
+			if parts and parts[-1] != " ":
+				parts.append(" ")
+		else:
+			parts.append(token)
+	if parts and parts[-1] == " ":
+		parts.pop()
+	return "".join(parts)
+
+
+def format_lines(lines: List[str]) -> Tuple[List[str], List[int]]:
+	"""
+	Formats the lines of the code, removing the empty lines at its start and end, and keeping at most one empty line
+	in a row.
+	:param lines: The lines of the code.
+	:return: The formatted lines, and the index of the formatted line each line became (or precedes, if removed).
+	"""
+	formatted_lines = []
+	line_indexes = []
+	for line in lines:
+		line = format_line(line)
+		line_indexes.append(len(formatted_lines))
+		if line or (formatted_lines and formatted_lines[-1]):
+			formatted_lines.append(line)
+	while formatted_lines and not formatted_lines[-1]:
+		formatted_lines.pop()
+	last_index = max(len(formatted_lines) - 1, 0)
+	return formatted_lines, [min(index, last_index) for index in line_indexes]
+
+
+def format_code(source: str) -> str:
+	"""
+	Formats the code. Formatting it again leaves it unchanged.
+	:param source: The code.
+	:return: The formatted code, ending with a new line if the code did.
+	"""
+	formatted_lines, _ = format_lines(source.split("\n"))
+	if source.endswith("\n") and formatted_lines:
+		formatted_lines.append("")
+	return "\n".join(formatted_lines)
+
+
+def format_file(path: str, check: bool = False) -> bool:
+	"""
+	Formats a file, only writing it if its content changes.
+	:param path: The path of the file.
+	:param check: Whether to only check if the file is formatted, without writing it.
+	:return: Whether the file was not formatted.
+	:exception OSError: If the file cannot be read or written.
+	:exception UnicodeDecodeError: If the file is not encoded in UTF-8.
+	"""
+	with open(path, "r", encoding="utf-8") as f:
+		source = f.read()
+	formatted_source = format_code(source)
+	if formatted_source == source:
+		return False
+	if not check:
+		write_atomically(path, (formatted_source,))
+	return True
+
+
+def run_formatting(argv: List[str]) -> int:
+	"""
+	Formats a file, or the .algo files of a directory, from the command line arguments, and reports the formatted
+	files.
+	:param argv: The command line arguments, containing --format followed by the path of the file or directory, and
+		optionally --check (to only report the files which are not formatted) and --config.
+	:return: The exit code : 0 if every file could be formatted (or was formatted, with --check), 1 otherwise.
+	"""
+	def get_argument(name: str, default):
+		return argv[argv.index(name) + 1] if name in argv else default
+
+	path = get_argument("--format", ".")
+	check = "--check" in argv
+	config_path = get_argument("--config", os.path.join(os.path.dirname(os.path.abspath(__file__)), "plugins_config.json"))
+
+	translate = HeadlessApp.from_config(config_path).get_translation
+	paths = find_source_files(path) if os.path.isdir(path) else [path]
+	if not paths:
+		print(translate("batch", "no_files", directory=path), file=sys.stderr)
+		return 1
+
+	start = time.perf_counter()
+	changed_count = 0
+	failed = False
+	for file_path in paths:
+		try:
+			changed = format_file(file_path, check)
+		except (OSError, UnicodeDecodeError) as e:
+			print(translate("format", "failed", path=file_path, error=e), file=sys.stderr)
+			failed = True
+			continue
+		if changed:
+			changed_count += 1
+			print(translate("format", "unformatted" if check else "formatted", path=file_path))
+	print(translate(
+		"format", "check_summary" if check else "summary", changed=changed_count, total=len(paths),
+		duration=(time.perf_counter() - start) * 1000
+	))
+	return 1 if failed or (check and changed_count) else 0
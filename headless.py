@@ -0,0 +1,612 @@
+"""
+Lets the compilers run without the curses interface, e.g. from scripts, benchmarks, or the batch compiler :
+python main.py --compile-dir src/ --target cpp[,algo] --jobs 4 [--output-dir build/] [--config plugins_config.json]
+python main.py --compile-file program.algo --target cpp [--config plugins_config.json] > program.cpp
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from algorithmic_compiler import AlgorithmicCompiler
+from caching import DiskCache
+from compiler import Compiler
+from cpp_compiler import CppCompiler
+from custom_types import CompilationResult, TargetType
+from modules import ModuleLinker
+from parsing import Program
+
+
+# The directory containing the translation files
+TRANSLATIONS_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "translations")
+
+# The directory the compiled code is cached in, between runs
+COMPILE_CACHE_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".compile_cache")
+
+# The targets the code can be compiled to, by name (see register_target)
+TARGETS: Dict[str, TargetType] = {}
+
+# The settings of the app read from the BASE_CONFIG of the plugins config, with their default value
+CONFIG_SETTINGS = {
+	"language": "en",
+	"tab_char": "\t",
+	"use_ptrs_and_malloc": False,
+	"using_namespace_std": False,
+	"use_struct_keyword": False,
+	"compile_cache_size_mb": 64,
+	"compile_jobs": os.cpu_count() or 1
+}
+
+# The settings of the app the compilers read, given to the compilers of the worker processes
+WORKER_SETTINGS = ("language", "tab_char", "use_ptrs_and_malloc", "using_namespace_std", "use_struct_keyword")
+
+
+def load_translations(directory: str = TRANSLATIONS_DIRECTORY) -> Dict[str, dict]:
+	"""
+	Loads all the translation files of the given directory.
+	:param directory: The directory of the translation files.
+	:return: A dictionary of the translations, by language code (e.g. 'en').
+	"""
+	translations = {}
+	for translation_file in os.listdir(directory):
+		with open(os.path.join(directory, translation_file), "r", encoding="utf8") as f:
+			# e.g. translation_file = 'translations_en.json', translations['en'] = {...}
+			translations[translation_file[13:15]] = json.load(f)
+	return translations
+
+
+def create_compile_cache(size_mb: float, directory: str = COMPILE_CACHE_DIRECTORY) -> Optional[DiskCache]:
+	"""
+	Creates the cache of the compiled code shared by the compilers, the editor and the batch compiler.
+	:param size_mb: The maximum size of the cache, in megabytes. If 0, the cache is disabled.
+	:param directory: The directory the compiled code is cached in.
+	:return: The cache, or None if it is disabled.
+	"""
+	if size_mb <= 0:
+		return None
+	return DiskCache(directory, int(size_mb * 1024 * 1024))
+
+
+def _create_algorithmic_compiler(app, stdscr=None) -> Compiler:
+	"""
+	Creates the compiler to algorithmic code.
+	:param app: The app (or headless app) the compiler reads its settings from.
+	:param stdscr: The standard screen, or None if there is no interface.
+	"""
+	return AlgorithmicCompiler(
+		{
+			"for": "Pour",
+			"if": "Si",
+			"while": "Tant Que",
+			"switch": "Selon",
+			"arr": "Tableau",
+			"tab": "Tableau",
+			"case": "Cas",
+			"default": "Autrement",
+			"fx": "Fonction",
+			"proc": "Procédure",
+			"const": "Constante"
+		},
+		{
+			"int": "Entier",
+			"float": "Réel",
+			"string": "Chaîne de caractères",
+			"bool": "Booléen",
+			"char": "Caractère"
+		},
+		["print", "input", "end", "elif", "else", "fx_start", "vars", "precond", "data", "datar", "result",
+		 "return", "desc", "CODE_RETOUR", "init", "struct", "const", "delete", "include"],
+		stdscr,
+		app.translations,
+		app.get_translation,
+		app,
+		app.tab_char
+	)
+
+
+def _get_algorithmic_options(compiler: Compiler, app) -> Dict[str, Any]:
+	""" The tab char of the app and the use of pointers. """
+	return {"tab_char": app.tab_char, "use_ptrs_and_malloc": app.use_ptrs_and_malloc}
+
+
+def _create_cpp_compiler(app, stdscr=None) -> Compiler:
+	"""
+	Creates the compiler to C++ code.
+	:param app: The app (or headless app) the compiler reads its settings from.
+	:param stdscr: The standard screen, or None if there is no interface.
+	"""
+	return CppCompiler(
+		('for', 'if', 'while', 'switch', 'arr', 'tab', 'case', 'default', 'fx', 'proc', 'struct'),
+		{
+			"int": "int",
+			"float": "float",
+			"string": "std::string",
+			"bool": "bool",
+			"char": "char"
+		},
+		["print", "input", "end", "elif", "else", "fx_start", "vars", "precond", "data", "datar", "result",
+		 "return", "desc", "CODE_RETOUR", "init", "const", "delete", "include"],
+		stdscr,
+		app
+	)
+
+
+def _get_cpp_options(compiler: Compiler, app) -> Dict[str, Any]:
+	""" The tab char, the use of the std namespace and of std:: in std::string, of the struct keyword and of pointers. """
+	return {
+		"tab_char": app.tab_char,
+		"var_types": {**compiler.var_types, "string": ("std::" if app.using_namespace_std is False else "") + "string"},
+		"using_namespace_std": app.using_namespace_std,
+		"use_struct_keyword": app.use_struct_keyword,
+		"use_ptrs_and_malloc": app.use_ptrs_and_malloc
+	}
+
+
+def register_target(name: str, compiler_name: str, extension: str, create_compiler: Callable[..., Compiler],
+                    get_options: Optional[Callable[[Compiler, object], Dict[str, Any]]] = None) -> None:
+	"""
+	Adds a target the code can be compiled to, or replaces an existing one. The apps created afterwards create its
+	compiler along with the others.
+	:param name: The name of the target, used by the batch compiler (e.g. 'cpp').
+	:param compiler_name: The name of its compiler in the compilers of the app (e.g. 'C++').
+	:param extension: The extension of the compiled files (e.g. '.cpp').
+	:param create_compiler: A function creating the compiler, given the app and the standard screen (None if there is
+		no interface).
+	:param get_options: A function returning the settings of the app the compiler is given as options on each
+		compilation (see Compiler.compile), given the compiler and the app. None if the compiler reads its settings by
+		itself.
+	"""
+	TARGETS[name] = TargetType(compiler_name, extension, create_compiler, get_options)
+
+
+register_target("algo", "algorithmic", ".txt", _create_algorithmic_compiler, _get_algorithmic_options)
+register_target("cpp", "C++", ".cpp", _create_cpp_compiler, _get_cpp_options)
+
+
+def create_compilers(app, stdscr=None) -> Dict[str, Compiler]:
+	"""
+	Creates the compiler of each registered target.
+	:param app: The app (or headless app) the compilers read their settings from.
+	:param stdscr: The standard screen the compilers show their errors on, or None if there is no interface.
+	:return: A dictionary of the compilers, by name.
+	"""
+	return {target.compiler_name: target.create_compiler(app, stdscr) for target in TARGETS.values()}
+
+
+def prepare_compiler(app, compiler_name: str) -> Tuple[Compiler, Dict[str, Any]]:
+	"""
+	Returns the compiler along with the settings of the app it compiles with, as the options of its next compilation.
+	The settings are not applied to the compiler itself, so it can compile on several threads with different settings.
+	:param app: The app (or headless app) holding the compiler.
+	:param compiler_name: The name of the compiler, e.g. 'algorithmic' or 'C++'.
+	"""
+	compiler = app.compilers[compiler_name]
+	options = {}
+	for target in TARGETS.values():
+		if target.compiler_name == compiler_name and target.get_options is not None:
+			options.update(target.get_options(compiler, app))
+
+	# Lets the compiler compile the functions of large programs across several processes
+	compiler.worker_factory = get_worker_factory(app, compiler_name)
+	compiler.parallel_jobs = app.compile_jobs
+	return compiler, options
+
+
+def compile_targets(app, program: Program, compiler_names: List[str]) -> Dict[str, Optional[str]]:
+	"""
+	Compiles a program, parsed once, with several compilers.
+	The compilers run one after the other : their output is put together in Python code holding the interpreter lock,
+	so running them on threads would not be faster. The functions of large programs are still compiled in parallel.
+	:param app: The app (or headless app) holding the compilers.
+	:param program: The parsed program.
+	:param compiler_names: The names of the compilers.
+	:return: The compiled code of each compiler, or None if it found errors (in its diagnostics attribute), by name.
+	"""
+	compiled_codes = {}
+	for compiler_name in compiler_names:
+		compiler, options = prepare_compiler(app, compiler_name)
+		compiled_codes[compiler_name] = compiler.compile(program, options)
+	return compiled_codes
+
+
+def create_worker_compiler(compiler_name: str, settings: Tuple[tuple, ...]) -> Compiler:
+	"""
+	Creates a compiler in a worker process, with the same settings as the app of the main process. The options of
+	the compilation are given along with the units to compile.
+	:param compiler_name: The name of the compiler, 'algorithmic' or 'C++'.
+	:param settings: The value of each of the WORKER_SETTINGS of the app, as (name, value) pairs.
+	"""
+	app = HeadlessApp(**dict(settings), compile_cache_size_mb=0)
+	return app.compilers[compiler_name]
+
+
+def get_worker_factory(app, compiler_name: str) -> Callable[[], Compiler]:
+	"""
+	Returns a picklable function creating the compiler with the current settings of the app in a worker process,
+	so the units of large programs can be compiled in parallel.
+	:param app: The app (or headless app) the compilers read their settings from.
+	:param compiler_name: The name of the compiler, 'algorithmic' or 'C++'.
+	"""
+	return partial(create_worker_compiler, compiler_name, tuple((name, getattr(app, name)) for name in WORKER_SETTINGS))
+
+
+class HeadlessApp:
+	def __init__(self, language: str = "en", tab_char: str = "\t", use_ptrs_and_malloc: bool = False,
+	             using_namespace_std: bool = False, use_struct_keyword: bool = False, compile_cache_size_mb: float = 64,
+	             compile_jobs: int = 1):
+		"""
+		Holds the settings the compilers read from the app, without any interface.
+		:param language: The language of the error messages.
+		:param tab_char: The string used to indent the compiled code.
+		:param use_ptrs_and_malloc: Whether the pointers and the 'new' and 'delete' keywords are enabled.
+		:param using_namespace_std: Whether the C++ code uses the std namespace.
+		:param use_struct_keyword: Whether the C++ code uses the struct keyword in types.
+		:param compile_cache_size_mb: The maximum size of the cache of the compiled code, in megabytes. If 0, the
+			compiled code is not cached.
+		:param compile_jobs: The amount of processes compiling the functions of large programs in parallel. If 1, the
+			programs are only compiled in this process.
+		"""
+		self.translations = load_translations()
+		self.language = language
+		self.tab_char = tab_char
+		self.use_ptrs_and_malloc = use_ptrs_and_malloc
+		self.using_namespace_std = using_namespace_std
+		self.use_struct_keyword = use_struct_keyword
+		self.compile_jobs = compile_jobs
+		self.current_text = ""  # The code being compiled
+		self.compilers = create_compilers(self)
+		self.module_linker = ModuleLinker()  # Resolves the files included by the code
+
+		# Caches the compiled code of the programs, so unchanged files are not compiled again
+		self.compile_cache = create_compile_cache(compile_cache_size_mb)
+		for compiler in self.compilers.values():
+			compiler.output_cache = self.compile_cache
+
+
+	@classmethod
+	def from_config(cls, config_path: str) -> "HeadlessApp":
+		"""
+		Creates a headless app with the settings of the editor, read from the plugins config.
+		:param config_path: The path to the plugins config. If it does not exist, the default settings are used.
+		"""
+		base_config = {}
+		if os.path.exists(config_path):
+			with open(config_path, "r", encoding="utf-8") as f:
+				base_config = json.load(f).get("BASE_CONFIG", {})
+		return cls(**{key: base_config.get(key, default) for key, default in CONFIG_SETTINGS.items()})
+
+
+	def get_translation(self, *keys: str, language: str = None, **format_keys) -> str:
+		"""
+		Returns the translation of the given string, falling back to english.
+		:param keys: Every key, in order, towards the translation.
+		:param language: The language in which to translate in. If None (by default), the value of self.language is used.
+		:param format_keys: Parameters that would be used in the str.format() method.
+		:return: The translation.
+		"""
+		try:
+			string = self.translations[self.language if language is None else language]
+			for key in keys:
+				string = string[key]
+		except KeyError:
+			if language != "en":
+				string = self.get_translation(*keys, language="en")
+			else:
+				raise KeyError(f"Translation for {keys} not found !")
+		return string.format(**format_keys) if format_keys else string
+
+
+	def compile(self, code: str, compiler_name: str = "algorithmic", path: str = None):
+		"""
+		Compiles the code with the given compiler, applying the settings the editor applies before compiling.
+		:param code: The code to compile.
+		:param compiler_name: The name of the compiler, 'algorithmic' or 'C++'.
+		:param path: The path of the file of the code, the files it includes being relative to its directory ; None
+			for the current directory.
+		:return: The compiled code, or None if errors were found, in which case they are in the diagnostics attribute
+			of the compiler.
+		"""
+		compiler, options = self._prepare_compiler(code, compiler_name)
+		return compiler.compile(self.parse(code, [compiler_name], path), options)
+
+
+	def compile_iter(self, code: str, compiler_name: str = "algorithmic", path: str = None) -> Optional[Iterator[str]]:
+		"""
+		Compiles the code with the given compiler, returning the compiled code in chunks (see Compiler.compile_iter).
+		:param code: The code to compile.
+		:param compiler_name: The name of the compiler, 'algorithmic' or 'C++'.
+		:param path: The path of the file of the code, the files it includes being relative to its directory.
+		:return: An iterator of the chunks of the compiled code, or None if errors were found, in which case they are
+			in the diagnostics attribute of the compiler.
+		"""
+		compiler, options = self._prepare_compiler(code, compiler_name)
+		return compiler.compile_iter(self.parse(code, [compiler_name], path), options)
+
+
+	def _prepare_compiler(self, code: str, compiler_name: str) -> Tuple[Compiler, Dict[str, Any]]:
+		"""
+		Returns the compiler, along with the options the editor compiles with (see prepare_compiler).
+		:param code: The code about to be compiled.
+		:param compiler_name: The name of the compiler, 'algorithmic' or 'C++'.
+		"""
+		self.current_text = code
+		return prepare_compiler(self, compiler_name)
+
+
+	def parse(self, code: str, compiler_names: List[str], path: str = None) -> Program:
+		"""
+		Parses the code once for several compilers, along with the files it includes.
+		:param code: The code to parse.
+		:param compiler_names: The names of the compilers the program will be compiled with.
+		:param path: The path of the file of the code, the files it includes being relative to its directory.
+		"""
+		return self.module_linker.link(
+			code, path, frozenset().union(*(self.compilers[name].var_types.keys() for name in compiler_names))
+		)
+
+
+	def compile_targets(self, code: str, compiler_names: List[str] = None, path: str = None) -> Dict[str, Optional[str]]:
+		"""
+		Compiles the code with several compilers, only parsing it once.
+		:param code: The code to compile.
+		:param compiler_names: The names of the compilers. If None, every compiler is used.
+		:param path: The path of the file of the code, the files it includes being relative to its directory.
+		:return: The compiled code of each compiler, or None if it found errors (in its diagnostics attribute), by name.
+		"""
+		compiler_names = list(self.compilers) if compiler_names is None else compiler_names
+		self.current_text = code
+		return compile_targets(self, self.parse(code, compiler_names, path), compiler_names)
+
+
+	def compile_file(self, path: str, target: str, output_path: str) -> CompilationResult:
+		"""
+		Compiles a file and writes the compiled code to the output file.
+		:param path: The path to the file to compile.
+		:param target: The target of the compilation, a key of TARGETS.
+		:param output_path: The path of the compiled file.
+		:return: The result of the compilation, whose error is None if it succeeded, along with the errors found in
+			the code, and whether the compiled code was found in the cache.
+		"""
+		return self.compile_file_targets(path, [target], [output_path])[0]
+
+
+	def compile_file_targets(self, path: str, targets: List[str], output_paths: List[str]) -> List[CompilationResult]:
+		"""
+		Compiles a file to several targets, reading and parsing it only once, and writes the compiled code of each
+		target to its output file.
+		:param path: The path to the file to compile.
+		:param targets: The targets of the compilation, keys of TARGETS.
+		:param output_paths: The path of the compiled file of each target.
+		:return: The result of the compilation to each target, whose error is None if it succeeded, along with the
+			errors found in the code, and whether the compiled code was found in the cache. The time taken to read and
+			parse the file is counted in the duration of the first target.
+		"""
+		results = []
+		start = time.perf_counter()
+		try:
+			with open(path, "r", encoding="utf-8") as f:
+				code = f.read()
+			self.current_text = code
+			program = self.parse(code, [TARGETS[target].compiler_name for target in targets], path)
+		# Any exception only fails this file, so the other files still get compiled
+		except Exception as e:
+			error = f"{type(e).__name__} : {e}"
+			return [
+				CompilationResult(path, output_path, (time.perf_counter() - start) * 1000, error, tuple(), False)
+				for output_path in output_paths
+			]
+
+		for target, output_path in zip(targets, output_paths):
+			compiler_name = TARGETS[target].compiler_name
+			error = None
+			diagnostics = tuple()
+			compiler, options = prepare_compiler(self, compiler_name)
+			try:
+				compiled_chunks = compiler.compile_iter(program, options)
+				if compiled_chunks is None:
+					diagnostics = tuple(compiler.diagnostics)
+					error = self.get_translation("batch", "errors_count", count=len(diagnostics))
+				else:
+					# Writes the compiled code as it is put together
+					write_atomically(output_path, compiled_chunks)
+			# Any exception only fails this target, so the other targets and files still get compiled
+			except Exception as e:
+				error = f"{type(e).__name__} : {e}"
+			results.append(CompilationResult(
+				path, output_path, (time.perf_counter() - start) * 1000, error, diagnostics, compiler.context.cached
+			))
+			start = time.perf_counter()
+		return results
+
+
+# The headless app of each worker process of the batch compilation
+_worker_app = None
+
+
+def _init_worker(config_path: str) -> None:
+	"""
+	Creates the headless app of a worker process, once for all the files it compiles.
+	:param config_path: The path to the plugins config.
+	"""
+	global _worker_app
+	_worker_app = HeadlessApp.from_config(config_path)
+	# The files are already compiled in parallel
+	_worker_app.compile_jobs = 1
+
+
+def _compile_in_worker(path: str, targets: List[str], output_paths: List[str]) -> List[CompilationResult]:
+	"""
+	Compiles a file to each target with the headless app of the worker process.
+	"""
+	return _worker_app.compile_file_targets(path, targets, output_paths)
+
+
+def find_source_files(directory: str, excluded_directory: str = None) -> List[str]:
+	"""
+	Returns the paths to all the .algo files of the directory and its subdirectories, sorted.
+	:param directory: The directory to search in.
+	:param excluded_directory: A directory not to search in, e.g. the output directory.
+	"""
+	excluded_directory = os.path.abspath(excluded_directory) if excluded_directory is not None else None
+	paths = []
+	for root, directories, files in os.walk(directory):
+		directories[:] = [
+			name for name in directories if os.path.abspath(os.path.join(root, name)) != excluded_directory
+		]
+		paths.extend(os.path.join(root, name) for name in files if name.endswith(".algo"))
+	return sorted(paths)
+
+
+def get_output_paths(path: str, targets: List[str], directory: str, output_directory: str = None) -> List[str]:
+	"""
+	Returns the path of the compiled file of a source file for each target.
+	:param path: The path to the source file.
+	:param targets: The targets of the compilation, keys of TARGETS.
+	:param directory: The directory containing the source files.
+	:param output_directory: The directory the compiled files are written to, keeping the structure of the source
+		directory. If None, each compiled file is written next to its source file.
+	"""
+	output_paths = []
+	for target in targets:
+		output_path = os.path.splitext(path)[0] + TARGETS[target].extension
+		if output_directory is not None:
+			output_path = os.path.join(output_directory, os.path.relpath(output_path, directory))
+		output_paths.append(output_path)
+	return output_paths
+
+
+def write_atomically(path: str, chunks: Iterable[str]) -> None:
+	"""
+	Writes the chunks to a file, through a temporary file replacing it once complete, so the file is never read
+	partially written (e.g. by a build watching it) and is left unchanged if writing fails.
+	:param path: The path of the file. Its directory is created if it does not exist.
+	:param chunks: The chunks of the content of the file.
+	"""
+	directory = os.path.dirname(os.path.abspath(path))
+	os.makedirs(directory, exist_ok=True)
+	file_descriptor, temporary_path = tempfile.mkstemp(dir=directory, prefix=".", suffix=".tmp")
+	try:
+		with os.fdopen(file_descriptor, "w", encoding="utf-8") as f:
+			f.writelines(chunks)
+		# Keeps the permissions of the replaced file, the temporary file being only readable by its owner
+		try:
+			os.chmod(temporary_path, os.stat(path).st_mode & 0o777)
+		except OSError:
+			os.chmod(temporary_path, 0o644)
+		os.replace(temporary_path, path)
+	except BaseException:
+		os.remove(temporary_path)
+		raise
+
+
+def compile_directory(directory: str, targets: List[str], jobs: int = 1, output_directory: str = None,
+                      config_path: str = "plugins_config.json") -> List[CompilationResult]:
+	"""
+	Compiles all the .algo files of a directory to each target, in parallel across a pool of processes.
+	Each file is read and parsed once for all the targets.
+	:param directory: The directory containing the files to compile.
+	:param targets: The targets of the compilation, keys of TARGETS.
+	:param jobs: The amount of processes compiling the files. If 1, the files are compiled in this process.
+	:param output_directory: The directory the compiled files are written to, keeping the structure of the source
+		directory. If None, each compiled file is written next to its source file.
+	:param config_path: The path to the plugins config, from which the settings of the compilers are read.
+	:return: The result of the compilation of each file to each target, in the order of the files, then of the targets.
+	"""
+	paths = find_source_files(directory, output_directory)
+	output_paths = [get_output_paths(path, targets, directory, output_directory) for path in paths]
+
+	if jobs <= 1 or len(paths) <= 1:
+		app = HeadlessApp.from_config(config_path)
+		return [
+			result for path, file_output_paths in zip(paths, output_paths)
+			for result in app.compile_file_targets(path, targets, file_output_paths)
+		]
+	with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(config_path,)) as executor:
+		return [
+			result for file_results in executor.map(_compile_in_worker, paths, [targets] * len(paths), output_paths)
+			for result in file_results
+		]
+
+
+def run_batch_compilation(argv: List[str]) -> int:
+	"""
+	Runs the batch compilation from the command line arguments, and reports the timing and errors of each file.
+	:param argv: The command line arguments, containing --compile-dir, and optionally --target (a comma-separated list
+		of targets, e.g. 'algo,cpp' ; 'cpp' by default), --jobs, --output-dir and --config.
+	:return: The exit code : 0 if every file compiled, 1 otherwise.
+	"""
+	def get_argument(name: str, default):
+		return argv[argv.index(name) + 1] if name in argv else default
+
+	directory = get_argument("--compile-dir", ".")
+	targets = get_argument("--target", "cpp").split(",")
+	jobs = int(get_argument("--jobs", os.cpu_count() or 1))
+	output_directory = get_argument("--output-dir", None)
+	config_path = get_argument("--config", os.path.join(os.path.dirname(os.path.abspath(__file__)), "plugins_config.json"))
+
+	translate = HeadlessApp.from_config(config_path).get_translation
+	for target in targets:
+		if target not in TARGETS:
+			print(translate("batch", "unknown_target", target=target, targets=", ".join(TARGETS)), file=sys.stderr)
+			return 1
+
+	start = time.perf_counter()
+	results = compile_directory(directory, targets, jobs, output_directory, config_path)
+	if not results:
+		print(translate("batch", "no_files", directory=directory), file=sys.stderr)
+		return 1
+
+	for result in results:
+		if result.error is None:
+			print(translate("batch", "compiled", **result._asdict()))
+		else:
+			print(translate("batch", "failed", **result._asdict()), file=sys.stderr)
+			for diagnostic in result.diagnostics:
+				print(f"\t{diagnostic.message}", file=sys.stderr)
+	succeeded = sum(result.error is None for result in results)
+	cache_hits = sum(result.cached for result in results)
+	print(translate("batch", "cache_summary", hits=cache_hits, misses=len(results) - cache_hits))
+	print(translate(
+		"batch", "summary", succeeded=succeeded, total=len(results), duration=(time.perf_counter() - start) * 1000
+	))
+	return 0 if succeeded == len(results) else 1
+
+
+def run_file_compilation(argv: List[str]) -> int:
+	"""
+	Compiles a single file from the command line arguments, writing the compiled code to the standard output as it is
+	put together, and the errors to the standard error.
+	:param argv: The command line arguments, containing --compile-file, and optionally --target (algo or cpp,
+		by default) and --config.
+	:return: The exit code : 0 if the file compiled, 1 otherwise.
+	"""
+	def get_argument(name: str, default):
+		return argv[argv.index(name) + 1] if name in argv else default
+
+	path = get_argument("--compile-file", None)
+	target = get_argument("--target", "cpp")
+	config_path = get_argument("--config", os.path.join(os.path.dirname(os.path.abspath(__file__)), "plugins_config.json"))
+
+	app = HeadlessApp.from_config(config_path)
+	if target not in TARGETS:
+		print(app.get_translation("batch", "unknown_target", target=target, targets=", ".join(TARGETS)), file=sys.stderr)
+		return 1
+
+	with open(path, "r", encoding="utf-8") as f:
+		compiled_chunks = app.compile_iter(f.read(), TARGETS[target].compiler_name, path)
+	if compiled_chunks is None:
+		for diagnostic in app.compilers[TARGETS[target].compiler_name].diagnostics:
+			print(diagnostic.message, file=sys.stderr)
+		return 1
+	try:
+		sys.stdout.writelines(compiled_chunks)
+		sys.stdout.flush()
+	# If the output is piped into a program that stopped reading it (e.g. head), stops writing
+	except BrokenPipeError:
+		os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+		return 1
+	return 0
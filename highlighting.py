@@ -0,0 +1,391 @@
+"""
+Computes the syntax highlighting of the lines of code, and caches it so only the edited lines are analyzed again.
+"""
+import threading
+import time
+from typing import Tuple, Sequence, Optional
+
+from caching import LRUCache
+from symbol_table import SymbolTable, find_identifiers
+
+
+# A span of highlighted text : the column it starts at, its text, and the number of its color pair
+HighlightSpan = Tuple[int, str, int]
+
+# The built-in functions highlighted in the code
+BUILTIN_FUNCTIONS = ("puissance", "racine", "aleatoire", "alea", "len")
+
+# The color pair used for each kind of user-declared symbol
+SYMBOL_KIND_PAIRS = {
+	"struct": "user_struct",
+	"function": "user_function",
+	"procedure": "user_function",
+	"variable": "user_variable",
+	"array": "user_variable",
+	"parameter": "user_variable",
+	"constant": "user_constant"
+}
+
+
+class Highlighter:
+	def __init__(self, app, symbol_table: SymbolTable, cache_size: int = 4096):
+		"""
+		Computes the highlighted spans of each line, caching them by line content.
+		:param app: The instance of the app.
+		:param symbol_table: The table of the symbols declared in the document, used to color them.
+		:param cache_size: The maximum amount of lines whose spans are cached.
+		"""
+		self.app = app
+		self.symbol_table = symbol_table
+		self.cache = LRUCache(cache_size)  # The spans and identifiers of each line, keyed by line content and flags
+
+		# The keywords of each highlighting type, as sets for fast lookups
+		self.statements = frozenset()
+		self.functions = frozenset()
+		self.variables = frozenset()
+		self.instructions = frozenset()
+		self.keywords = frozenset()
+		self._theme_key = tuple()  # The color pairs used by the theme, as part of the cache keys
+		self.reload_keywords()
+
+		self.prefetcher = HighlightPrefetcher(self)  # Highlights the lines around the viewport in the background
+
+
+	def reload_keywords(self):
+		"""
+		Reloads the keywords and the color pairs from the app.
+		Should be called after either of them is modified.
+		"""
+		self.statements = frozenset(self.app.color_control_flow["statement"])
+		self.functions = frozenset(self.app.color_control_flow["function"])
+		self.variables = frozenset(self.app.color_control_flow["variable"])
+		self.instructions = frozenset(self.app.color_control_flow["instruction"])
+		self.keywords = self.statements | self.functions | self.instructions
+		self._theme_key = tuple(sorted(self.app.color_pairs.items()))
+
+
+	def is_var_type(self, name: str) -> bool:
+		"""
+		Returns whether the name is an existing basic type, or a pointer to an existing basic type.
+		:param name: The name of a type, e.g. 'int*'
+		"""
+		if not name: return False
+		if name[-1] == '*':
+			return self.app.use_ptrs_and_malloc and name[:-1] in self.variables
+		return name in self.variables
+
+
+	def get_spans(self, line: str) -> Tuple[HighlightSpan, ...]:
+		"""
+		Returns the highlighted spans of the line, from the cache if the line was already highlighted.
+		The identifiers declared in the document are then colored based on the symbol table.
+		:param line: The line to highlight.
+		:return: A tuple of spans, to be drawn in order.
+		"""
+		key = (line, self.app.use_ptrs_and_malloc, self._theme_key)
+		cached = self.cache.get(key)
+		if cached is None:
+			cached = self._lex(line)
+			self.cache.put(key, cached)
+		spans, identifiers = cached
+
+		# Colors the user-declared symbols, which only costs a lookup per identifier
+		pairs = self.app.color_pairs
+		semantic_spans = []
+		for column, identifier in identifiers:
+			kind = self.symbol_table.kind_of(identifier)
+			if kind is not None:
+				semantic_spans.append((column, identifier, pairs[SYMBOL_KIND_PAIRS[kind]]))
+		return spans + tuple(semantic_spans) if semantic_spans else spans
+
+
+	def warm(self, line: str) -> None:
+		"""
+		Computes and caches the spans of the line if they are not cached yet, without counting it as a lookup.
+		:param line: The line to highlight.
+		"""
+		key = (line, self.app.use_ptrs_and_malloc, self._theme_key)
+		if key not in self.cache:
+			self.cache.put(key, self._lex(line))
+
+
+	def _lex(self, line: str) -> Tuple[Tuple[HighlightSpan, ...], Tuple[Tuple[int, str], ...]]:
+		"""
+		Returns the spans of the line along with the identifiers that might be user-declared symbols.
+		:param line: The line to highlight.
+		"""
+		identifiers = tuple(
+			(column, identifier) for column, identifier in find_identifiers(line)
+			if identifier not in self.keywords and identifier not in self.variables
+		)
+		return self.compute_spans(line), identifiers
+
+
+	def compute_spans(self, line: str) -> Tuple[HighlightSpan, ...]:
+		"""
+		Lexes the line and returns its highlighted spans. Later spans overwrite earlier ones.
+		:param line: The line to highlight.
+		:return: A tuple of spans, to be drawn in order.
+		"""
+		pairs = self.app.color_pairs
+		spans = []
+		add = spans.append
+
+		# Splits the line on spaces, and remembers the column at which each word starts
+		splitted_line = line.split(" ")
+		starts = [0]
+		for word in splitted_line:
+			starts.append(starts[-1] + len(word) + 1)
+
+		# Colors the statement
+		start_statement = splitted_line[0]
+		if start_statement in self.keywords or self.is_var_type(start_statement):
+			if start_statement in self.statements:
+				c_pair = "statement"
+			elif start_statement in self.functions:
+				c_pair = "function"
+			elif start_statement in self.instructions:
+				c_pair = "instruction"
+			else:
+				c_pair = "variable"
+			add((0, start_statement, pairs[c_pair]))
+			if start_statement[-1] == '*':
+				add((len(start_statement) - 1, '*', pairs["statement"]))
+
+		# Finds all '[' and ']' signs and gives them the statement color
+		for index, ltr in enumerate(line):
+			if ltr in '[]':
+				add((index, ltr, pairs["statement"]))
+
+		# Finds all strings between quotes and highlights them
+		if len(splitted_line) > 1:
+			string_pair = pairs["strings"] if "=" not in splitted_line[1] else 5
+			quotes_indexes = [index for index, ltr in enumerate(line) if ltr == "\""]
+			for j in range(0, len(quotes_indexes), 2):
+				index = quotes_indexes[j]
+				if j + 1 < len(quotes_indexes):
+					add((index, line[index:quotes_indexes[j + 1] + 1], string_pair))
+				else:
+					add((index, line[index:], string_pair))
+
+		# Finds all equal signs to highlight them in statement color
+		try:
+			if "=" in splitted_line[1]:
+				add((starts[1], splitted_line[1], pairs["statement"]))
+
+				# Adds support for the new keyword
+				if self.app.use_ptrs_and_malloc and splitted_line[2] == "new":
+					add((starts[2], "new", pairs["statement"]))
+					self._add_new_type_spans(add, splitted_line[3].split("[")[0], starts[3])
+
+			elif self.is_var_type(splitted_line[0]) and splitted_line[2] == "=":
+				add((starts[2], "=", pairs["statement"]))
+
+				# Adds support for the new keyword
+				if self.app.use_ptrs_and_malloc and splitted_line[3] == "new" and splitted_line[0][-1] == '*':
+					add((starts[3], "new", pairs["statement"]))
+					self._add_new_type_spans(add, splitted_line[4].split("[")[0], starts[4])
+
+		except IndexError:
+			pass  # If there is no space in the line
+
+		# Finds all '&' signs and gives them the statement color
+		for index, ltr in enumerate(line):
+			if ltr == "&":
+				add((index, ltr, pairs["statement"]))
+
+		# Finds all instances of built-in functions to color them
+		for builtin_function in BUILTIN_FUNCTIONS:
+			search = f"{builtin_function}("
+			index = line.find(search)
+			while index != -1:
+				add((index, builtin_function, pairs["special_string"]))
+				index = line.find(search, index + len(search))
+
+		# If the instruction is a function declaration, we highlight each types in the declaration
+		if splitted_line[0] == "fx" and len(splitted_line) > 1:
+			# Highlighting the function's return type; as statement if void or variable otherwise
+			if splitted_line[1] == "void" or self.is_var_type(splitted_line[1]):
+				add((3, splitted_line[1], pairs["variable" if splitted_line[1] != "void" else "statement"]))
+
+			# Or if it is a structure
+			elif splitted_line[1].startswith("struct"):
+				add((3, "struct", pairs["instruction"]))
+				add((10, splitted_line[1][7:], pairs["special_string"]))
+
+			# Highlighting each argument's type
+			for j in range(3, len(splitted_line), 2):
+				if splitted_line[j] == "void" or self.is_var_type(splitted_line[j]):
+					add((starts[j], splitted_line[j], pairs["variable"]))
+
+				# If the argument's type is array
+				elif splitted_line[j].startswith("arr") or splitted_line[j].startswith("tab"):
+					self._add_array_type_spans(add, splitted_line[j], starts[j])
+
+				# If the argument is a structure
+				elif splitted_line[j].startswith("struct"):
+					add((starts[j], "struct", pairs["instruction"]))
+					add((starts[j] + 7, splitted_line[j][7:], pairs["special_string"]))
+
+		# If the instruction is an array, we highlight the array's type and its size
+		elif splitted_line[0] in ("arr", "tab") and len(splitted_line) > 1:
+			if splitted_line[1] in self.variables:
+				add((4, splitted_line[1], pairs["variable"]))
+
+			for j in range(3, len(splitted_line)):
+				if splitted_line[j].isdigit():
+					add((starts[j], splitted_line[j], pairs["special_string"]))
+
+		# If the instruction is a constant
+		elif splitted_line[0] == "const" and len(splitted_line) > 1:
+			if splitted_line[1] in self.variables:
+				add((6, splitted_line[1], pairs["variable"]))
+
+			if len(splitted_line) > 3 and "=" in splitted_line[3]:
+				add((starts[3], splitted_line[3], pairs["statement"]))
+
+		# If the instruction is a structure
+		elif splitted_line[0] == "struct" and len(splitted_line) > 1:
+			# Highlighting the structure's name
+			add((7, splitted_line[1], pairs["special_string"]))
+
+			# Highlighting each argument's type
+			for j in range(2, len(splitted_line), 2):
+				if splitted_line[j] in self.variables:
+					add((starts[j], splitted_line[j], pairs["variable"]))
+
+				# If the argument's type is array
+				elif splitted_line[j].startswith("arr"):
+					self._add_array_type_spans(add, splitted_line[j], starts[j])
+
+		# If the instruction is a structure initialization
+		elif splitted_line[0] == "init" and len(splitted_line) > 1:
+			# Highlighting the structure type
+			add((5, splitted_line[1], pairs["special_string"]))
+
+			# Highlighting each of the arguments if they correspond to a field of the structure, or a number
+			for j in range(3, len(splitted_line)):
+				# Highlighting as variable if the argument is a field of the structure (thus if its index is odd)
+				if j % 2 == 1:
+					flag = pairs["variable"]
+				# Highlighting the argument as a statement if it is a number
+				elif splitted_line[j].isdigit():
+					flag = pairs["statement"]
+				# Highlighting as a special string if the argument is a string
+				elif len(splitted_line[j]) > 0 and splitted_line[j][0] in "\"'":
+					flag = pairs["special_string"]
+				# Otherwise, the argument is left as is
+				else:
+					flag = 0
+				add((starts[j], splitted_line[j], flag))
+
+		# If the instruction is a delete statement
+		elif self.app.use_ptrs_and_malloc and splitted_line[0] == "delete" and len(splitted_line) >= 2:
+			if splitted_line[1] == "arr":
+				add((7, "arr", pairs["statement"]))
+
+		return tuple(spans)
+
+
+	def _add_new_type_spans(self, add, var_type: str, column: int):
+		"""
+		Highlights the type following a 'new' keyword.
+		:param add: The function adding a span.
+		:param var_type: The type following the keyword.
+		:param column: The column at which the type starts.
+		"""
+		pairs = self.app.color_pairs
+		if self.is_var_type(var_type):
+			add((column, var_type, pairs["variable"]))
+			if var_type[-1] == '*':
+				add((column + len(var_type) - 1, '*', pairs["statement"]))
+
+
+	def _add_array_type_spans(self, add, word: str, column: int):
+		"""
+		Highlights an array type, such as 'arr_int_5'.
+		:param add: The function adding a span.
+		:param word: The array type.
+		:param column: The column at which the array type starts.
+		"""
+		pairs = self.app.color_pairs
+		# Highlighting the array keyword and the underscore
+		add((column, "arr", pairs["statement"]))
+		add((column + 3, "_", pairs["function"]))
+
+		# Highlighting the var type, followed by the underscore
+		splitted_word = word.split("_")
+		if len(splitted_word) > 1:
+			add((column + 4, word[4:4 + len(splitted_word[1])], pairs["variable"]))
+			add((column + 4 + len(splitted_word[1]), "_", pairs["function"]))
+
+
+class HighlightPrefetcher:
+	def __init__(self, highlighter: Highlighter, idle_delay: float = 0.2):
+		"""
+		A low-priority background worker computing the highlighting of lines before they are displayed.
+		:param highlighter: The highlighter whose cache gets filled.
+		:param idle_delay: How long the editor has to be idle before the worker starts, in seconds.
+		"""
+		self.highlighter = highlighter
+		self.idle_delay = idle_delay
+		self._condition = threading.Condition()  # Wakes up the worker when lines are scheduled
+		self._pending_lines: Optional[Sequence[str]] = None  # The lines waiting to be highlighted
+		self._scheduled_at = 0.  # When the pending lines were scheduled
+		self._generation = 0  # Incremented each time the current job gets cancelled or replaced
+		self._thread: Optional[threading.Thread] = None  # The worker thread, started on the first schedule
+
+
+	def schedule(self, lines: Sequence[str]) -> None:
+		"""
+		Schedules the lines to be highlighted once the editor is idle, replacing any previously scheduled job.
+		:param lines: The lines to highlight, in order of priority.
+		"""
+		with self._condition:
+			self._generation += 1
+			self._pending_lines = lines
+			self._scheduled_at = time.monotonic()
+			self._condition.notify()
+
+		# Starts the worker if it is not running yet
+		if self._thread is None:
+			self._thread = threading.Thread(target=self._run, name="HighlightPrefetcher", daemon=True)
+			self._thread.start()
+
+
+	def cancel(self) -> None:
+		"""
+		Cancels the scheduled or running job, e.g. because an edit invalidated it.
+		"""
+		with self._condition:
+			self._generation += 1
+			self._pending_lines = None
+
+
+	def _run(self) -> None:
+		"""
+		The worker loop, highlighting the pending lines one at a time until its job is cancelled.
+		"""
+		while True:
+			with self._condition:
+				# Waits for a job
+				while self._pending_lines is None:
+					self._condition.wait()
+
+				# Waits for the editor to have been idle long enough
+				remaining_delay = self._scheduled_at + self.idle_delay - time.monotonic()
+				if remaining_delay > 0:
+					self._condition.wait(remaining_delay)
+					continue
+
+				# Takes the job
+				lines, generation = self._pending_lines, self._generation
+				self._pending_lines = None
+
+			for line in lines:
+				# Stops as soon as the job gets cancelled or replaced
+				if generation != self._generation:
+					break
+				self.highlighter.warm(line)
+				# Yields to the interface thread between each line
+				time.sleep(0)
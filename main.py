@@ -9,17 +9,27 @@ import os
 import importlib
 import json
 import typing_extensions
-from typing import Union, Optional, Callable, Any, List
+from typing import Union, Optional, Callable, Any, Dict, List, Tuple
 from configparser import ConfigParser
 from collections import deque
 from traceback import print_exception
 import re
 import datetime
 
-from algorithmic_compiler import AlgorithmicCompiler
-from cpp_compiler import CppCompiler
+from checker import SemanticChecker
+from compiler import Compiler
+from completion import CompletionEngine
+from formatting import format_line, format_lines, run_formatting
+from headless import TARGETS, compile_targets, create_compile_cache, create_compilers, prepare_compiler, run_batch_compilation, run_file_compilation
+from highlighting import Highlighter
+from modules import ModuleLinker, find_included_symbols
+from parsing import Program
+from preview import LivePreview
+from regions import slice_program
+from symbol_table import SymbolTable, find_identifiers, get_index_path
 from utils import display_menu, input_text, get_screen_middle_coords, browse_files
-from custom_types import CommandType, OptionType
+from watch import run_watch
+from custom_types import CommandType, OptionType, Diagnostic
 
 
 # Constants
@@ -79,6 +89,18 @@ class App:
 			"is": CommandType(self.insert_text, self.get_translation("commands", "is"), True),
 			"rlt": CommandType(self.reload_theme, self.get_translation("commands", "rlt"), True),
 			"m": CommandType(self.mark_line, self.get_translation("commands", "m"), True),
+			"hc": CommandType(self.display_highlight_cache_stats, self.get_translation("commands", "hc"), True),
+			"cc": CommandType(self.display_compile_cache_stats, self.get_translation("commands", "cc"), True),
+			"gd": CommandType(self.go_to_definition, self.get_translation("commands", "gd"), True),
+			"fr": CommandType(self.find_references, self.get_translation("commands", "fr"), True),
+			"ac": CommandType(self.complete_word, self.get_translation("commands", "ac"), True),
+			"dg": CommandType(self.display_diagnostics, self.get_translation("commands", "dg"), True),
+			"lp": CommandType(self.toggle_live_preview, self.get_translation("commands", "lp"), True),
+			"ca": CommandType(self.compile_all_targets, self.get_translation("commands", "ca"), True),
+			"gs": CommandType(self.go_to_compiled_line_source, self.get_translation("commands", "gs"), True),
+			"cr": CommandType(partial(self.compile, region=True), self.get_translation("commands", "cr"), True),
+			"pr": CommandType(partial(self.compile_to_cpp, region=True), self.get_translation("commands", "pr"), True),
+			"fm": CommandType(self.format_code, self.get_translation("commands", "fm"), True),
 			# To add the command symbol to the text
 			self.command_symbol: CommandType(
 				partial(self.add_char_to_text, self.command_symbol),
@@ -101,6 +123,7 @@ class App:
 		self.cur = tuple()  # The cursor
 		self.min_display_char = 0  # Useless at the moment
 		self.last_save_action = "clipboard"  # What the user did the last time he saved some code from the editor ; can be 'clipboard' or the pah to a file.
+		self.current_file_path: Optional[str] = None  # The path of the file being edited, or None if it was not opened from or saved to a file
 		self.compilers = {}  # A dictionary of compilers for the editor
 		self.undo_actions = deque([], maxlen=21)  # All the actions that can be used to undo
 		self.is_crash_reboot = False  # Whether the editor has been rebooted from a crash. Can only be used through a plugin's init() method, will always be False otherwise.
@@ -188,19 +211,74 @@ class App:
 				("variable", 3),
 				("instruction", 4),
 				("strings", 3),
-				("special_string", 5)
+				("special_string", 5),
+				("user_struct", 5),
+				("user_function", 2),
+				("user_variable", 6),
+				("user_constant", 6)
 			)
 		}  # The number of the color pairs
 		self.color_control_flow = {
 			"statement": ("if", "else", "end", "elif", "for", "while", "switch", "case", "default", "const", "delete"),
 			"function": ("fx", "fx_start", "return", "CODE_RETOUR", "struct"),
 			"variable": ('int', 'float', 'string', 'bool', 'char'),
-			"instruction": ("print", "input", "arr", "tab", "init")
+			"instruction": ("print", "input", "arr", "tab", "init", "include")
 		}  # What each type of statement corresponds to
 		self.theme_scheme = self._theme_parser["SCHEME"].get("scheme", "DARK")
 		self.default_bg = curses.COLOR_BLACK
 		self.default_fg = curses.COLOR_WHITE
 
+		# Creates the syntax highlighter, with a cache size based on the config
+		self.symbol_table = SymbolTable(self.color_control_flow["variable"])  # The symbols declared in the document
+		if "highlight_cache_size" not in self.plugins_config["BASE_CONFIG"].keys():
+			self.plugins_config["BASE_CONFIG"]["highlight_cache_size"] = 4096
+		self.highlighter = Highlighter(
+			self, self.symbol_table, self.plugins_config["BASE_CONFIG"]["highlight_cache_size"]
+		)  # Computes and caches the syntax highlighting of each line
+
+		# Creates the completion engine, with a latency budget and a fuzziness based on the config
+		if "completion_latency_ms" not in self.plugins_config["BASE_CONFIG"].keys():
+			self.plugins_config["BASE_CONFIG"]["completion_latency_ms"] = 5
+		if "completion_max_distance" not in self.plugins_config["BASE_CONFIG"].keys():
+			self.plugins_config["BASE_CONFIG"]["completion_max_distance"] = 1
+		self.completion_engine = CompletionEngine(
+			self, self.symbol_table,
+			self.plugins_config["BASE_CONFIG"]["completion_latency_ms"] / 1000,
+			self.plugins_config["BASE_CONFIG"]["completion_max_distance"]
+		)  # Completes the words from the keywords and the symbols of the document
+		self._program: Optional[Program] = None  # The last parsed program, shared by the compilers
+		self.module_linker = ModuleLinker()  # Resolves the files included by the code
+
+		# Creates the cache of the compiled code, with a size (in megabytes) based on the config
+		if "compile_cache_size_mb" not in self.plugins_config["BASE_CONFIG"].keys():
+			self.plugins_config["BASE_CONFIG"]["compile_cache_size_mb"] = 64
+		self.compile_cache = create_compile_cache(
+			self.plugins_config["BASE_CONFIG"]["compile_cache_size_mb"]
+		)  # Caches the compiled code between runs, shared with the batch compiler
+
+		# The amount of processes compiling the functions of large programs in parallel, based on the config
+		if "compile_jobs" not in self.plugins_config["BASE_CONFIG"].keys():
+			self.plugins_config["BASE_CONFIG"]["compile_jobs"] = os.cpu_count() or 1
+		self.compile_jobs = self.plugins_config["BASE_CONFIG"]["compile_jobs"]
+
+		# Creates the live preview, compiling the code a delay (in milliseconds, based on the config) after typing stops
+		if "live_preview_delay_ms" not in self.plugins_config["BASE_CONFIG"].keys():
+			self.plugins_config["BASE_CONFIG"]["live_preview_delay_ms"] = 300
+		self.live_preview = LivePreview(
+			self._prepare_compiler, self.plugins_config["BASE_CONFIG"]["live_preview_delay_ms"] / 1000, self.parse_text
+		)  # Compiles the code in the background to show it next to the code
+		self.live_preview_compiler: Optional[str] = None  # The name of the compiler shown in the live preview, or None if hidden
+		self.last_compiler_name: Optional[str] = None  # The compiler of the last compiled code shown, whose source map is used
+		self._live_preview_version = -1  # The version of the live preview last displayed
+
+		# Whether the code gets formatted each time it is saved, based on the config
+		if "format_on_save" not in self.plugins_config["BASE_CONFIG"].keys():
+			self.plugins_config["BASE_CONFIG"]["format_on_save"] = False
+		self.format_on_save = self.plugins_config["BASE_CONFIG"]["format_on_save"]
+		self.checker = SemanticChecker(
+			self.color_control_flow["variable"], self.color_control_flow_fused
+		)  # Checks the code for semantic errors in the background
+
 		# Loads all the plugins
 		self.authorized_plugins_list: Optional[List[str]] = None  # A list of the plugins authorized to load, or None if any plugin in the plugins folder can load
 		if "--authorized-plugins" in sys.argv:
@@ -241,6 +319,11 @@ class App:
 		# Initializes each plugin, if they have an init function
 		self._init_plugins()
 
+		# Reloads the highlighted and completed keywords, in case a plugin modified them
+		self.highlighter.reload_keywords()
+		self.completion_engine.reload_keywords()
+		self.checker.reload_keywords(self.color_control_flow["variable"], self.color_control_flow_fused)
+
 		# Deletes the given commands
 		if "--delete-commands" in sys.argv:
 			commands_to_delete_arg = sys.argv[sys.argv.index("--delete-commands") + 1]
@@ -277,6 +360,10 @@ class App:
 			try:
 				key = self.stdscr.getkey()
 			except _curses.error:
+				# Shows the new compiled code of the live preview as soon as it is ready
+				if self.live_preview_compiler is not None and self.live_preview.version != self._live_preview_version:
+					self.display_live_preview()
+					self.stdscr.refresh()
 				continue
 			finally:
 				# Calls the plugins fixed_update function
@@ -286,6 +373,9 @@ class App:
 
 			self.stdscr.nodelay(False)
 
+			# Cancels the background highlighting, as the key might invalidate it
+			self.highlighter.prefetcher.cancel()
+
 			# If the undo is full, dumping the earliest element of queue
 			if len(self.undo_actions) == self.undo_actions.maxlen:
 				self.undo_actions.popleft()
@@ -551,49 +641,9 @@ class App:
 		"""
 		Loads the base compilers.
 		"""
-		self.compilers["algorithmic"] = AlgorithmicCompiler(
-			{
-				"for": "Pour",
-				"if": "Si",
-				"while": "Tant Que",
-				"switch": "Selon",
-				"arr": "Tableau",
-				"tab": "Tableau",
-				"case": "Cas",
-				"default": "Autrement",
-				"fx": "Fonction",
-				"proc": "Procédure",
-				"const": "Constante"
-			},
-			{
-				"int": "Entier",
-				"float": "Réel",
-				"string": "Chaîne de caractères",
-				"bool": "Booléen",
-				"char": "Caractère"
-			},
-			["print", "input", "end", "elif", "else", "fx_start", "vars", "precond", "data", "datar", "result",
-			 "return", "desc", "CODE_RETOUR", "init", "struct", "const", "delete"],
-			self.stdscr,
-			self.translations,
-			self.get_translation,
-			self,
-			self.tab_char
-		)
-		self.compilers["C++"] = CppCompiler(
-			('for', 'if', 'while', 'switch', 'arr', 'tab', 'case', 'default', 'fx', 'proc', 'struct'),
-			{
-				"int": "int",
-				"float": "float",
-				"string": "std::string",
-				"bool": "bool",
-				"char": "char"
-			},
-			["print", "input", "end", "elif", "else", "fx_start", "vars", "precond", "data", "datar", "result",
-			 "return", "desc", "CODE_RETOUR", "init", "const", "delete"],
-			self.stdscr,
-			self
-		)
+		self.compilers.update(create_compilers(self, self.stdscr))
+		for compiler in self.compilers.values():
+			compiler.output_cache = self.compile_cache
 
 	def _on_crash_recover(self):
 		"""
@@ -855,8 +905,14 @@ class App:
 				else
 			" "
 		)
+		lines = self.current_text.split("\n")
+
+		# Updates the symbol table with the lines that changed, and checks the text in the background
+		self.symbol_table.update(lines)
+		self.checker.submit(self.current_text)
+
 		for i, line in enumerate(
-				self.current_text.split("\n")[self.min_display_line:self.min_display_line + (self.rows - 3) - self.top_placement_shift]
+				lines[self.min_display_line:self.min_display_line + (self.rows - 3) - self.top_placement_shift]
 		):
 			line = line[self.min_display_char:]
 			# Getting the splitted line for syntax highlighting
@@ -881,6 +937,14 @@ class App:
 				else:
 					del self.plugins[plugin_name]
 
+		# Highlights the lines around the viewport in the background, so scrolling finds them ready
+		self._prefetch_highlighting(lines)
+
+		# Compiles the text in the background and shows the latest compiled code next to it
+		if self.live_preview_compiler is not None:
+			self.live_preview.submit(self.current_text, self.live_preview_compiler)
+			self.display_live_preview()
+
 		# Placing cursor
 		if 0 <= self.cur[1] < self.cols and 0 <= self.cur[0] < self.rows - 3:
 			try:
@@ -889,6 +953,71 @@ class App:
 				pass
 
 
+	def display_live_preview(self):
+		"""
+		Displays the latest compiled code of the live preview on the right half of the screen, or its errors if the
+		code could not be compiled.
+		"""
+		result = self.live_preview.result
+		self._live_preview_version = self.live_preview.version
+		pane_start = self.cols // 2
+		pane_width = self.cols - pane_start - 2  # -2 for the separator and the scrollbar
+		pane_height = self.rows - 3 - self.top_placement_shift
+		if pane_width <= 0:
+			return
+
+		# Finds the lines to show, scrolled along with the code
+		style = curses.A_NORMAL
+		if result is None or result.compiler_name != self.live_preview_compiler:
+			lines = [self.get_translation("live_preview", "compiling")]
+		elif result.output is None:
+			lines = [diagnostic.message or diagnostic.code for diagnostic in result.diagnostics]
+			style = curses.color_pair(self.color_pairs["statement"])
+		else:
+			lines = result.output.split("\n")[self.min_display_line:]
+
+		for i in range(pane_height):
+			line = lines[i].expandtabs(4)[:pane_width] if i < len(lines) else ""
+			try:
+				self.stdscr.addstr(i + self.top_placement_shift, pane_start, "│", curses.A_DIM)
+				self.stdscr.addstr(i + self.top_placement_shift, pane_start + 1, line.ljust(pane_width), style)
+			except curses.error: pass
+
+
+	def toggle_live_preview(self):
+		"""
+		Shows the live preview of the code compiled to each target in turn (algorithmic, C++...), then hides it.
+		"""
+		compiler_names = (None, *(target.compiler_name for target in TARGETS.values()))
+		self.live_preview_compiler = compiler_names[
+			(compiler_names.index(self.live_preview_compiler) + 1) % len(compiler_names)
+		]
+		self.stdscr.clear()
+		self.display_text()
+		self.apply_stylings()
+
+
+	def _prefetch_highlighting(self, lines: List[str]):
+		"""
+		Schedules the background highlighting of the lines right outside the viewport and around the marked lines.
+		:param lines: All the lines of the text.
+		"""
+		screen_height = max(self.rows - 3 - self.top_placement_shift, 1)
+		first_line = self.min_display_line
+
+		# The lines right below the viewport, then right above it
+		lines_to_prefetch = lines[first_line + screen_height:first_line + 2 * screen_height]
+		lines_to_prefetch.extend(reversed(lines[max(first_line - screen_height, 0):first_line]))
+
+		# The lines around each marked line
+		for marked_line in self.marked_lines:
+			lines_to_prefetch.extend(lines[max(marked_line - screen_height // 2, 0):marked_line + screen_height // 2])
+
+		# Highlights the same part of the lines as display_text, so the cached spans are found once scrolled horizontally
+		if lines_to_prefetch:
+			self.highlighter.prefetcher.schedule([line[self.min_display_char:] for line in lines_to_prefetch])
+
+
 	def apply_stylings(self) -> None:
 		"""
 		Apply all the stylings to the screen.
@@ -907,12 +1036,20 @@ class App:
 		# Gets the amount of lines in the text
 		self.calculate_line_numbers()
 		# Puts the line numbers at the edge of the screen
+		diagnostics = self.checker.diagnostics
 		for i in range(self.min_display_line, min(self.lines, self.min_display_line + (self.rows - 3) - self.top_placement_shift)):
 			style = curses.A_REVERSE
 			if i in self.marked_lines:  # Gives the line a different color if it marked
 				style |= curses.color_pair(self.color_pairs["statement"])
 			self.stdscr.addstr(i - self.min_display_line + self.top_placement_shift, self.left_placement_shift, str(i + 1).zfill(len(str(self.lines))), style)
 
+			# Marks the lines with semantic errors in the gutter
+			if i in diagnostics:
+				self.stdscr.addstr(
+					i - self.min_display_line + self.top_placement_shift, self.left_placement_shift + len(str(self.lines)),
+					"!", curses.color_pair(self.color_pairs["statement"]) | curses.A_BOLD
+				)
+
 		self.stdscr.refresh()
 
 
@@ -978,6 +1115,7 @@ class App:
 			for pair_name, fallback_value in self.color_pairs.items()
 		}
 		self._declare_color_pairs()
+		self.highlighter.reload_keywords()
 		# Adds a message at the bottom to warn the theme was reloaded
 		self.stdscr.addstr(self.rows - 1, 4, self.get_translation("theme_reloaded"))
 
@@ -1122,10 +1260,7 @@ class App:
 		Returns whether the variable is from an existing basic type, or a pointer to an existing basic type.
 		:param name: The name of a type, e.g. 'int*'
 		"""
-		if not name: return False
-		if not self.use_ptrs_and_malloc and name[-1] == '*': return False
-		if name[-1] != '*': return name in self.color_control_flow["variable"]
-		else: return name[:-1] in self.color_control_flow["variable"]
+		return self.highlighter.is_var_type(name)
 
 
 	def syntax_highlighting(self, line, splitted_line, i):
@@ -1139,357 +1274,38 @@ class App:
 		minlen = self.get_lineno_length()
 		mintop = i + self.top_placement_shift
 
-		# Colors the statement
-		start_statement = splitted_line[0]
-		if start_statement in self.color_control_flow_fused or self._type_in_var_types(start_statement):
-			if start_statement in self.color_control_flow["statement"]:
-				c_pair = "statement"
-			elif start_statement in self.color_control_flow["function"]:
-				c_pair = "function"
-			elif start_statement in self.color_control_flow["instruction"]:
-				c_pair = "instruction"
-			else:
-				c_pair = "variable"
-			# Overwrites the beginning of the line with the given color if possible
-			self.stdscr.addstr(mintop, minlen, start_statement, curses.color_pair(self.color_pairs[c_pair]))
-			if start_statement[-1] == '*':
-				self.stdscr.addstr(
-					mintop, minlen + len(start_statement) - 1,
-					'*', curses.color_pair(self.color_pairs["statement"])
-				)
-
-		# Finds all '[' and ']' signs and gives them the statement color
-		for current_symbol in '[]':
-			symbol_indexes = tuple(i for i, ltr in enumerate(line) if ltr == current_symbol)
-			for index in symbol_indexes:
-				if minlen + index < self.cols - 1:
-					self.stdscr.addstr(
-						mintop,
-						minlen + index, line[index],
-						curses.color_pair(self.color_pairs["statement"])
-					)
-
-		# Finds all strings between quotes (single or double) and highlights them green
-		quotes_indexes = tuple(i for i, ltr in enumerate(line) if ltr == "\"")
-		for j, index in enumerate(quotes_indexes):
-			if j % 2 == 0:
-				try:
-					self.stdscr.addstr(
-						mintop,
-						minlen + index, line[index:quotes_indexes[j + 1] + 1],
-						curses.color_pair(self.color_pairs["strings"] if "=" not in splitted_line[1] else 5)
-					)
-				except IndexError:
-					if len(splitted_line) > 1:
-						self.stdscr.addstr(
-							mintop,
-							minlen + index, line[index:],
-							curses.color_pair(self.color_pairs["strings"] if "=" not in splitted_line[1] else 5)
-						)
-				except curses.error: pass
-
-		# Finds all equal signs to highlight them in statement color
-		try:
-			if "=" in splitted_line[1]:
-				self.stdscr.addstr(
-					mintop, minlen + 1 + len(splitted_line[0]),
-					splitted_line[1],
-					curses.color_pair(self.color_pairs["statement"])
-				)
-
-				# Adds support for the new keyword
-				if self.use_ptrs_and_malloc and splitted_line[2] == "new":
-					self.stdscr.addstr(
-						mintop, minlen + sum(len(e) + 1 for e in splitted_line[:2]),
-						"new",
-						curses.color_pair(self.color_pairs["statement"])
-					)
-
-					# Adds a way to highlight if the variable is a standard variable type
-					if "[" in splitted_line[3]:
-						var_type = splitted_line[3].split("[")[0]
-					else:
-						var_type = splitted_line[3]
-
-					if self._type_in_var_types(var_type):
-						self.stdscr.addstr(
-							mintop, minlen + sum(len(e) + 1 for e in splitted_line[:3]),
-							var_type,
-							curses.color_pair(self.color_pairs["variable"])
-						)
-						if var_type[-1] == '*':
-							self.stdscr.addstr(
-								mintop, minlen + sum(len(e) + 1 for e in splitted_line[:3]) + len(var_type) - 1,
-								'*',
-								curses.color_pair(self.color_pairs["statement"])
-							)
-
-			elif self._type_in_var_types(splitted_line[0]) and splitted_line[2] == "=":
-				self.stdscr.addstr(
-					mintop, minlen + sum(len(e) + 1 for e in splitted_line[:2]),
-					"=",
-					curses.color_pair(self.color_pairs["statement"])
-				)
-
-				# Adds support for the new keyword
-				if self.use_ptrs_and_malloc and splitted_line[3] == "new" and splitted_line[0][-1] == '*':
-					self.stdscr.addstr(
-						mintop, minlen + sum(len(e) + 1 for e in splitted_line[:3]),
-						"new",
-						curses.color_pair(self.color_pairs["statement"])
-					)
-
-					# Adds a way to highlight if the variable is a standard variable type
-					if "[" in splitted_line[4]:
-						var_type = splitted_line[4].split("[")[0]
-					else:
-						var_type = splitted_line[4]
-
-					if self._type_in_var_types(var_type):
-						self.stdscr.addstr(
-							mintop, minlen + sum(len(e) + 1 for e in splitted_line[:4]),
-							var_type,
-							curses.color_pair(self.color_pairs["variable"])
-						)
-						if var_type[-1] == '*':
-							self.stdscr.addstr(
-								mintop, minlen + sum(len(e) + 1 for e in splitted_line[:4]) + len(var_type) - 1,
-								'*',
-								curses.color_pair(self.color_pairs["statement"])
-							)
-
-
-		except IndexError:
-			pass  # If there is no space in the line
-
-		# Finds all '&' signs and gives them the statement color
-		symbol_indexes = tuple(i for i, ltr in enumerate(line) if ltr == "&")
-		for index in symbol_indexes:
-			self.stdscr.addstr(
-				mintop,
-				minlen + index, line[index],
-				curses.color_pair(self.color_pairs["statement"])
-			)
-
-
-		# Function to find all the instances of a substring in a string
-		def find_all(full_string: str, search: str):
-			"""
-			Finds all instances of a substring in a string.
-			:param full_string: The string to search into.
-			:param search: The string of whom to find all the instances.
-			:return: A generator containing all the indexes of the substring.
-			"""
-			start = 0
-			while True:
-				start = full_string.find(search, start)
-				if start == -1: return
-				yield start
-				start += len(search)
-
-
-		# Finds all instances of built-in functions to color them green
-		for builtin_function in ("puissance", "racine", "aleatoire", "alea", "len"):
-			for builtin_function_index in find_all(line, f"{builtin_function}("):
-				self.stdscr.addstr(
-					mintop, minlen + builtin_function_index,
-					builtin_function,
-					curses.color_pair(self.color_pairs["special_string"])
-				)
-
-
-		# If the instruction is a function declaration, we highlight each types in the declaration
-		if splitted_line[0] == "fx" and len(splitted_line) > 1:
-			# Highlighting the function's return type; as statement if void or variable otherwise
-			if splitted_line[1] == "void" or self._type_in_var_types(splitted_line[1]):
-				self.stdscr.addstr(
-					mintop, minlen + 3,
-					splitted_line[1],
-					curses.color_pair(self.color_pairs["variable" if splitted_line[1] != "void" else "statement"])
-				)
-
-			# Or if it is a structure
-			elif splitted_line[1].startswith("struct"):
-				self.stdscr.addstr(
-					mintop, minlen + 3,
-					"struct",
-					curses.color_pair(self.color_pairs["instruction"])
-				)
-				self.stdscr.addstr(
-					mintop, minlen + 10,
-					splitted_line[1][7:],
-					curses.color_pair(self.color_pairs["special_string"])
-				)
-
-			# Highlighting each argument's type
-			for j in range(3, len(splitted_line), 2):
-				if splitted_line[j] == "void" or self._type_in_var_types(splitted_line[1]):
-					self.stdscr.addstr(
-						mintop, minlen + 1 + len(" ".join(splitted_line[:j])),
-						splitted_line[j], curses.color_pair(self.color_pairs["variable"])
-					)
-
-				# If the argument's type is array
-				elif splitted_line[j].startswith("arr") or splitted_line[j].startswith("tab"):
-					# Highlighting the array type in red
-					self.stdscr.addstr(
-						mintop, minlen + 1 + len(" ".join(splitted_line[:j])),
-						"arr", curses.color_pair(self.color_pairs["statement"])
-					)
-					# Highlighting the underscore
-					self.stdscr.addstr(
-						mintop, minlen + 1 + len(" ".join(splitted_line[:j])) + 3,
-						"_", curses.color_pair(self.color_pairs["function"])
-					)
-					# Highlighting the var type in yellow
-					try:
-						self.stdscr.addstr(
-							mintop, minlen + 1 + len(" ".join(splitted_line[:j])) + 4,
-							splitted_line[j][4:4 + len(splitted_line[j].split("_")[1])], curses.color_pair(self.color_pairs["variable"])
-						)
-					except IndexError: pass
-					# Highlighting the underscore
-					try:
-						self.stdscr.addstr(
-							mintop, minlen + 1 + len(" ".join(splitted_line[:j])) + 4 + len(splitted_line[j].split("_")[1]),
-							"_", curses.color_pair(self.color_pairs["function"])
-						)
-					except IndexError: pass
-
-				# If the argument is a structure
-				elif splitted_line[j].startswith("struct"):
-					self.stdscr.addstr(
-						mintop, minlen + 1 + len(" ".join(splitted_line[:j])),
-						"struct", curses.color_pair(self.color_pairs["instruction"])
-					)
-					self.stdscr.addstr(
-						mintop, minlen + 8 + len(" ".join(splitted_line[:j])),
-						splitted_line[j][7:],
-						curses.color_pair(self.color_pairs["special_string"])
-					)
-
-
-		# If the instruction is an array, we highlight the array's type and its size
-		elif splitted_line[0] in ("arr", "tab") and len(splitted_line) > 1:
-			if splitted_line[1] in self.color_control_flow["variable"]:
-				self.stdscr.addstr(
-					mintop, minlen + 4,
-					splitted_line[1],
-					curses.color_pair(self.color_pairs["variable"])
-				)
-
-			if len(splitted_line) > 3:
-				for j in range(3, len(splitted_line)):
-					if splitted_line[j].isdigit():
-						self.stdscr.addstr(
-							mintop, minlen + len(" ".join(splitted_line[:j])) + 1,
-							splitted_line[j],
-							curses.color_pair(self.color_pairs["special_string"])
-						)
-
-		# If the instruction is a constant
-		elif splitted_line[0] == "const" and len(splitted_line) > 1:
-			if splitted_line[1] in self.color_control_flow["variable"]:
-				self.stdscr.addstr(
-					mintop, minlen + 6,
-					splitted_line[1],
-					curses.color_pair(self.color_pairs["variable"])
-				)
-
-			if len(splitted_line) > 3 and "=" in splitted_line[3]:
-				self.stdscr.addstr(
-					mintop, minlen + len(" ".join(splitted_line[:3])) + 1,
-					splitted_line[3],
-					curses.color_pair(self.color_pairs["statement"])
-				)# If the instruction is a function declaration, we highlight each types in the declaration
-
-		# If the instruction is a structure
-		elif splitted_line[0] == "struct" and len(splitted_line) > 1:
-			# Highlighting the structure's name
-			self.stdscr.addstr(
-				mintop, minlen + 7,
-				splitted_line[1],
-				curses.color_pair(self.color_pairs["special_string"])
-			)
+		# Draws each highlighted span of the line, only lexing the line if it is not cached
+		for column, text, pair in self.highlighter.get_spans(line):
+			# Cuts the span if it would overflow off the screen
+			available_space = self.cols - 1 - (minlen + column)
+			if available_space <= 0: continue
+			try:
+				self.stdscr.addstr(mintop, minlen + column, text[:available_space], curses.color_pair(pair))
+			except curses.error: pass
 
-			# Highlighting each argument's type
-			for j in range(2, len(splitted_line), 2):
-				if splitted_line[j] in self.color_control_flow["variable"]:
-					self.stdscr.addstr(
-						mintop, minlen + 1 + len(" ".join(splitted_line[:j])),
-						splitted_line[j], curses.color_pair(self.color_pairs["variable"])
-					)
 
-				# If the argument's type is array
-				elif splitted_line[j].startswith("arr"):
-					# Highlighting the array type in red
-					self.stdscr.addstr(
-						mintop, minlen + 1 + len(" ".join(splitted_line[:j])),
-						"arr", curses.color_pair(self.color_pairs["statement"])
-					)
-					# Highlighting the underscore
-					self.stdscr.addstr(
-						mintop, minlen + 1 + len(" ".join(splitted_line[:j])) + 3,
-						"_", curses.color_pair(self.color_pairs["function"])
-					)
-					# Highlighting the var type in yellow
-					try:
-						self.stdscr.addstr(
-							mintop, minlen + 1 + len(" ".join(splitted_line[:j])) + 4,
-							splitted_line[j][4:4 + len(splitted_line[j].split("_")[1])], curses.color_pair(self.color_pairs["variable"])
-						)
-					except IndexError: pass
-					# Highlighting the underscore
-					try:
-						self.stdscr.addstr(
-							mintop, minlen + 1 + len(" ".join(splitted_line[:j])) + 4 + len(splitted_line[j].split("_")[1]),
-							"_", curses.color_pair(self.color_pairs["function"])
-						)
-					except IndexError: pass
+	def display_highlight_cache_stats(self):
+		"""
+		Displays the statistics of the syntax highlighting cache at the bottom of the screen.
+		"""
+		self.stdscr.addstr(self.rows - 1, 4, self.get_translation(
+			"highlight_cache_stats", **self.highlighter.cache.stats()
+		))
 
 
-		# If the instruction is a structure initialization
-		elif splitted_line[0] == "init" and len(splitted_line) > 1:
-			# Highlighting the structure type
-			self.stdscr.addstr(
-				mintop, minlen + 5,
-				splitted_line[1],
-				curses.color_pair(self.color_pairs["special_string"])
+	def display_compile_cache_stats(self):
+		"""
+		Displays the statistics of the compiled code cache at the bottom of the screen.
+		"""
+		if self.compile_cache is None:
+			message = self.get_translation("compile_cache_disabled")
+		else:
+			stats = self.compile_cache.stats()
+			message = self.get_translation(
+				"compile_cache_stats", **stats, size_mb=stats["size"] / 1024 / 1024,
+				max_size_mb=stats["max_size"] / 1024 / 1024
 			)
-
-			# Highlighting each of the arguments if they correspond to a field of the structure, or a number
-			for j in range(3, len(splitted_line)):
-				# Defining a default flag as being... Well, normal.
-				flag = curses.A_NORMAL
-
-				# Highlighting if the argument is a field of the structure (thus if its index is odd)
-				if j % 2 == 1:
-					# Highlighting as variable
-					flag = curses.color_pair(self.color_pairs["variable"])
-
-				# Highlighting the argument as a statement if it is a number
-				elif splitted_line[j].isdigit():
-					flag = curses.color_pair(self.color_pairs["statement"])
-
-				# Highlighting as a special string if the argument is a string
-				elif len(splitted_line[j]) > 0 and splitted_line[j][0] in "\"'":
-					flag = curses.color_pair(self.color_pairs["special_string"])
-
-				# Overwrites the text
-				self.stdscr.addstr(
-					mintop, minlen + 5 + sum(len(e) + 1 for e in splitted_line[1:j]),
-					splitted_line[j],
-					flag
-				)
-
-		# If the instruction is a delete statement
-		elif self.use_ptrs_and_malloc and splitted_line[0] == "delete" and len(splitted_line) >= 2:
-			if splitted_line[1] == "arr":
-				self.stdscr.addstr(
-					mintop, minlen + 7,
-					"arr",
-					curses.color_pair(self.color_pairs["statement"])
-				)
+		self.stdscr.addstr(self.rows - 1, 4, message)
 
 
 	def toggle_std_use(self):
@@ -1606,12 +1422,17 @@ class App:
 				with open(filename, "w", encoding="utf-8") as f:
 					f.write(text_to_save)
 
-				# Saving this save mode as quick action
+				# Saving this save mode as quick action, and saving the symbols index next to the file
 				if remember_quicksave:
 					self.last_save_action = filename
+					self.current_file_path = filename
+					self._save_symbols_index()
 
 		remember_quicksave = text_to_save is None
 		if text_to_save is None:
+			# Formats the code before saving it if wanted
+			if self.format_on_save:
+				self.format_code()
 			text_to_save = self.current_text
 
 		# If this is a regular save, we deploy the menu
@@ -1637,6 +1458,9 @@ class App:
 			else:
 				with open(self.last_save_action, "w", encoding="utf-8") as f:
 					f.write(text_to_save)
+				if remember_quicksave:
+					self.current_file_path = self.last_save_action
+					self._save_symbols_index()
 
 			self.stdscr.addstr(self.rows - 1, 4, self.get_translation(
 				"save", "quicksaved",
@@ -1656,6 +1480,7 @@ class App:
 			Saves the code to the clipboard.
 			"""
 			self.current_text = pyperclip.paste()
+			self.current_file_path = None
 			nonlocal opened_code
 			opened_code = True
 
@@ -1681,6 +1506,10 @@ class App:
 						self.current_text = f.read()
 						nonlocal opened_code
 						opened_code = True
+					self.current_file_path = filename
+					self._load_symbols_index()
+					# Resolves the files it includes, so the checker knows the symbols they declare
+					self.get_program()
 				else:
 					msg = self.get_translation("open", "nonexistent_file")
 					self.stdscr.addstr(self.rows // 2, self.cols // 2 - len(msg), msg)
@@ -1834,19 +1663,320 @@ class App:
 			self.execute_command(self.commands[self.last_used_command].command, self.last_used_command)
 
 
-	def compile(self, noshow:bool=False) -> Union[None, str]:
+	def _load_symbols_index(self):
+		"""
+		Loads the symbols index saved next to the current file, so navigation is ready without analyzing the file.
+		"""
+		if self.current_file_path is not None:
+			self.symbol_table.load(get_index_path(self.current_file_path), self.current_text.split("\n"))
+
+
+	def _save_symbols_index(self):
+		"""
+		Saves the symbols index of the current text next to the current file.
+		"""
+		if self.current_file_path is not None:
+			self.symbol_table.update(self.current_text.split("\n"))
+			try:
+				self.symbol_table.save(get_index_path(self.current_file_path))
+			except OSError as e:
+				self.log(f"Could not save the symbols index : {e}")
+
+
+	def get_identifier_at_cursor(self) -> Optional[str]:
+		"""
+		Returns the identifier under the cursor, or None if there is none.
+		"""
+		is_identifier_char = lambda char: char.isalnum() or char == "_"
+		start = end = self.current_index
+		while start > 0 and is_identifier_char(self.current_text[start - 1]):
+			start -= 1
+		while end < len(self.current_text) and is_identifier_char(self.current_text[end]):
+			end += 1
+		return self.current_text[start:end] if start != end else None
+
+
+	def jump_to_line(self, line_number: int, identifier: str = None):
+		"""
+		Moves the cursor to the given line, scrolling if the line is not visible.
+		:param line_number: The index of the line.
+		:param identifier: If given, the cursor is placed on the first use of this identifier in the line.
+		"""
+		lines = self.current_text.split("\n")
+		line_number = max(min(line_number, len(lines) - 1), 0)
+
+		# Finds the column of the identifier in the line
+		column = 0
+		if identifier is not None:
+			for identifier_column, name in find_identifiers(lines[line_number]):
+				if name == identifier:
+					column = identifier_column
+					break
+
+		# Moves the cursor
+		self.current_index = sum(len(line) + 1 for line in lines[:line_number]) + column
+
+		# Scrolls so the line is at the middle of the screen if it is not visible
+		screen_height = self.rows - 3 - self.top_placement_shift
+		if not (self.min_display_line <= line_number < self.min_display_line + screen_height):
+			self.min_display_line = max(line_number - screen_height // 2, 0)
+		self.stdscr.clear()
+
+
+	def go_to_definition(self):
+		"""
+		Moves the cursor to the declaration of the identifier under the cursor.
+		"""
+		name = self.get_identifier_at_cursor()
+		if name is None:
+			self.stdscr.addstr(self.rows - 1, 4, self.get_translation("symbols", "no_identifier"))
+			return
+
+		# Finds the declaration visible from the current line
+		self.symbol_table.update(self.current_text.split("\n"))
+		definition_line = self.symbol_table.find_definition(name, self.current_text[:self.current_index].count("\n"))
+		if definition_line is None:
+			self.stdscr.addstr(self.rows - 1, 4, self.get_translation("symbols", "not_declared", name=name))
+		else:
+			self.jump_to_line(definition_line, name)
+
+
+	def find_references(self):
+		"""
+		Lists the lines using the identifier under the cursor, and moves the cursor to the chosen one.
+		"""
+		name = self.get_identifier_at_cursor()
+		if name is None:
+			self.stdscr.addstr(self.rows - 1, 4, self.get_translation("symbols", "no_identifier"))
+			return
+
+		# Finds the lines using the identifier
+		lines = self.current_text.split("\n")
+		self.symbol_table.update(lines)
+		display_menu(
+			self.stdscr,
+			(
+				*(
+					(f"{line_number + 1} : {lines[line_number].strip()}", partial(self.jump_to_line, line_number, name))
+					for line_number in self.symbol_table.find_references(name)
+				),
+				(self.get_translation("cancel"), lambda: None)
+			),
+			label=self.get_translation("symbols", "references_label", name=name),
+			space_out_last_option=True,
+			align_left=True
+		)
+
+
+	def complete_word(self):
+		"""
+		Lets the user choose a completion for the word before the cursor, and inserts it.
+		"""
+		# Finds the beginning of the word before the cursor
+		start = self.current_index
+		while start > 0 and (self.current_text[start - 1].isalnum() or self.current_text[start - 1] == "_"):
+			start -= 1
+		prefix = self.current_text[start:self.current_index]
+
+		# Finds the completions, taking the latest symbols into account
+		self.symbol_table.update(self.current_text.split("\n"))
+		completions = self.completion_engine.complete(prefix)
+		if not completions:
+			self.stdscr.addstr(self.rows - 1, 4, self.get_translation("completion", "no_completion"))
+			return
+
+		# Replaces the prefix by the chosen completion
+		def insert_completion(word: str):
+			self.current_text = self.current_text[:start] + word + self.current_text[self.current_index:]
+			self.current_index = start + len(word)
+
+		display_menu(
+			self.stdscr,
+			(
+				*((word, partial(insert_completion, word)) for word in completions),
+				(self.get_translation("cancel"), lambda: None)
+			),
+			label=self.get_translation("completion", "label", prefix=prefix),
+			space_out_last_option=True
+		)
+
+
+	def display_diagnostics(self, diagnostics: Optional[List[Diagnostic]] = None):
+		"""
+		Lists the errors found in the code, and moves the cursor to the chosen one.
+		:param diagnostics: The errors to list, e.g. the ones found by a compiler. If None, the semantic errors found
+			while typing are listed.
+		"""
+		if diagnostics is None:
+			diagnostics = [
+				diagnostic
+				for line_number in sorted(self.checker.diagnostics)
+				for diagnostic in self.checker.diagnostics[line_number]
+			]
+		if not diagnostics:
+			self.stdscr.addstr(self.rows - 1, 4, self.get_translation("diagnostics", "no_diagnostics"))
+			return
+
+		def jump_to_diagnostic(diagnostic: Diagnostic):
+			lines = self.current_text.split("\n")
+			if diagnostic.line < len(lines):
+				self.jump_to_line(diagnostic.line)
+				self.current_index += min(diagnostic.column, len(lines[diagnostic.line]))
+
+		display_menu(
+			self.stdscr,
+			(
+				*(
+					(
+						diagnostic.message if diagnostic.message is not None else self.get_translation(
+							"diagnostics", "line", line=diagnostic.line + 1,
+							message=self.get_translation("diagnostics", diagnostic.code, **diagnostic.arguments)
+						),
+						partial(jump_to_diagnostic, diagnostic)
+					)
+					for diagnostic in diagnostics
+				),
+				(self.get_translation("cancel"), lambda: None)
+			),
+			label=self.get_translation("diagnostics", "label"),
+			space_out_last_option=True,
+			align_left=True
+		)
+
+
+	def go_to_compiled_line_source(self):
+		"""
+		Asks for a line of the last compiled code shown, e.g. from an error of the C++ compiler ('program.cpp:42:5'),
+		and moves the cursor to the line of the code it was compiled from, using the source map of the compilation.
+		"""
+		if self.last_compiler_name is None:
+			self.stdscr.addstr(self.rows - 1, 4, self.get_translation("source_map", "no_compilation"))
+			return
+
+		# Reads the line number, after the file name if an error message is given
+		self.stdscr.addstr(self.rows - 2, 0, self.get_translation("source_map", "input"))
+		given_line = input_text(self.stdscr)
+		match = re.search(r":(\d+)", given_line) or re.search(r"(\d+)", given_line)
+		if match is None or int(match.group(1)) == 0:
+			self.stdscr.addstr(self.rows - 1, 4, self.get_translation("source_map", "not_a_line", given_line=given_line))
+			return
+
+		# Finds the source line in the source map of the compilation
+		output_line = int(match.group(1))
+		source_line = self.compilers[self.last_compiler_name].get_source_line(output_line - 1)
+		if source_line is None:
+			self.stdscr.addstr(self.rows - 1, 4, self.get_translation("source_map", "generated_line", line=output_line))
+			return
+
+		# The line can come from one of the included files, placed before the code in the compiled program
+		module, source_line = self._program.locate(source_line)
+		if module is None:
+			self.jump_to_line(source_line)
+		else:
+			self.stdscr.addstr(self.rows - 1, 4, self.get_translation(
+				"source_map", "in_module", line=output_line, source_line=source_line + 1, module=module.name
+			))
+
+
+	def format_code(self):
+		"""
+		Formats the code (see the formatting module), keeping the cursor on the same line.
+		"""
+		lines = self.current_text.split("\n")
+		formatted_lines, line_indexes = format_lines(lines)
+		if formatted_lines == lines:
+			return
+
+		# Finds the line and column of the cursor in the formatted code
+		line_index = self.current_text.count("\n", 0, self.current_index)
+		column = self.current_index - (self.current_text.rfind("\n", 0, self.current_index) + 1)
+		new_line_index = line_indexes[line_index]
+		new_column = 0
+		if new_line_index < len(formatted_lines):
+			new_column = min(len(format_line(lines[line_index][:column])), len(formatted_lines[new_line_index]))
+
+		self.current_text = "\n".join(formatted_lines)
+		self.current_index = sum(len(line) + 1 for line in formatted_lines[:new_line_index]) + new_column
+		self.marked_lines = sorted({line_indexes[marked_line] for marked_line in self.marked_lines if marked_line < len(lines)})
+
+
+	def get_program(self) -> Program:
+		"""
+		Returns the parsed current text along with the files it includes, only parsing what changed since the last call.
+		The program is shared by all the compilers, so compiling to several languages only parses the text once.
+		"""
+		program = self.parse_text(self.current_text)
+
+		# Lets the checker know the symbols of the included files, so their uses are not reported as undeclared
+		if program is not self._program and (program.modules or (self._program is not None and self._program.modules)):
+			self.checker.set_included_names(find_included_symbols(program))
+		self._program = program
+		return program
+
+
+	def get_region_program(self) -> Program:
+		"""
+		Returns the parsed current text limited to the marked lines, or to the line of the cursor if no line is marked,
+		along with the structures, constants and declarations they use. Each line brings the whole top-level block
+		containing it, e.g. its function.
+		"""
+		program = self.get_program()
+		if self.marked_lines:
+			line_numbers = self.marked_lines
+		else:
+			line_numbers = [self.current_text[:self.current_index].count('\n')]
+		return slice_program(program, [program.root_start + line_number for line_number in line_numbers])
+
+
+	def parse_text(self, text: str) -> Program:
+		"""
+		Parses the text along with the files it includes, relative to the directory of the edited file.
+		:param text: The text to parse.
+		"""
+		return self.module_linker.link(text, self.current_file_path, self.color_control_flow["variable"])
+
+
+	def localize_diagnostics(self, diagnostics: List[Diagnostic]) -> List[Diagnostic]:
+		"""
+		Moves the errors found by a compiler to the lines of the text, as the compiled program starts with the lines of
+		the included files. The errors of an included file are moved to the line of the text including it.
+		:param diagnostics: The errors found by the compiler in the last parsed program.
+		"""
+		localized_diagnostics = []
+		for diagnostic in diagnostics:
+			module, line_number = self._program.locate(diagnostic.line)
+			if module is None:
+				localized_diagnostics.append(diagnostic._replace(line=line_number))
+			else:
+				localized_diagnostics.append(diagnostic._replace(line=self._program.locate(module.include_line)[1], column=0))
+		return localized_diagnostics
+
+
+	def _prepare_compiler(self, compiler_name: str) -> Tuple[Compiler, Dict[str, Any]]:
+		"""
+		Returns the compiler, along with the settings of the app it compiles with, as the options of its compilation.
+		:param compiler_name: The name of the compiler, e.g. 'algorithmic' or 'C++'.
+		"""
+		return prepare_compiler(self, compiler_name)
+
+
+	def compile(self, noshow:bool=False, region:bool=False) -> Union[None, str]:
 		"""
 		Compiles the inputted text into algorithmic code.
 		:param noshow: Whether not to show the compiled code.
+		:param region: Whether to only compile the marked lines, or the block containing the cursor (see
+			get_region_program).
 		"""
 		# Creates a list if instructions by splitting the text into lines
 		self.instructions_list = self.current_text.split("\n")
 
-		# Updates the compiler's tab char
-		self.compilers["algorithmic"].tab_char = self.tab_char
-
-		# Compiles the code through the Compiler class's compile method
-		final_compiled_code = self.compilers["algorithmic"].compile(self.instructions_list)
+		# Compiles the code through the Compiler class's compile method, pausing the live preview meanwhile
+		self.live_preview.cancel()
+		with self.live_preview.compile_lock:
+			compiler, options = self._prepare_compiler("algorithmic")
+			final_compiled_code = compiler.compile(self.get_region_program() if region else self.get_program(), options)
+			diagnostics = compiler.diagnostics
+		self.last_compiler_name = "algorithmic"
 
 		if noshow is False:
 			if final_compiled_code is not None:
@@ -1868,6 +1998,10 @@ class App:
 				# Saves the compiled code based on the user's choice
 				self.save(final_compiled_code)
 
+			# Lists all the errors found by the compiler
+			else:
+				self.display_diagnostics(self.localize_diagnostics(diagnostics))
+
 			# Clears the screen and reapplies each stylings
 			self.stdscr.clear()
 			self.apply_stylings()
@@ -1876,20 +2010,54 @@ class App:
 			return final_compiled_code
 
 
-	def compile_to_cpp(self):
+	def compile_to_cpp(self, region:bool=False):
 		"""
 		Compiles everything to C++ code ; might not always work.
+		:param region: Whether to only compile the marked lines, or the block containing the cursor (see
+			get_region_program).
 		"""
 		# Creates a list if instructions by splitting the text into lines
 		self.instructions_list = self.current_text.split("\n")
 
-		# Modifies the std::string use of std:: based on its use
-		self.compilers["C++"].var_types["string"] = ("std::" if self.using_namespace_std is False else "") + "string"
-		self.compilers["C++"].use_struct_keyword = self.use_struct_keyword
+		# Compiles the code through the Compiler class's compile method, pausing the live preview meanwhile
+		self.live_preview.cancel()
+		with self.live_preview.compile_lock:
+			compiler, options = self._prepare_compiler("C++")
+			final_compiled_code = compiler.compile(self.get_region_program() if region else self.get_program(), options)
+			diagnostics = compiler.diagnostics
+		self.last_compiler_name = "C++"
+
+		self.show_compilation_result(final_compiled_code, diagnostics, "cpp")
+
+
+	def compile_all_targets(self):
+		"""
+		Compiles the code to every target (algorithmic, C++, and the ones added by plugins), only parsing it once, then
+		shows the result of each compilation in turn.
+		"""
+		compiler_names = [target.compiler_name for target in TARGETS.values()]
+
+		# Compiles the code through the compilers' compile method, pausing the live preview meanwhile
+		self.live_preview.cancel()
+		with self.live_preview.compile_lock:
+			compiled_codes = compile_targets(self, self.get_program(), compiler_names)
+			diagnostics = {compiler_name: self.compilers[compiler_name].diagnostics for compiler_name in compiler_names}
+
+		for target_name, target in TARGETS.items():
+			self.last_compiler_name = target.compiler_name
+			self.show_compilation_result(
+				compiled_codes[target.compiler_name], diagnostics[target.compiler_name], target_name
+			)
 
-		# Compiles the code through the Compiler class's compile method
-		final_compiled_code = self.compilers["C++"].compile(self.instructions_list)
 
+	def show_compilation_result(self, final_compiled_code: Optional[str], diagnostics: List[Diagnostic],
+	                            compilation_type: str):
+		"""
+		Shows the compiled code and lets the user save it, or lists the errors found by the compiler.
+		:param final_compiled_code: The compiled code, or None if errors were found.
+		:param diagnostics: The errors found by the compiler.
+		:param compilation_type: The name of the target, given to the plugins (e.g. "algo" or "cpp").
+		"""
 		# Only does this part if no error was raised (if final_compiled_code is not None)
 		if final_compiled_code is not None:
 			# Shows the compilation result to the user
@@ -1902,7 +2070,7 @@ class App:
 			# Calls each plugins' update_on_compilation method
 			for plugin in self.plugins.values():
 				if hasattr(plugin[1], "update_on_compilation"):
-					plugin[1].update_on_compilation(final_compiled_code, "cpp")
+					plugin[1].update_on_compilation(final_compiled_code, compilation_type)
 
 			# Adds a pause
 			self.stdscr.getch()
@@ -1910,6 +2078,10 @@ class App:
 			# Saves the compiled code based on the user's choice
 			self.save(final_compiled_code)
 
+		# Lists all the errors found by the compiler
+		else:
+			self.display_diagnostics(self.localize_diagnostics(diagnostics))
+
 		# Clears the screen and reapplies each stylings
 		self.stdscr.clear()
 		self.apply_stylings()
@@ -1936,6 +2108,17 @@ def generate_crash_file(app:App, *args):
 
 
 if __name__ == "__main__":
+	# Compiles a whole directory or a file, watches a directory, or formats the code, without the interface, before the working directory
+	# changes
+	if "--compile-dir" in sys.argv:
+		sys.exit(run_batch_compilation(sys.argv))
+	if "--compile-file" in sys.argv:
+		sys.exit(run_file_compilation(sys.argv))
+	if "--watch" in sys.argv:
+		sys.exit(run_watch(sys.argv))
+	if "--format" in sys.argv:
+		sys.exit(run_formatting(sys.argv))
+
 	# Selects the current working directory as the directory of this file
 	os.chdir(os.path.dirname(__file__))
 
@@ -1963,6 +2146,11 @@ if __name__ == "__main__":
 				app.current_text = f.read()
 			# We make it so the quicksave will automatically save to this file
 			app.last_save_action = filename
+			# We load the symbols index saved next to the file
+			app.current_file_path = filename
+			app._load_symbols_index()
+			# We resolve the files it includes, so the checker knows the symbols they declare
+			app.get_program()
 
 		# Detects console closing and creates a .crash file, depending on the OS
 		import platform
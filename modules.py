@@ -0,0 +1,234 @@
+"""
+Resolves the 'include' directives of the code, so the structures, constants and functions shared by several programs
+can be written once in their own file : include "shapes.algo"
+The included files are put before the code, each one once and after the files it includes itself, into a single
+program the compilers compile as usual.
+"""
+import os
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from caching import LRUCache
+from custom_types import ModuleSpan, Statement
+from parsing import Program, build_program, parse_program, parse_statement
+from symbol_table import find_declarations
+
+
+# The keyword of the directive including a file
+INCLUDE_KEYWORD = "include"
+
+
+def get_included_path(statement: Statement) -> Optional[str]:
+	"""
+	Returns the path written in an include directive, e.g. 'shapes.algo' for : include "shapes.algo"
+	:param statement: The statement of the directive.
+	:return: The path, or None if the directive is malformed.
+	"""
+	path = " ".join(statement.params).strip()
+	if len(path) < 3 or path[0] != '"' or path[-1] != '"':
+		return None
+	return path[1:-1]
+
+
+def find_included_symbols(program: Program) -> FrozenSet[str]:
+	"""
+	Returns the names of the symbols declared by the files included in the program.
+	:param program: The program, as linked by a ModuleLinker.
+	"""
+	lines = program.lines
+	return frozenset(
+		symbol.name
+		for module in program.modules
+		for line in lines[module.start:module.end]
+		for symbol in find_declarations(line, program.var_types)
+	)
+
+
+class ModuleLinker:
+	def __init__(self, cache_size: int = 256):
+		"""
+		Resolves the include directives of the code into a single program.
+		Each file is only read again when it was modified, and only parsed again when its content changed, so linking
+		a program whose files did not change does not parse anything. The compilers then reuse the compiled units of
+		the files which did not change from their units cache.
+		:param cache_size: The maximum amount of files kept in memory.
+		"""
+		self._files = LRUCache(cache_size)  # The modification time, size and content of each read file, by path
+		self._modules = LRUCache(cache_size)  # The parsed program of each file, by content and variable types
+		self._roots = LRUCache(16)  # The last parsed code of each edited file, reused to parse its next version
+		self._linked = LRUCache(16)  # The linked programs, by content of the code and of its included files
+		self._dependencies: Dict[str, FrozenSet[str]] = {}  # The paths the last linked code of each file includes, by path
+
+
+	def link(self, source: str, path: Optional[str], var_types: Iterable[str]) -> Program:
+		"""
+		Parses the code along with the files it includes, directly or through other files.
+		The included files come first, each one after the files it includes, and each include directive is replaced
+		by an empty line. An include which cannot be resolved (a file which cannot be read, or which includes itself)
+		is kept, and reported by the compilers.
+		:param source: The code.
+		:param path: The path of the file of the code, the included paths being relative to its directory ; None for
+			the current directory.
+		:param var_types: The basic variable types.
+		:return: The program. If the code includes no file, it is the code parsed on its own.
+		"""
+		var_types = frozenset(var_types)
+		root_key = (path, var_types)
+		root = self._roots.get(root_key)
+		if root is None or root.source != source:
+			root = parse_program(source, var_types, root)
+			self._roots.put(root_key, root)
+		root_path = os.path.abspath(path) if path is not None else None
+		if not any(statement.keyword == INCLUDE_KEYWORD for statement in root.statements):
+			if root_path is not None:
+				self._dependencies[root_path] = frozenset()
+			return root
+
+		# Finds the included files in order, each one after the files it includes
+		directory = os.path.dirname(root_path) if root_path is not None else os.getcwd()
+		modules: List[Tuple[str, Program, int, Dict[int, Optional[Tuple[str, str]]]]] = []
+		dependencies = set()
+		root_resolutions = self._resolve_includes(
+			root, directory, var_types, None, {root_path}, set(), modules, dependencies
+		)
+		if root_path is not None:
+			self._dependencies[root_path] = frozenset(dependencies)
+
+		# Only joins the files again if the code or one of them changed
+		linked_key = (
+			source, path, var_types, tuple((module_path, module.source) for module_path, module, _, _ in modules)
+		)
+		linked = self._linked.get(linked_key)
+		if linked is None:
+			linked = self._join(root, root_resolutions, modules, directory, var_types)
+			self._linked.put(linked_key, linked)
+		return linked
+
+
+	def get_dependencies(self, path: str) -> FrozenSet[str]:
+		"""
+		Returns the absolute paths of the files included by the file, directly or not, when its code was last linked,
+		including the ones which could not be read, so it can be compiled again when one of them changes.
+		:param path: The path of the file.
+		"""
+		return self._dependencies.get(os.path.abspath(path), frozenset())
+
+
+	def _resolve_includes(self, program: Program, directory: str, var_types: FrozenSet[str],
+	                      root_include_line: Optional[int], including_paths: set, included_paths: set,
+	                      modules: list, dependencies: set) -> Dict[int, Optional[Tuple[str, str]]]:
+		"""
+		Resolves the include directives of a program, adding the files it includes to the modules after the files
+		they include themselves.
+		:param program: The parsed code of the file.
+		:param directory: The directory the included paths are relative to.
+		:param var_types: The basic variable types.
+		:param root_include_line: The line of the code including the file, directly or not ; None for the code itself.
+		:param including_paths: The paths of the files being resolved, which would include themselves.
+		:param included_paths: The paths of the files already included.
+		:param modules: The included files, as (path, program, line of the code including it, resolutions).
+		:param dependencies: The paths of the included files, including the ones which cannot be read.
+		:return: The resolution of each include directive of the program, by line : None if it was resolved,
+			otherwise its error code and path.
+		"""
+		resolutions = {}
+		for statement in program.statements:
+			if statement.keyword != INCLUDE_KEYWORD:
+				continue
+			line_number = statement.line_number
+			included_path = get_included_path(statement)
+			if included_path is None:
+				resolutions[line_number] = ("include_not_found", " ".join(statement.params))
+				continue
+			module_path = os.path.abspath(os.path.join(directory, included_path))
+			dependencies.add(module_path)
+
+			if module_path in including_paths:
+				resolutions[line_number] = ("include_cycle", included_path)
+			elif module_path in included_paths:
+				resolutions[line_number] = None
+			else:
+				module = self._load_module(module_path, var_types)
+				if module is None:
+					resolutions[line_number] = ("include_not_found", included_path)
+					continue
+				resolutions[line_number] = None
+				include_line = line_number if root_include_line is None else root_include_line
+				including_paths.add(module_path)
+				module_resolutions = self._resolve_includes(
+					module, os.path.dirname(module_path), var_types, include_line, including_paths, included_paths,
+					modules, dependencies
+				)
+				including_paths.discard(module_path)
+				included_paths.add(module_path)
+				modules.append((module_path, module, include_line, module_resolutions))
+		return resolutions
+
+
+	def _load_module(self, path: str, var_types: FrozenSet[str]) -> Optional[Program]:
+		"""
+		Returns the parsed content of a file, only reading it if it was modified since it was last read, and only
+		parsing it if its content changed.
+		:param path: The absolute path of the file.
+		:param var_types: The basic variable types.
+		:return: The parsed file, or None if it cannot be read.
+		"""
+		try:
+			stat = os.stat(path)
+			signature = (stat.st_mtime_ns, stat.st_size)
+			cached_file = self._files.get(path)
+			if cached_file is not None and cached_file[0] == signature:
+				source = cached_file[1]
+			else:
+				with open(path, "r", encoding="utf-8") as f:
+					source = f.read()
+				self._files.put(path, (signature, source))
+		except (OSError, UnicodeDecodeError):
+			return None
+
+		module = self._modules.get((source, var_types))
+		if module is None:
+			module = parse_program(source, var_types)
+			self._modules.put((source, var_types), module)
+		return module
+
+
+	@staticmethod
+	def _join(root: Program, root_resolutions: Dict[int, Optional[Tuple[str, str]]], modules: list, directory: str,
+	          var_types: FrozenSet[str]) -> Program:
+		"""
+		Puts the included files and the code together into a single program.
+		:param root: The parsed code.
+		:param root_resolutions: The resolution of each include directive of the code.
+		:param modules: The included files in order, as (path, program, line of the code including it, resolutions).
+		:param directory: The directory of the code, the names of the included files being relative to it.
+		:param var_types: The basic variable types.
+		"""
+		root_start = sum(len(module.statements) for _, module, _, _ in modules)
+		lines = []
+		statements = []
+		spans = []
+		include_errors = {}
+		for module_path, module, include_line, resolutions in (*modules, (None, root, None, root_resolutions)):
+			start = len(lines)
+			module_lines = module.lines
+			for line_number, resolution in resolutions.items():
+				if resolution is None:
+					module_lines[line_number] = ""
+				else:
+					include_errors[start + line_number] = resolution
+			lines.extend(module_lines)
+
+			# Moves the statements after the previous files, and removes the resolved includes
+			for statement in module.statements:
+				if statement.line_number in resolutions and resolutions[statement.line_number] is None:
+					statements.append(parse_statement("", start + statement.line_number, var_types))
+				else:
+					statements.append(Statement(start + statement.line_number, *statement[1:]))
+
+			if module_path is not None:
+				try:
+					name = os.path.relpath(module_path, directory)
+				except ValueError:
+					name = module_path
+				spans.append(ModuleSpan(name, module_path, start, len(lines), root_start + include_line))
+		return build_program("\n".join(lines), tuple(statements), var_types, tuple(spans), include_errors)
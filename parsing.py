@@ -0,0 +1,472 @@
+"""
+Parses the code once into an intermediate representation shared by the compilers.
+Each line becomes a statement whose words are split on spaces, except inside string literals, along with its kind
+(e.g. a declaration or the start of a block) and its node : a typed declaration (of a variable, an array, a constant,
+a structure or a function), an assignment, a loop, or an instruction, whose expressions are lexed into tokens.
+The compilers then emit each statement from its node.
+"""
+from bisect import bisect_right
+import re
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple
+
+from caching import LRUCache
+from custom_types import (
+	ArrayDeclaration, Assignment, Comment, ConstantDeclaration, Deletion, Expression, Field, ForLoop,
+	FunctionDeclaration, Instruction, ModuleSpan, Statement, StructDeclaration, StructInitialization, Token,
+	TypeReference, Unit, VariableDeclaration
+)
+from symbol_table import common_prefix_length
+
+
+# Matches each token of an expression, the spaces included, so the tokens put together give back the expression
+TOKEN_PATTERN = re.compile(r'''
+	(?P<string>"[^"]*"?)
+	|(?P<char>'[^']?')
+	|(?P<number>\d+(?:\.\d+)?)
+	|(?P<name>[^\W\d]\w*)
+	|(?P<operator>\+=|-=|\*=|/=|%=|==|!=|<=|>=|<-|&&|\|\||[-+*/%=<>!&|^~])
+	|(?P<space>\s+)
+	|(?P<punctuation>.)
+''', re.VERBOSE | re.DOTALL)
+
+# The keywords whose top-level lines are compiled as their own unit
+UNIT_KEYWORDS = frozenset(("struct", "const"))
+
+# The basic variable types of the language
+BASE_VAR_TYPES = ("int", "float", "string", "bool", "char")
+
+# The keywords opening a block closed by the 'end' keyword
+BLOCK_START_KEYWORDS = frozenset(("for", "while", "if", "switch", "case", "default", "fx"))
+
+# The keywords continuing the block they are in
+BLOCK_CONTINUE_KEYWORDS = frozenset(("else", "elif"))
+
+# The keywords declaring a symbol
+DECLARATION_KEYWORDS = frozenset(("arr", "tab", "const", "struct", "init"))
+
+# The other keywords of the language
+INSTRUCTION_KEYWORDS = frozenset((
+	"print", "input", "return", "CODE_RETOUR", "delete", "fx_start", "vars", "precond", "data", "datar", "result",
+	"desc", "include"
+))
+
+
+def split_words(line: str) -> List[str]:
+	"""
+	Splits the line on each space, except the spaces inside string literals.
+	Like str.split(' '), consecutive spaces give empty words.
+	:param line: The line to split.
+	:return: The list of words.
+	"""
+	if '"' not in line:
+		return line.split(" ")
+
+	words = []
+	word_start = 0
+	in_string = False
+	for index, char in enumerate(line):
+		if char == '"':
+			in_string = not in_string
+		elif char == " " and not in_string:
+			words.append(line[word_start:index])
+			word_start = index + 1
+	words.append(line[word_start:])
+	return words
+
+
+def tokenize(text: str) -> Tuple[Token, ...]:
+	"""
+	Lexes the text of an expression into tokens, the spaces included.
+	:param text: The text to lex.
+	:return: A tuple of tokens.
+	"""
+	return tuple(Token(match.lastgroup, match.group()) for match in TOKEN_PATTERN.finditer(text))
+
+
+def parse_expression(words: Sequence[str]) -> Expression:
+	"""
+	Parses the words of an expression.
+	:param words: The words of the expression, e.g. the parameters of a statement.
+	"""
+	text = " ".join(words)
+	return Expression(text, tokenize(text))
+
+
+def parse_type(text: str) -> TypeReference:
+	"""
+	Parses a type written in the code : a basic type or the name of a structure prefixed by 'struct_', or an array
+	prefixed by 'arr_' followed by the type of its items and its dimensions, separated by underscores. It can be
+	prefixed by 'const_', and followed by '*' for a pointer.
+	:param text: The type, e.g. 'const_arr_int_5_5' or 'struct_Flower*'.
+	"""
+	base = text
+	is_pointer = base[-1:] == "*"
+	if is_pointer:
+		base = base[:-1]
+	is_const = base.startswith("const_")
+	if is_const:
+		base = base[6:]
+	if base.startswith("arr_"):
+		parts = base.split("_")
+		return TypeReference(text, "array", parts[1], is_pointer, is_const, tuple(parts[2:]))
+	if base.startswith("struct_"):
+		return TypeReference(text, "struct", base[7:], is_pointer, is_const, tuple())
+	return TypeReference(text, "basic", base, is_pointer, is_const, tuple())
+
+
+def _strip_trailing_words(params: Sequence[str]) -> List[str]:
+	"""
+	Removes the empty words given by the spaces at the end of a line.
+	:param params: The parameters of the statement.
+	"""
+	params = list(params)
+	while params and params[-1] == "":
+		params.pop()
+	return params
+
+
+def _parse_fields(params: Sequence[str]) -> Tuple[Field, ...]:
+	"""
+	Parses the fields of a structure or the parameters of a function, as pairs of a type and a name.
+	:param params: The types and names, in order. The last name is None if it is missing.
+	"""
+	return tuple(
+		Field(parse_type(params[i]), params[i + 1] if i + 1 < len(params) else None)
+		for i in range(0, len(params), 2)
+	)
+
+
+def parse_variable_declaration(keyword: str, params: Sequence[str]) -> Optional[VariableDeclaration]:
+	"""
+	Parses the declaration of variables : <type> <name> [name...] or <type> <name> = <value>.
+	:return: The declaration, or None if the value is missing.
+	"""
+	if len(params) > 1 and params[1] == "=":
+		if len(params) < 3:
+			return None
+		return VariableDeclaration(parse_type(keyword), (params[0],), parse_expression(params[2:]))
+	return VariableDeclaration(parse_type(keyword), tuple(params), None)
+
+
+def parse_assignment(keyword: str, params: Sequence[str]) -> Optional[Assignment]:
+	"""
+	Parses the assignment of a variable : <name> <operator> <value>.
+	:return: The assignment, or None if the value is missing.
+	"""
+	if len(params) < 2:
+		return None
+	return Assignment(keyword, params[0], parse_expression(params[1:]))
+
+
+def _parse_for(params: Sequence[str]) -> Optional[ForLoop]:
+	""" for <variable> <start> <end> [step] """
+	if len(params) < 3:
+		return None
+	return ForLoop(
+		params[0], parse_expression(params[1:2]), parse_expression(params[2:3]),
+		parse_expression(params[3:4]) if len(params) > 3 else None
+	)
+
+
+def _parse_instruction(params: Sequence[str]) -> Instruction:
+	""" <keyword> <expression> """
+	return Instruction(parse_expression(params))
+
+
+def _parse_comment(params: Sequence[str]) -> Comment:
+	""" <keyword> <text> """
+	return Comment(" ".join(params))
+
+
+def _parse_array(params: Sequence[str]) -> ArrayDeclaration:
+	""" arr <type> <name> <sizes...> """
+	return ArrayDeclaration(
+		params[0] if params else None, params[1] if len(params) > 1 else None,
+		tuple(parse_expression((size,)) for size in params[2:])
+	)
+
+
+def _parse_constant(params: Sequence[str]) -> Optional[ConstantDeclaration]:
+	""" const <type> <name> = <value> """
+	if len(params) < 4 or params[2] != "=":
+		return None
+	return ConstantDeclaration(params[0], params[1], parse_expression(params[3:]))
+
+
+def _parse_struct(params: Sequence[str]) -> Optional[StructDeclaration]:
+	""" struct <name> <type> <field> ... """
+	params = _strip_trailing_words(params)
+	if not params:
+		return None
+	return StructDeclaration(params[0], _parse_fields(params[1:]))
+
+
+def _parse_function(params: Sequence[str]) -> Optional[FunctionDeclaration]:
+	""" fx <return type> <name> <type> <parameter> ... """
+	params = _strip_trailing_words(params)
+	if len(params) < 2:
+		return None
+	return FunctionDeclaration(parse_type(params[0]), params[1], _parse_fields(params[2:]))
+
+
+def _parse_init(params: Sequence[str]) -> StructInitialization:
+	""" init <structure> <name> <field> <value> ... """
+	return StructInitialization(
+		params[0] if params else None, params[1] if len(params) > 1 else None,
+		tuple((params[i], parse_expression(params[i + 1:i + 2])) for i in range(2, len(params) - 1, 2)),
+		params[-1] if len(params) > 2 and len(params) % 2 == 1 else None
+	)
+
+
+def _parse_delete(params: Sequence[str]) -> Deletion:
+	""" delete <name> or delete arr <name> """
+	if params and params[0] == "arr":
+		return Deletion(params[1] if len(params) == 2 else None, True)
+	return Deletion(params[0] if params else None, False)
+
+
+# The function parsing the parameters of each keyword into its node, or None if they are malformed
+NODE_PARSERS: Dict[str, Callable[[Sequence[str]], Optional[tuple]]] = {
+	"for": _parse_for,
+	"while": _parse_instruction,
+	"if": _parse_instruction,
+	"elif": _parse_instruction,
+	"switch": _parse_instruction,
+	"case": _parse_instruction,
+	"default": _parse_instruction,
+	"print": _parse_instruction,
+	"input": _parse_instruction,
+	"return": _parse_instruction,
+	"CODE_RETOUR": _parse_instruction,
+	"include": _parse_instruction,
+	"precond": _parse_comment,
+	"data": _parse_comment,
+	"datar": _parse_comment,
+	"result": _parse_comment,
+	"desc": _parse_comment,
+	"vars": _parse_comment,
+	"fx_start": _parse_comment,
+	"arr": _parse_array,
+	"tab": _parse_array,
+	"const": _parse_constant,
+	"struct": _parse_struct,
+	"fx": _parse_function,
+	"init": _parse_init,
+	"delete": _parse_delete
+}
+
+
+def parse_node(keyword: str, params: Sequence[str], var_types: Iterable[str] = BASE_VAR_TYPES) -> Optional[tuple]:
+	"""
+	Parses a statement into its node : the node of its keyword, a declaration of variables, an assignment, or an
+	instruction made of the whole line (e.g. a function call).
+	:param keyword: The first word of the statement.
+	:param params: The other words of the statement.
+	:param var_types: The basic variable types.
+	:return: The node, or None if the statement has none (e.g. 'end' or an empty line) or is malformed.
+	"""
+	node_parser = NODE_PARSERS.get(keyword)
+	if node_parser is not None:
+		return node_parser(params)
+	if keyword in var_types or (keyword[-1:] == "*" and keyword[:-1] in var_types):
+		return parse_variable_declaration(keyword, params)
+	if params and params[0].endswith("="):
+		return parse_assignment(keyword, params)
+	if keyword in ("else", "end") or (keyword == "" and not any(params)):
+		return None
+	return Instruction(parse_expression((keyword, *params)))
+
+
+def get_statement_kind(keyword: str, params: List[str], var_types: Iterable[str]) -> str:
+	"""
+	Returns the kind of a statement : 'empty', 'block_start', 'block_end', 'block_continue', 'declaration',
+	'assignment', 'instruction' or 'expression'.
+	:param keyword: The first word of the statement.
+	:param params: The other words of the statement.
+	:param var_types: The basic variable types.
+	"""
+	if keyword == "" and not any(params):
+		return "empty"
+	if keyword in BLOCK_START_KEYWORDS:
+		return "block_start"
+	if keyword == "end":
+		return "block_end"
+	if keyword in BLOCK_CONTINUE_KEYWORDS:
+		return "block_continue"
+	if keyword in DECLARATION_KEYWORDS or keyword in var_types or (keyword[-1:] == "*" and keyword[:-1] in var_types):
+		return "declaration"
+	if params and params[0].endswith("="):
+		return "assignment"
+	if keyword in INSTRUCTION_KEYWORDS:
+		return "instruction"
+	return "expression"
+
+
+# The parsed statements of the lines, by line content and variable types, so unchanged lines are not parsed again
+_statements_cache = LRUCache(16384)
+
+
+def parse_statement(line: str, line_number: int, var_types: Iterable[str] = BASE_VAR_TYPES) -> Statement:
+	"""
+	Parses a line of code into a statement.
+	:param line: The line of code.
+	:param line_number: The index of the line.
+	:param var_types: The basic variable types.
+	"""
+	var_types = frozenset(var_types)
+	statement = _statements_cache.get((line, var_types))
+	if statement is None:
+		words = split_words(line)
+		keyword, params = words[0], words[1:]
+		statement = Statement(
+			0, keyword, tuple(params), get_statement_kind(keyword, params, var_types),
+			parse_node(keyword, params, var_types)
+		)
+		_statements_cache.put((line, var_types), statement)
+	return statement._replace(line_number=line_number)
+
+
+class Program:
+	def __init__(self, source: str, statements: Tuple[Statement, ...], blocks: Dict[int, Optional[int]],
+	             units: Tuple[Unit, ...], is_regular: bool, var_types: FrozenSet[str] = frozenset(BASE_VAR_TYPES),
+	             modules: Tuple[ModuleSpan, ...] = tuple(), include_errors: Dict[int, Tuple[str, str]] = None):
+		"""
+		The intermediate representation of a whole document, shared by the compilers.
+		:param source: The code the program was parsed from.
+		:param statements: The statement of each line.
+		:param blocks: The line closing the block opened on each line opening one, or None if the block is not closed.
+		:param units: The top-level functions, structures, constants and runs of main code, in order.
+		:param is_regular: Whether every block is closed and every function is at the top level, in which case the
+			units can be compiled independently.
+		:param var_types: The basic variable types the statements were parsed with.
+		:param modules: The lines of the files included by the code, in order, all placed before the lines of the code
+			itself (see modules.ModuleLinker).
+		:param include_errors: The error code and path of each include which could not be resolved, by line.
+		"""
+		self.source = source
+		self.statements = statements
+		self.blocks = blocks
+		self.units = units
+		self.is_regular = is_regular
+		self.var_types = var_types
+		self.modules = modules
+		self.include_errors = include_errors or {}
+		self._module_starts = [module.start for module in modules]
+
+
+	@property
+	def lines(self) -> List[str]:
+		"""
+		The lines of the source code.
+		"""
+		return self.source.split("\n")
+
+
+	@property
+	def root_start(self) -> int:
+		"""
+		The index of the first line of the code itself, after the lines of the included files.
+		"""
+		return self.modules[-1].end if self.modules else 0
+
+
+	def locate(self, line_number: int) -> Tuple[Optional[ModuleSpan], int]:
+		"""
+		Finds the file a line of the program comes from.
+		:param line_number: The index of the line in the program.
+		:return: The included file of the line, or None if it belongs to the code itself, along with the index of the
+			line in its file.
+		"""
+		root_start = self.root_start
+		if line_number >= root_start:
+			return None, line_number - root_start
+		module = self.modules[bisect_right(self._module_starts, line_number) - 1]
+		return module, line_number - module.start
+
+
+	def get_line_label(self, line_number: int) -> str:
+		"""
+		Returns the line number shown to the user for a line of the program, prefixed by the name of its file if it
+		comes from an included file (e.g. 'shapes.algo:3').
+		:param line_number: The index of the line in the program.
+		"""
+		module, file_line_number = self.locate(line_number)
+		return str(file_line_number + 1) if module is None else f"{module.name}:{file_line_number + 1}"
+
+
+def parse_program(source: str, var_types: Iterable[str] = BASE_VAR_TYPES, previous: Program = None) -> Program:
+	"""
+	Parses the whole code into a program.
+	:param source: The code.
+	:param var_types: The basic variable types.
+	:param previous: A previously parsed version of the code, whose statements are reused for the unchanged lines.
+	:return: The parsed program.
+	"""
+	var_types = frozenset(var_types)
+	lines = source.split("\n")
+	if previous is None:
+		statements = tuple(parse_statement(line, i, var_types) for i, line in enumerate(lines))
+	else:
+		# Only parses the lines between the unchanged start and end of the code
+		previous_lines = previous.lines
+		start = common_prefix_length(previous_lines, lines)
+		suffix = common_prefix_length(previous_lines[start:], lines[start:], reverse=True)
+		end, shift = len(lines) - suffix, len(lines) - len(previous_lines)
+		statements = (
+			previous.statements[:start]
+			+ tuple(parse_statement(lines[i], i, var_types) for i in range(start, end))
+			+ tuple(
+				Statement(statement.line_number + shift, *statement[1:])
+				for statement in previous.statements[len(previous_lines) - suffix:]
+			)
+		)
+	return build_program(source, statements, var_types)
+
+
+def build_program(source: str, statements: Tuple[Statement, ...], var_types: FrozenSet[str],
+                  modules: Tuple[ModuleSpan, ...] = tuple(), include_errors: Dict[int, Tuple[str, str]] = None) -> Program:
+	"""
+	Builds the program from the statements of each of its lines, finding its blocks and top-level units.
+	:param source: The code.
+	:param statements: The statement of each line, in order.
+	:param var_types: The basic variable types the statements were parsed with.
+	:param modules: The lines of the files included by the code, placed before the lines of the code itself.
+	:param include_errors: The error code and path of each include which could not be resolved, by line.
+	:return: The program.
+	"""
+	# Matches the blocks with their end, and finds the top-level units
+	blocks: Dict[int, Optional[int]] = {}
+	blocks_stack: List[int] = []
+	units: List[Unit] = []
+	is_regular = True
+	main_start = 0
+	for statement in statements:
+		i = statement.line_number
+		if statement.kind == "block_start":
+			if statement.keyword == "fx":
+				if blocks_stack:
+					is_regular = False
+				elif main_start < i:
+					units.append(Unit("main", main_start, i))
+			blocks[i] = None
+			blocks_stack.append(i)
+		elif statement.keyword in UNIT_KEYWORDS and not blocks_stack:
+			if main_start < i:
+				units.append(Unit("main", main_start, i))
+			units.append(Unit(statement.keyword, i, i + 1))
+			main_start = i + 1
+		elif statement.kind == "block_end":
+			if not blocks_stack:
+				is_regular = False
+				continue
+			opening_line = blocks_stack.pop()
+			blocks[opening_line] = i
+			if not blocks_stack and statements[opening_line].keyword == "fx":
+				units.append(Unit("function", opening_line, i + 1))
+				main_start = i + 1
+
+	if blocks_stack:
+		is_regular = False
+	if main_start < len(statements):
+		units.append(Unit("main", main_start, len(statements)))
+	return Program(source, statements, blocks, tuple(units), is_regular, var_types, modules, include_errors)
@@ -4,10 +4,12 @@ The Plugin class should be inherited from, rather than used as-is.
 """
 import curses
 import typing_extensions
-from typing import Callable, Type, Any
+from typing import Callable, Type, Any, List
 import inspect
 
-from custom_types import CommandType, OptionType
+from compiler import Compiler
+from custom_types import CommandType, OptionType, Diagnostic
+from headless import register_target
 
 # Imports the main.py file. If another file is used as top-level import, the program will crash.
 import __main__
@@ -56,7 +58,8 @@ class Plugin:
 		"""
 		Gets called at the end of a compilation.
 		:param final_compiled_code: The compiled code.
-		:param compilation_type: The language in which the code was compiled. Can be either "cpp" or "algo".
+		:param compilation_type: The target to which the code was compiled, e.g. "cpp" or "algo", or the name of a
+			target added by a plugin.
 		"""
 		pass
 
@@ -160,6 +163,78 @@ class Plugin:
 			self.config[key] = default
 		return self.config[key]
 
+	def get_completions(self, prefix: str, limit: int = 10, fuzzy: bool = True) -> List[str]:
+		"""
+		Returns the words completing the given prefix, from the keywords, the built-in functions and the symbols
+			declared in the document.
+		:param prefix: The beginning of a word.
+		:param limit: The maximum amount of completions.
+		:param fuzzy: Whether to also return the words starting with a prefix close to the given one.
+		:return: The completions, words starting with the prefix first.
+		"""
+		self.app.symbol_table.update(self.app.current_text.split("\n"))
+		return self.app.completion_engine.complete(prefix, limit, fuzzy)
+
+	def add_instruction(self, compiler_name: str, instruction_name: str, handler: Callable[[str, list, int], None],
+	                    dedented: bool = False) -> None:
+		"""
+		Adds an instruction to one of the compilers, or replaces the handler of an existing one.
+		Should be called in the init function, once the compilers are loaded.
+		:param compiler_name: The name of the compiler, e.g. 'algorithmic' or 'C++'.
+		:param instruction_name: The keyword of the instruction.
+		:param handler: A function called with the instruction's name, its params, and the line number, which rewrites
+			self.app.compilers[compiler_name].instructions_list[line_number]. The line ends and the built-in functions
+			of the rewritten line are then translated like in the other lines.
+		:param dedented: Whether the instruction is written one indentation level lower than the block it is in.
+		"""
+		self.app.compilers[compiler_name].register_instruction(instruction_name, handler, dedented)
+
+	def add_pass(self, compiler_name: str, stage: str, compilation_pass: Callable, instruction_name: str = None) -> None:
+		"""
+		Adds a pass to a stage of the compilation of one of the compilers, to extend the language without replacing
+		its emit_* methods. The stages are, in order (see compiler.PASS_STAGES) :
+		- 'pre_parse' : compilation_pass(compiler, source) returns the source code to parse, keeping each line at its
+		  place ;
+		- 'instruction' : compilation_pass(compiler, statement) returns the statement to dispatch, possibly rewritten,
+		  or None if the pass compiled the line itself into compiler.instructions_list ;
+		- 'post_analysis' : compilation_pass(compiler) gets called once every statement was analyzed, and can report
+		  errors with compiler.error() ;
+		- 'pre_emit' : compilation_pass(compiler) gets called before the analyzed lines of an error-free compilation
+		  are put together, and can rewrite compiler.instructions_list.
+		Should be called in the init function, once the compilers are loaded.
+		:param compiler_name: The name of the compiler, e.g. 'algorithmic' or 'C++'.
+		:param stage: The stage of the compilation.
+		:param compilation_pass: The function called at this stage.
+		:param instruction_name: For the 'instruction' stage, the keyword of the statements the pass is called on ;
+			None to call it on every statement.
+		:exception ValueError: If the stage does not exist.
+		"""
+		self.app.compilers[compiler_name].register_pass(stage, compilation_pass, instruction_name)
+
+	def add_target(self, name: str, compiler_name: str, extension: str, create_compiler: Callable[..., Compiler],
+	               get_options: Callable[[Compiler, AppType], dict] = None) -> None:
+		"""
+		Adds a target the code can be compiled to (e.g. Python), along with its compiler, which inherits from the
+		Compiler class. The target is then available in the batch compiler, the live preview and the compile all command.
+		:param name: The name of the target, e.g. 'py'.
+		:param compiler_name: The name of its compiler in self.app.compilers, e.g. 'Python'.
+		:param extension: The extension of the compiled files, e.g. '.py'.
+		:param create_compiler: A function creating the compiler, given the app and the standard screen.
+		:param get_options: A function returning the settings of the app the compiler is given as options on each
+			compilation (e.g. {"tab_char": self.app.tab_char}), given the compiler and the app. None if the compiler
+			reads its settings by itself.
+		"""
+		register_target(name, compiler_name, extension, create_compiler, get_options)
+		self.app.compilers[compiler_name] = create_compiler(self.app, self.app.stdscr)
+
+	def get_compilation_errors(self, compiler_name: str) -> List[Diagnostic]:
+		"""
+		Returns the errors found by the last compilation of one of the compilers.
+		:param compiler_name: The name of the compiler, e.g. 'algorithmic' or 'C++'.
+		:return: The errors, in order, each with its line, column, code and translated message.
+		"""
+		return list(self.app.compilers[compiler_name].diagnostics)
+
 	def bind_control(self, letter: str, command_prefix: str) -> None:
 		"""
 		Binds a command to a control keybind.
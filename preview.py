@@ -0,0 +1,110 @@
+"""
+Compiles the code in the background a short time after the typing stops, so the compiled code can be shown next to
+the code while typing instead of only when compiling.
+"""
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from compiler import CompilationCancelled, Compiler
+from custom_types import PreviewResult
+from parsing import Program
+
+
+class LivePreview:
+	def __init__(self, prepare_compiler: Callable[[str], Tuple[Compiler, Dict[str, Any]]], delay: float = 0.3,
+	             parse: Optional[Callable[[str], Program]] = None):
+		"""
+		Compiles the latest submitted text on a worker thread, once no text was submitted for the given delay.
+		A submission cancels the compilation of the previous text if it is still running, as its result is outdated.
+		:param prepare_compiler: A function returning the compiler with the given name, along with the options it
+			compiles with.
+		:param delay: The time without any submission before the text is compiled, in seconds.
+		:param parse: A function parsing the text into the program to compile, e.g. along with the files it includes.
+			If None, the compiler parses the lines of the text.
+		"""
+		self.prepare_compiler = prepare_compiler
+		self.delay = delay
+		self.parse = parse
+		self.compile_lock = threading.Lock()  # Held during each compilation, so the interface can pause the preview to compile
+
+		self._condition = threading.Condition()  # Wakes up the worker when a text is submitted
+		self._pending_job: Optional[Tuple[str, str]] = None  # The text and compiler name waiting to be compiled
+		self._submitted_job: Optional[Tuple[str, str]] = None  # The last text and compiler name submitted
+		self._submission_time = 0.  # The time of the last submission
+		self._cancel_event = threading.Event()  # Cancels the running compilation when set
+		self._result: Optional[PreviewResult] = None  # The latest compilation
+		self.version = 0  # Incremented each time a new compilation is published
+		self._thread: Optional[threading.Thread] = None  # The worker thread, started on the first submission
+
+
+	def submit(self, text: str, compiler_name: str) -> None:
+		"""
+		Schedules the text to be compiled in the background. Returns immediately.
+		:param text: The whole text of the document.
+		:param compiler_name: The name of the compiler, e.g. 'algorithmic' or 'C++'.
+		"""
+		with self._condition:
+			if self._submitted_job is not None and text is self._submitted_job[0] and compiler_name == self._submitted_job[1]:
+				return
+			self._submitted_job = self._pending_job = (text, compiler_name)
+			self._submission_time = time.monotonic()
+			self._cancel_event.set()
+			self._condition.notify()
+
+		# Starts the worker if it is not running yet
+		if self._thread is None:
+			self._thread = threading.Thread(target=self._run, name="LivePreview", daemon=True)
+			self._thread.start()
+
+
+	def cancel(self) -> None:
+		"""
+		Cancels the running compilation, e.g. so the interface can use the compilers right away.
+		The compilation is started again once the compilers are available.
+		"""
+		self._cancel_event.set()
+
+
+	def _run(self) -> None:
+		"""
+		The worker loop, compiling the latest submitted text once the submissions stop.
+		"""
+		while True:
+			with self._condition:
+				while self._pending_job is None:
+					self._condition.wait()
+
+				# Waits for the delay without any submission
+				remaining_time = self._submission_time + self.delay - time.monotonic()
+				while remaining_time > 0:
+					self._condition.wait(remaining_time)
+					remaining_time = self._submission_time + self.delay - time.monotonic()
+
+				text, compiler_name = self._pending_job
+				self._pending_job = None
+				self._cancel_event.clear()
+
+			with self.compile_lock:
+				compiler, options = self.prepare_compiler(compiler_name)
+				try:
+					program = text.split("\n") if self.parse is None else self.parse(text)
+					output = compiler.compile(program, options, self._cancel_event)
+				except CompilationCancelled:
+					# Compiles the text again later, unless a newer one was submitted
+					with self._condition:
+						if self._pending_job is None:
+							self._pending_job = (text, compiler_name)
+					continue
+				diagnostics = tuple(compiler.diagnostics)
+
+			self._result = PreviewResult(compiler_name, text, output, diagnostics)
+			self.version += 1
+
+
+	@property
+	def result(self) -> Optional[PreviewResult]:
+		"""
+		The latest compilation, or None if nothing was compiled yet.
+		"""
+		return self._result
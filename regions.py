@@ -0,0 +1,99 @@
+"""
+Limits a program to a region of its code (e.g. the marked lines, or the function containing the cursor), so it can be
+compiled on its own, along with the structures, constants and declarations the region uses.
+"""
+from bisect import bisect_right
+from typing import Dict, Iterable, List, Set, Tuple
+
+from checker import FREE_TEXT_KEYWORDS
+from parsing import Program, build_program, parse_statement
+from symbol_table import find_declarations, find_identifiers
+
+
+def find_top_level_spans(program: Program) -> List[Tuple[int, int]]:
+	"""
+	Returns the lines of each top-level statement of the program : a whole block (e.g. a function or a loop) for the
+	blocks, and a single line otherwise.
+	:param program: The program.
+	:return: The first and last line of each top-level statement, in order.
+	"""
+	spans = []
+	line_number = 0
+	while line_number < len(program.statements):
+		if program.statements[line_number].kind == "block_start":
+			end = program.blocks.get(line_number)
+			# A block never closed lasts until the end of the program
+			end = len(program.statements) - 1 if end is None else end
+		else:
+			end = line_number
+		spans.append((line_number, end))
+		line_number = end + 1
+	return spans
+
+
+def find_used_names(lines: Iterable[str]) -> Set[str]:
+	"""
+	Returns the names of the symbols the lines may use, including the structures used as types (e.g. 'Point' for
+	'struct_Point').
+	:param lines: The lines.
+	"""
+	names = set()
+	for line in lines:
+		if line.lstrip(" ").split(" ", 1)[0] in FREE_TEXT_KEYWORDS:
+			continue
+		for _, identifier in find_identifiers(line):
+			names.add(identifier)
+			if "struct_" in identifier:
+				names.add(identifier.partition("struct_")[2])
+	return names
+
+
+def slice_program(program: Program, line_numbers: Iterable[int]) -> Program:
+	"""
+	Limits the program to the top-level statements containing the given lines (e.g. the whole function containing a
+	line), along with the top-level structures, constants and declarations they use, directly or not.
+	The other lines are emptied rather than removed, so the lines keep their number, and the errors and the source map
+	of the compilation of the region point to the lines of the whole program.
+	:param program: The whole program.
+	:param line_numbers: The indexes of the lines of the region.
+	:return: The program of the region.
+	"""
+	lines = program.lines
+	spans = find_top_level_spans(program)
+	span_starts = [start for start, _ in spans]
+
+	# Finds the top-level statements containing the lines
+	kept_lines = set()
+	for line_number in line_numbers:
+		if 0 <= line_number < len(lines):
+			start, end = spans[bisect_right(span_starts, line_number) - 1]
+			kept_lines.update(range(start, end + 1))
+
+	# Finds the single-line top-level declarations (structures, constants, variables) outside of the region
+	declarations: Dict[str, List[int]] = {}
+	for start, end in spans:
+		if start == end and start not in kept_lines and program.statements[start].kind == "declaration":
+			for symbol in find_declarations(lines[start], program.var_types):
+				declarations.setdefault(symbol.name, []).append(start)
+
+	# Adds the declarations of the names used by the region, then the ones used by the added declarations
+	declared_names = {
+		symbol.name for line_number in kept_lines for symbol in find_declarations(lines[line_number], program.var_types)
+	}
+	added_lines = kept_lines
+	while added_lines:
+		used_names = find_used_names(lines[line_number] for line_number in added_lines) - declared_names
+		declared_names.update(used_names)
+		added_lines = {
+			line_number for name in used_names for line_number in declarations.get(name, ())
+		} - kept_lines
+		kept_lines |= added_lines
+
+	# Empties the other lines
+	empty_statement = parse_statement("", 0, program.var_types)
+	statements = tuple(
+		statement if statement.line_number in kept_lines else empty_statement._replace(line_number=statement.line_number)
+		for statement in program.statements
+	)
+	source = "\n".join(line if line_number in kept_lines else "" for line_number, line in enumerate(lines))
+	return build_program(source, statements, program.var_types, program.modules, program.include_errors)
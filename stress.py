@@ -0,0 +1,105 @@
+"""
+Checks that the compilers can compile on several threads at once, each compilation being isolated from the others.
+Usage : python stress.py [--threads N] [--rounds N]
+Programs with and without errors are compiled with different options by --threads threads at once, --rounds times
+each, all with the same compilers, while the settings of the app are toggled as they would be from the editor. Each
+compiled code and its errors are compared with those of the same compilation on a single thread. The exit code is 1 if
+any of them differs.
+"""
+import random
+import sys
+import threading
+
+from benchmark import SAMPLE_PROGRAM, make_large_program
+from headless import HeadlessApp
+
+
+# The programs compiled, the last ones having errors
+PROGRAMS = (
+	SAMPLE_PROGRAM,
+	make_large_program(SAMPLE_PROGRAM, 4),
+	SAMPLE_PROGRAM + "\nint* pointer\ndelete pointer",
+	"if age > 3\nprint age\nelse\nend\nend\nwhile"
+)
+
+# The options each program is compiled with, by compiler
+OPTIONS = {
+	"algorithmic": ({}, {"tab_char": "  "}, {"use_ptrs_and_malloc": True}),
+	"C++": ({}, {"tab_char": "    "}, {"use_struct_keyword": True, "var_types": {
+		"int": "int", "float": "float", "string": "string", "bool": "bool", "char": "char"
+	}}, {"use_ptrs_and_malloc": True}, {"using_namespace_std": True, "use_ptrs_and_malloc": True})
+}
+
+# The settings of the app toggled during the compilations, which must not change the compilations already running
+TOGGLED_SETTINGS = ("use_ptrs_and_malloc", "using_namespace_std", "use_struct_keyword")
+
+
+def compile_once(app: HeadlessApp, job: tuple) -> tuple:
+	"""
+	Compiles a program, and returns the compiled code along with the errors.
+	:param app: The headless app holding the compilers.
+	:param job: The program, the name of the compiler and the options of the compilation.
+	"""
+	program, compiler_name, options = job
+	compiler = app.compilers[compiler_name]
+	compiled_code = compiler.compile(program.split("\n"), options)
+	return compiled_code, tuple(compiler.diagnostics)
+
+
+def stress(app: HeadlessApp, threads_count: int, rounds: int) -> list:
+	"""
+	Compiles every job on several threads at once, and returns the mismatches with their compilation on one thread.
+	:param app: The headless app holding the compilers.
+	:param threads_count: The amount of threads compiling at once.
+	:param rounds: The amount of times each thread compiles each job, in a random order.
+	:return: The jobs whose compiled code or errors differed, along with the thread that compiled them.
+	"""
+	jobs = [
+		(program, compiler_name, options)
+		for program in PROGRAMS for compiler_name, compiler_options in OPTIONS.items() for options in compiler_options
+	]
+	expected_results = [compile_once(app, job) for job in jobs]
+	mismatches = []
+	barrier = threading.Barrier(threads_count + 1)
+	done = threading.Event()
+
+	# Toggles the settings of the app, as the editor does, until every thread is done compiling
+	def toggle_settings():
+		barrier.wait()
+		while not done.is_set():
+			for name in TOGGLED_SETTINGS:
+				setattr(app, name, not getattr(app, name))
+
+	def run(thread_index: int):
+		order = list(range(len(jobs))) * rounds
+		random.Random(thread_index).shuffle(order)
+		barrier.wait()
+		for job_index in order:
+			if compile_once(app, jobs[job_index]) != expected_results[job_index]:
+				mismatches.append((thread_index, jobs[job_index][1:]))
+
+	toggling_thread = threading.Thread(target=toggle_settings)
+	toggling_thread.start()
+	threads = [threading.Thread(target=run, args=(i,)) for i in range(threads_count)]
+	for thread in threads:
+		thread.start()
+	for thread in threads:
+		thread.join()
+	done.set()
+	toggling_thread.join()
+	return mismatches
+
+
+if __name__ == "__main__":
+	args = sys.argv[1:]
+	threads_count = int(args[args.index("--threads") + 1]) if "--threads" in args else 8
+	rounds = int(args[args.index("--rounds") + 1]) if "--rounds" in args else 5
+
+	# Switches between the threads as often as possible, so the compilations interleave
+	sys.setswitchinterval(1e-6)
+	app = HeadlessApp(compile_cache_size_mb=0)
+	mismatches = stress(app, threads_count, rounds)
+	for thread_index, (compiler_name, options) in mismatches:
+		print(f"Thread {thread_index} : mismatch with the {compiler_name} compiler and the options {options}")
+	print(f"{threads_count} threads, {rounds} rounds : {len(mismatches)} mismatch(es)")
+	sys.exit(1 if mismatches else 0)
@@ -0,0 +1,382 @@
+"""
+Keeps track of the symbols (variables, arrays, structures, functions, constants) declared and used in the code.
+The table is updated incrementally : only the lines that changed since the last update are analyzed again.
+It can also be saved next to the file, so big files open with their symbols already analyzed.
+"""
+import json
+import os
+import re
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional, Sequence, Set, Tuple
+
+from custom_types import SymbolType
+
+
+# Matches the string and character literals (to skip them) and the identifiers of a line
+IDENTIFIER_PATTERN = re.compile(r'''"[^"]*"?|'[^']?'|[A-Za-z_][A-Za-z0-9_]*''')
+
+# The keywords opening a block closed by the 'end' keyword
+BLOCK_KEYWORDS = frozenset(("for", "while", "if", "switch", "case", "default", "fx"))
+
+# The version of the format of the index files ; index files with another version are ignored
+INDEX_VERSION = 1
+
+
+def get_index_path(file_path: str) -> str:
+	"""
+	Returns the path of the symbols index saved next to the given file.
+	:param file_path: The path to a code file.
+	"""
+	directory, filename = os.path.split(os.path.abspath(file_path))
+	return os.path.join(directory, f".{filename}.symbols.json")
+
+
+def find_identifiers(line: str) -> Tuple[Tuple[int, str], ...]:
+	"""
+	Finds all the identifiers of a line, outside of string and character literals and field accesses.
+	:param line: The line to analyze.
+	:return: A tuple of (column, identifier).
+	>>> find_identifiers("char c = 'a'")
+	((0, 'char'), (5, 'c'))
+	"""
+	identifiers = []
+	for match in IDENTIFIER_PATTERN.finditer(line):
+		start = match.start()
+		# Skips the strings, the characters and the fields of structures
+		if line[start] in "\"'" or (start > 0 and line[start - 1] == '.'):
+			continue
+		identifiers.append((start, match.group()))
+	return tuple(identifiers)
+
+
+def find_declarations(line: str, var_types: Iterable[str]) -> Tuple[SymbolType, ...]:
+	"""
+	Finds all the symbols declared by a line.
+	:param line: The line to analyze.
+	:param var_types: The basic variable types (e.g. 'int').
+	:return: A tuple of the declared symbols.
+	"""
+	words = [word for word in line.split(" ") if word != ""]
+	if len(words) < 2:
+		return tuple()
+	keyword = words[0]
+
+	# Arrays : arr <type> <name> <sizes...>
+	if keyword in ("arr", "tab"):
+		if len(words) > 2:
+			return (SymbolType(words[2], "array", words[1]),)
+
+	# Structures : struct <name> <type> <field> ...
+	elif keyword == "struct":
+		return (SymbolType(words[1], "struct", None),)
+
+	# Functions and procedures : fx <return_type> <name> <type> <param> ...
+	elif keyword == "fx":
+		if len(words) > 2:
+			declarations = [SymbolType(words[2], "procedure" if words[1] == "void" else "function", words[1])]
+			for i in range(3, len(words) - 1, 2):
+				declarations.append(SymbolType(words[i + 1].lstrip("&"), "parameter", words[i]))
+			return tuple(declarations)
+
+	# Constants : const <type> <name> = <value>
+	elif keyword == "const":
+		if len(words) > 2:
+			return (SymbolType(words[2], "constant", words[1]),)
+
+	# Structure initializations : init <struct> <name> ...
+	elif keyword == "init":
+		if len(words) > 2:
+			return (SymbolType(words[2], "variable", f"struct_{words[1]}"),)
+
+	# Variables : <type> <name> [name...] or <type> <name> = <value>
+	elif keyword in var_types or (keyword[-1] == "*" and keyword[:-1] in var_types):
+		names = words[1:2] if len(words) > 2 and words[2] == "=" else words[1:]
+		return tuple(SymbolType(name, "variable", keyword) for name in names)
+
+	return tuple()
+
+
+def common_prefix_length(a: Sequence[str], b: Sequence[str], reverse: bool = False) -> int:
+	"""
+	Returns the length of the common prefix (or suffix) of two lists of lines.
+	The lists are compared by chunks of growing size, so unchanged regions are compared at C speed.
+	:param a: The first list.
+	:param b: The second list.
+	:param reverse: Whether to find the common suffix instead.
+	:return: The amount of equal lines at the start (or the end) of both lists.
+	"""
+	max_length = min(len(a), len(b))
+	length, step = 0, 1
+	while step != 0 and length < max_length:
+		chunk_end = min(length + step, max_length)
+		if reverse:
+			same = a[len(a) - chunk_end:len(a) - length] == b[len(b) - chunk_end:len(b) - length]
+		else:
+			same = a[length:chunk_end] == b[length:chunk_end]
+		if same:
+			length = chunk_end
+			step *= 2
+		else:
+			step //= 2
+	return length
+
+
+class SymbolTable:
+	def __init__(self, var_types: Iterable[str]):
+		"""
+		A per-document table of the declared symbols.
+		:param var_types: The basic variable types (e.g. 'int').
+		"""
+		self.var_types = frozenset(var_types)
+		self._lines: List[str] = []  # The lines of the document at the last update
+		self._declarations: List[Tuple[SymbolType, ...]] = []  # The symbols declared on each line
+		self._uses: List[FrozenSet[str]] = []  # The identifiers used on each line
+		self._symbols: Dict[str, List[SymbolType]] = {}  # Every declaration of each symbol name
+		self._ranges: Optional[List[Tuple[int, int, bool]]] = None  # The range of lines each line's declarations cover, computed on demand
+		self._listeners: List[Callable[[Set[str], Set[str]], None]] = []  # Called with the added and removed names on change
+
+
+	def add_listener(self, listener: Callable[[Set[str], Set[str]], None]) -> None:
+		"""
+		Registers a function called whenever symbol names appear in or disappear from the table.
+		:param listener: A function taking the set of added names and the set of removed names.
+		"""
+		self._listeners.append(listener)
+
+
+	def _notify(self, added: Set[str], removed: Set[str]) -> None:
+		"""
+		Calls the listeners with the names that actually changed.
+		:param added: The names that were added to the table.
+		:param removed: The names that were removed from the table.
+		"""
+		added, removed = added - removed, removed - added
+		if added or removed:
+			for listener in self._listeners:
+				listener(added, removed)
+
+
+	def update(self, lines: Sequence[str]) -> Tuple[int, int]:
+		"""
+		Updates the table with the new lines of the document, only analyzing the lines that changed.
+		:param lines: All the lines of the document.
+		:return: The range of new lines that were analyzed, as (start, end) with end excluded.
+		"""
+		# Finds the region that changed since the last update
+		start = common_prefix_length(self._lines, lines)
+		if start == len(self._lines) == len(lines):
+			return start, start
+		suffix = common_prefix_length(self._lines[start:], lines[start:], reverse=True)
+		old_end, new_end = len(self._lines) - suffix, len(lines) - suffix
+
+		# Forgets the declarations of the removed lines
+		removed_names = set()
+		for declarations in self._declarations[start:old_end]:
+			for symbol in declarations:
+				self._symbols[symbol.name].remove(symbol)
+				if not self._symbols[symbol.name]:
+					del self._symbols[symbol.name]
+					removed_names.add(symbol.name)
+
+		# Analyzes the new lines
+		new_declarations = [find_declarations(line, self.var_types) for line in lines[start:new_end]]
+		added_names = self._add_declarations(new_declarations)
+
+		self._lines[start:old_end] = lines[start:new_end]
+		self._declarations[start:old_end] = new_declarations
+		self._uses[start:old_end] = [
+			frozenset(identifier for _, identifier in find_identifiers(line)) for line in lines[start:new_end]
+		]
+		self._ranges = None
+		self._notify(added_names, removed_names)
+		return start, new_end
+
+
+	def _add_declarations(self, declarations_per_line: Iterable[Tuple[SymbolType, ...]]) -> Set[str]:
+		"""
+		Adds the given declarations to the index of the symbols.
+		:param declarations_per_line: The symbols declared on each line.
+		:return: The names that were not declared before.
+		"""
+		added_names = set()
+		for declarations in declarations_per_line:
+			for symbol in declarations:
+				if symbol.name not in self._symbols:
+					self._symbols[symbol.name] = []
+					added_names.add(symbol.name)
+				self._symbols[symbol.name].append(symbol)
+		return added_names
+
+
+	def lookup(self, name: str) -> Optional[SymbolType]:
+		"""
+		Returns the first declaration of the symbol with the given name, or None if it is not declared.
+		:param name: The name of the symbol.
+		"""
+		declarations = self._symbols.get(name)
+		return declarations[0] if declarations else None
+
+
+	def kind_of(self, name: str) -> Optional[str]:
+		"""
+		Returns the kind of the symbol with the given name ('variable', 'array', 'struct', 'function',
+		'procedure', 'parameter' or 'constant'), or None if it is not declared.
+		:param name: The name of the symbol.
+		"""
+		declarations = self._symbols.get(name)
+		return declarations[0].kind if declarations else None
+
+
+	def declarations_on(self, line_number: int) -> Tuple[SymbolType, ...]:
+		"""
+		Returns the symbols declared on the given line.
+		:param line_number: The index of the line.
+		"""
+		return self._declarations[line_number]
+
+
+	def definition_lines(self, name: str) -> List[int]:
+		"""
+		Returns the lines on which the symbol with the given name is declared.
+		:param name: The name of the symbol.
+		"""
+		if name not in self._symbols:
+			return []
+		return [
+			i for i, declarations in enumerate(self._declarations)
+			if any(symbol.name == name for symbol in declarations)
+		]
+
+
+	def find_definition(self, name: str, from_line: int = 0) -> Optional[int]:
+		"""
+		Returns the line of the declaration of the symbol visible from the given line, or None if it is not declared.
+		The innermost declaration covering the line is preferred, e.g. a local variable over a global one.
+		:param name: The name of the symbol.
+		:param from_line: The line from which the symbol is used.
+		>>> table = SymbolTable(("int",))
+		>>> _ = table.update(["int a = 1", "fx void f", "int a = 2", "print a", "end"])
+		>>> table.find_definition("a", 3), table.find_definition("a", 4), table.find_definition("a", 0)
+		(2, 2, 0)
+		"""
+		definition_lines = self.definition_lines(name)
+		if not definition_lines:
+			return None
+		# Looks for a local declaration covering the line, the innermost one being the last one
+		for line_number in reversed(definition_lines):
+			first_covered_line, last_covered_line, is_local = self.get_range(line_number)
+			if is_local and first_covered_line <= from_line <= last_covered_line:
+				return line_number
+
+		# Otherwise, the first global declaration
+		return definition_lines[0]
+
+
+	def find_references(self, name: str) -> List[int]:
+		"""
+		Returns the lines on which the given identifier is used, declarations included.
+		:param name: The identifier.
+		"""
+		return [i for i, uses in enumerate(self._uses) if name in uses]
+
+
+	def symbol_names(self) -> Tuple[str, ...]:
+		"""
+		Returns the names of all the declared symbols.
+		"""
+		return tuple(self._symbols.keys())
+
+
+	def get_range(self, line_number: int) -> Tuple[int, int, bool]:
+		"""
+		Returns the range of lines covered by the declarations of the given line, as (first, last, is_local).
+		A function covers its whole body, a declaration inside a function covers the rest of the function,
+		and any other declaration covers the rest of the document.
+		:param line_number: The index of the line.
+		:return: The first and last covered lines, and whether the declarations are local to a function.
+		"""
+		if self._ranges is None:
+			self._ranges = self._compute_ranges()
+		return self._ranges[line_number]
+
+
+	def _compute_ranges(self) -> List[Tuple[int, int, bool]]:
+		"""
+		Computes the range of lines covered by the declarations of each line, and whether they are local to a function.
+		"""
+		last_line = len(self._lines) - 1
+		ranges = [(i, last_line, False) for i in range(len(self._lines))]
+		blocks_stack = []  # The opened blocks, as (keyword, line number)
+		function_lines = []  # The lines of the current function, waiting for its end
+		for i, line in enumerate(self._lines):
+			keyword = line.split(" ", 1)[0]
+			if function_lines:
+				function_lines.append(i)
+			if keyword in BLOCK_KEYWORDS:
+				blocks_stack.append((keyword, i))
+				if keyword == "fx" and not function_lines:
+					function_lines.append(i)
+			elif keyword == "end" and blocks_stack:
+				opening_keyword, opening_line = blocks_stack.pop()
+				# Once the function ends, every line inside of it covers up to its end
+				if opening_keyword == "fx" and function_lines and function_lines[0] == opening_line:
+					ranges[opening_line] = (opening_line, i, True)
+					for line_number in function_lines[1:]:
+						ranges[line_number] = (line_number, i, True)
+					function_lines.clear()
+		return ranges
+
+
+	def save(self, path: str) -> None:
+		"""
+		Saves the analysis of each line to the given path, so it can be loaded back instead of analyzing the lines.
+		:param path: The path of the index file.
+		"""
+		analyzed_lines = {}
+		for line, declarations, uses in zip(self._lines, self._declarations, self._uses):
+			if declarations or uses:
+				analyzed_lines[line] = [[list(symbol) for symbol in declarations], sorted(uses)]
+		with open(path, "w", encoding="utf-8") as f:
+			json.dump({
+				"version": INDEX_VERSION,
+				"var_types": sorted(self.var_types),
+				"lines": analyzed_lines
+			}, f)
+
+
+	def load(self, path: str, lines: Sequence[str]) -> bool:
+		"""
+		Replaces the contents of the table with the given lines, reusing the analysis saved at the given path.
+		Lines missing from the index are analyzed normally.
+		:param path: The path of the index file.
+		:param lines: All the lines of the document.
+		:return: Whether the index file could be used.
+		"""
+		try:
+			with open(path, "r", encoding="utf-8") as f:
+				index = json.load(f)
+			if index["version"] != INDEX_VERSION or index["var_types"] != sorted(self.var_types):
+				return False
+			analyzed_lines = index["lines"]
+		except (OSError, ValueError, KeyError, TypeError):
+			return False
+
+		self._lines = list(lines)
+		self._declarations, self._uses = [], []
+		no_uses = frozenset()
+		for line in self._lines:
+			analysis = analyzed_lines.get(line)
+			if analysis is not None:
+				self._declarations.append(tuple(SymbolType(*symbol) for symbol in analysis[0]))
+				self._uses.append(frozenset(analysis[1]))
+			elif line == "":
+				self._declarations.append(tuple())
+				self._uses.append(no_uses)
+			else:
+				self._declarations.append(find_declarations(line, self.var_types))
+				self._uses.append(frozenset(identifier for _, identifier in find_identifiers(line)))
+		old_names = set(self._symbols.keys())
+		self._symbols = {}
+		self._add_declarations(self._declarations)
+		self._ranges = None
+		self._notify(set(self._symbols.keys()), old_names)
+		return True
@@ -0,0 +1,273 @@
+"""
+Recompiles the .algo files of a directory each time they change, without opening the editor :
+python main.py --watch src/ --target cpp[,algo] [--output-dir build/] [--config plugins_config.json]
+The changes are notified by inotify on Linux, and found by polling the modification times of the files elsewhere.
+"""
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from custom_types import CompilationResult
+from headless import TARGETS, HeadlessApp, find_source_files, get_output_paths
+
+
+# The inotify events changing the files of a watched directory : a file written and closed, moved in or out,
+# created or deleted, and the directory itself deleted
+IN_CLOSE_WRITE = 0x8
+IN_MOVED_FROM = 0x40
+IN_MOVED_TO = 0x80
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_DELETE_SELF = 0x400
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+
+# The inotify flag of the events about a directory
+IN_ISDIR = 0x40000000
+
+# The header of each inotify event : the watch descriptor, the mask, the cookie and the length of the name
+INOTIFY_EVENT = struct.Struct("iIII")
+
+
+class PollingNotifier:
+	def __init__(self, interval: float = 0.5):
+		"""
+		Notifies the changes of a directory by waking up at a regular interval, the changed files being found by
+		comparing their modification times.
+		:param interval: The time between two checks of the files, in seconds.
+		"""
+		self.name = "polling"
+		self.interval = interval
+
+
+	def wait(self, timeout: float) -> bool:
+		"""
+		Waits for the next check of the files.
+		:param timeout: The maximum time to wait, in seconds.
+		:return: Whether the files may have changed, which is always the case once the interval passed.
+		"""
+		time.sleep(min(timeout, self.interval))
+		return timeout >= self.interval
+
+
+	def close(self) -> None:
+		pass
+
+
+class InotifyNotifier:
+	def __init__(self, directory: str):
+		"""
+		Notifies the changes of a directory and its subdirectories through inotify, so the files are only checked
+		when one of them changed.
+		:param directory: The watched directory.
+		:exception OSError: If inotify is not available.
+		"""
+		self.name = "inotify"
+		library_path = ctypes.util.find_library("c")
+		self._libc = ctypes.CDLL(library_path, use_errno=True)
+		self._file_descriptor = self._libc.inotify_init1(os.O_NONBLOCK | getattr(os, "O_CLOEXEC", 0))
+		if self._file_descriptor < 0:
+			raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+		self._watched_directories: Dict[int, str] = {}  # The path of each watched directory, by watch descriptor
+		self._add_watches(directory)
+
+
+	def _add_watches(self, directory: str) -> None:
+		"""
+		Watches a directory and its subdirectories.
+		:param directory: The directory to watch.
+		"""
+		for root, _, _ in os.walk(directory):
+			watch_descriptor = self._libc.inotify_add_watch(self._file_descriptor, os.fsencode(root), WATCH_MASK)
+			if watch_descriptor >= 0:
+				self._watched_directories[watch_descriptor] = root
+
+
+	def wait(self, timeout: float) -> bool:
+		"""
+		Waits for the files of the directory to change.
+		:param timeout: The maximum time to wait, in seconds.
+		:return: Whether the files changed.
+		"""
+		readable, _, _ = select.select([self._file_descriptor], [], [], timeout)
+		if not readable:
+			return False
+		try:
+			events = os.read(self._file_descriptor, 64 * 1024)
+		except BlockingIOError:
+			return False
+
+		# Watches the new subdirectories too
+		offset = 0
+		while offset + INOTIFY_EVENT.size <= len(events):
+			watch_descriptor, mask, _, name_length = INOTIFY_EVENT.unpack_from(events, offset)
+			offset += INOTIFY_EVENT.size
+			name = events[offset:offset + name_length].rstrip(b"\0")
+			offset += name_length
+			if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO) and watch_descriptor in self._watched_directories:
+				self._add_watches(os.path.join(self._watched_directories[watch_descriptor], os.fsdecode(name)))
+		return True
+
+
+	def close(self) -> None:
+		os.close(self._file_descriptor)
+
+
+def create_notifier(directory: str, poll_interval: float = 0.5):
+	"""
+	Returns the notifier of the changes of the directory : inotify where available, otherwise polling.
+	:param directory: The watched directory.
+	:param poll_interval: The time between two checks of the files when polling, in seconds.
+	"""
+	if sys.platform.startswith("linux"):
+		try:
+			return InotifyNotifier(directory)
+		# The C library can be missing or lack inotify (e.g. on some containers or libcs)
+		except (OSError, AttributeError, TypeError):
+			pass
+	return PollingNotifier(poll_interval)
+
+
+class DirectoryWatcher:
+	def __init__(self, app: HeadlessApp, directory: str, targets: List[str], output_directory: str = None,
+	             settle_delay: float = 0.1, poll_interval: float = 0.5):
+		"""
+		Recompiles the .algo files of a directory when they change, along with the files including them.
+		:param app: The headless app compiling the files.
+		:param directory: The watched directory.
+		:param targets: The targets of the compilation, keys of TARGETS.
+		:param output_directory: The directory the compiled files are written to, keeping the structure of the source
+			directory. If None, each compiled file is written next to its source file.
+		:param settle_delay: The time without any change before the changed files are compiled, in seconds, so a
+			file written several times in a row (e.g. by an editor saving it) is only compiled once.
+		:param poll_interval: The time between two checks of the files when inotify is not available, in seconds.
+		"""
+		self.app = app
+		self.directory = directory
+		self.targets = targets
+		self.output_directory = output_directory
+		self.settle_delay = settle_delay
+		self.notifier = create_notifier(directory, poll_interval)
+		self._signatures: Dict[str, Tuple[int, int]] = {}  # The modification time and size of each checked file, by path
+
+
+	def _get_signatures(self) -> Dict[str, Tuple[int, int]]:
+		"""
+		Returns the modification time and size of the source files and of the files they include, by absolute path.
+		"""
+		paths = {os.path.abspath(path) for path in find_source_files(self.directory, self.output_directory)}
+		for path in tuple(paths):
+			paths.update(self.app.module_linker.get_dependencies(path))
+		signatures = {}
+		for path in paths:
+			try:
+				stat = os.stat(path)
+			except OSError:
+				continue
+			signatures[path] = (stat.st_mtime_ns, stat.st_size)
+		return signatures
+
+
+	def find_changes(self) -> Set[str]:
+		"""
+		Returns the absolute paths of the files created, modified or deleted since the last call.
+		"""
+		signatures = self._get_signatures()
+		changed_paths = {
+			path for path in signatures.keys() | self._signatures.keys()
+			if signatures.get(path) != self._signatures.get(path)
+		}
+		self._signatures = signatures
+		return changed_paths
+
+
+	def compile_changes(self, changed_paths: Set[str]) -> List[CompilationResult]:
+		"""
+		Compiles the changed source files, and the source files including a changed file.
+		:param changed_paths: The absolute paths of the changed files.
+		:return: The result of the compilation of each file to each target.
+		"""
+		results = []
+		for path in find_source_files(self.directory, self.output_directory):
+			absolute_path = os.path.abspath(path)
+			if absolute_path in changed_paths or not changed_paths.isdisjoint(
+				self.app.module_linker.get_dependencies(absolute_path)
+			):
+				results.extend(self.app.compile_file_targets(
+					path, self.targets, get_output_paths(path, self.targets, self.directory, self.output_directory)
+				))
+
+		# Starts checking the files newly included, without compiling the files including them again
+		for path, signature in self._get_signatures().items():
+			self._signatures.setdefault(path, signature)
+		return results
+
+
+	def run(self, on_results: Callable[[List[CompilationResult]], None], stop_event: Optional[threading.Event] = None):
+		"""
+		Compiles every file, then recompiles the files each time they change, until the stop event is set.
+		:param on_results: Called with the results of each compilation of the changed files.
+		:param stop_event: Stops watching when set ; None to watch until interrupted.
+		"""
+		on_results(self.compile_changes(self.find_changes()))
+		try:
+			while stop_event is None or not stop_event.is_set():
+				if not self.notifier.wait(0.5):
+					continue
+
+				# Waits for the writes to stop, so a file written several times in a row is only compiled once
+				while self.notifier.wait(self.settle_delay):
+					pass
+				changed_paths = self.find_changes()
+				if changed_paths:
+					on_results(self.compile_changes(changed_paths))
+		finally:
+			self.notifier.close()
+
+
+def run_watch(argv: List[str]) -> int:
+	"""
+	Watches a directory from the command line arguments, recompiling its files when they change and reporting the
+	timing and errors of each compilation, until interrupted.
+	:param argv: The command line arguments, containing --watch, and optionally --target (a comma-separated list of
+		targets ; 'cpp' by default), --output-dir and --config.
+	:return: The exit code : 0 once interrupted, 1 if the arguments are invalid.
+	"""
+	def get_argument(name: str, default):
+		return argv[argv.index(name) + 1] if name in argv else default
+
+	directory = get_argument("--watch", ".")
+	targets = get_argument("--target", "cpp").split(",")
+	output_directory = get_argument("--output-dir", None)
+	config_path = get_argument("--config", os.path.join(os.path.dirname(os.path.abspath(__file__)), "plugins_config.json"))
+
+	app = HeadlessApp.from_config(config_path)
+	for target in targets:
+		if target not in TARGETS:
+			print(app.get_translation("batch", "unknown_target", target=target, targets=", ".join(TARGETS)), file=sys.stderr)
+			return 1
+	if not os.path.isdir(directory):
+		print(app.get_translation("batch", "no_files", directory=directory), file=sys.stderr)
+		return 1
+
+	def report(results: List[CompilationResult]):
+		for result in results:
+			if result.error is None:
+				print(app.get_translation("batch", "compiled", **result._asdict()), flush=True)
+			else:
+				print(app.get_translation("batch", "failed", **result._asdict()), file=sys.stderr, flush=True)
+				for diagnostic in result.diagnostics:
+					print(f"\t{diagnostic.message}", file=sys.stderr, flush=True)
+
+	watcher = DirectoryWatcher(app, directory, targets, output_directory)
+	print(app.get_translation("watch", "watching", directory=directory, mode=watcher.notifier.name), flush=True)
+	try:
+		watcher.run(report)
+	except KeyboardInterrupt:
+		print(app.get_translation("watch", "stopped"))
+	return 0